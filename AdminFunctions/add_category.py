@@ -3,10 +3,13 @@ Add category functionality for admin
 """
 
 from Authentication.admin_login import validate_admin_session
-from data.categories import categories_data, Category
+from data.categories import categories_data, category_ids, Category
+from data.results import CatalogChange
+from data.instrumentation import instrumented
 
 
-def add_category(session_id: str, name: str, description: str = ""):
+@instrumented
+def add_category(session_id: str, name: str, description: str = "") -> CatalogChange:
     """
     Add new category (admin function)
     
@@ -16,7 +19,7 @@ def add_category(session_id: str, name: str, description: str = ""):
         description: Category description (optional)
     
     Returns:
-        category_id: ID of the newly created category
+        CatalogChange with the ID of the newly created category
     
     Raises:
         AuthenticationError: If session is invalid
@@ -25,17 +28,11 @@ def add_category(session_id: str, name: str, description: str = ""):
     # Validate admin session
     validate_admin_session(session_id)
     
-    try:
-        # Generate new category ID
-        category_id = f"cat{len(categories_data) + 1}"
-        
-        # Create new category
-        category = Category(category_id, name, description)
-        categories_data[category_id] = category
-        
-        print(f"Category '{name}' added successfully with ID: {category_id}")
-        return category_id
-        
-    except ValueError as e:
-        print(f"Error adding category: {e}")
-        raise
+    # Generate new category ID
+    category_id = category_ids.next_id()
+    
+    # Create new category
+    category = Category(category_id, name, description)
+    categories_data[category_id] = category
+    
+    return CatalogChange("category", "added", category_id, name)
@@ -3,13 +3,18 @@ Add product functionality for admin
 """
 
 from Authentication.admin_login import validate_admin_session
-from data.products import products_data, Product
+from data.products import (products_data, product_ids, index_product, Product,
+                           validate_price, validate_stock)
 from data.categories import categories_data
+from data.search import search_index
 from data.exceptions import CategoryNotFoundError
+from data.results import CatalogChange
+from data.instrumentation import instrumented
 
 
+@instrumented
 def add_product(session_id: str, name: str, price: float, category_id: str, 
-                description: str = "", stock: int = 0):
+                description: str = "", stock: int = 0) -> CatalogChange:
     """
     Add new product (admin function)
     
@@ -22,7 +27,7 @@ def add_product(session_id: str, name: str, price: float, category_id: str,
         stock: Initial stock quantity (optional)
     
     Returns:
-        product_id: ID of the newly created product
+        CatalogChange with the ID of the newly created product
     
     Raises:
         AuthenticationError: If session is invalid
@@ -32,21 +37,20 @@ def add_product(session_id: str, name: str, price: float, category_id: str,
     # Validate admin session
     validate_admin_session(session_id)
     
-    try:
-        # Check if category exists
-        if category_id not in categories_data:
-            raise CategoryNotFoundError(f"Category with ID {category_id} not found")
-        
-        # Generate new product ID
-        product_id = f"prod{len(products_data) + 1}"
-        
-        # Create new product
-        product = Product(product_id, name, price, category_id, description, stock)
-        products_data[product_id] = product
-        
-        print(f"Product '{name}' added successfully with ID: {product_id}")
-        return product_id
-        
-    except (CategoryNotFoundError, ValueError) as e:
-        print(f"Error adding product: {e}")
-        raise
\ No newline at end of file
+    validate_price(price)
+    validate_stock(stock)
+    
+    # Check if category exists
+    if category_id not in categories_data:
+        raise CategoryNotFoundError(f"Category with ID {category_id} not found")
+    
+    # Generate new product ID
+    product_id = product_ids.next_id()
+    
+    # Create new product
+    product = Product(product_id, name, price, category_id, description, stock)
+    products_data[product_id] = product
+    index_product(product)
+    search_index.add(product)
+    
+    return CatalogChange("product", "added", product_id, name)
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Bulk price and stock update functionality for admin
+"""
+
+from array import array
+from typing import Iterable, List, Optional
+
+from Authentication.admin_login import validate_admin_session
+from data.products import products_data, category_index, validate_price
+from data.carts import reprice_carts
+from data.inventory import inventory
+from data.exceptions import ProductNotFoundError, CategoryNotFoundError
+from data.categories import categories_data
+from data.results import BulkUpdate
+from data.instrumentation import instrumented
+
+
+def _select_products(category_id: Optional[str], product_ids: Optional[Iterable[str]]) -> List:
+    """Resolve the target products of a bulk operation"""
+    if (category_id is None) == (product_ids is None):
+        raise ValueError("Specify either a category ID or product IDs")
+
+    if category_id is not None:
+        if category_id not in categories_data:
+            raise CategoryNotFoundError(f"Category with ID {category_id} not found")
+        return category_index.get_products(category_id)
+
+    products = []
+    missing = []
+    for product_id in dict.fromkeys(product_ids):
+        product = products_data.get(product_id)
+        if product is None:
+            missing.append(product_id)
+        else:
+            products.append(product)
+    if missing:
+        raise ProductNotFoundError(f"Products not found: {', '.join(missing[:10])}"
+                                   + (f" and {len(missing) - 10} more" if len(missing) > 10 else ""))
+    return products
+
+
+@instrumented
+def bulk_update_prices(session_id: str, category_id: str = None,
+                       product_ids: Iterable[str] = None,
+                       multiplier: float = None, price: float = None) -> BulkUpdate:
+    """
+    Reprice a whole category or set of products at once (admin function)
+
+    Args:
+        session_id: Admin's session identifier
+        category_id: Reprice every active product of this category
+        product_ids: Reprice these products instead of a category
+        multiplier: Factor applied to current prices, e.g. 0.9 for 10% off
+        price: Absolute price to set instead of a multiplier
+
+    Returns:
+        BulkUpdate with the number of products repriced
+
+    Raises:
+        AuthenticationError: If session is invalid
+        CategoryNotFoundError: If category doesn't exist
+        ProductNotFoundError: If any product doesn't exist
+        ValueError: If input validation fails; no price is changed then
+    """
+    # Validate admin session
+    validate_admin_session(session_id)
+
+    if (multiplier is None) == (price is None):
+        raise ValueError("Specify either a multiplier or a price")
+
+    products = _select_products(category_id, product_ids)
+    old_prices = array("d", [product.price for product in products])
+
+    # Compute and validate every new price before changing any
+    if multiplier is not None:
+        new_prices = array("d", [value * multiplier for value in old_prices])
+    else:
+        new_prices = array("d", [price]) * len(products)
+    if new_prices:
+        validate_price(min(new_prices))
+
+    for product, old_price, new_price in zip(products, old_prices, new_prices):
+        product.price = new_price
+        reprice_carts(product.product_id, old_price)
+        products_data.mark_dirty(product.product_id)
+    return BulkUpdate("price", len(products))
+
+
+@instrumented
+def bulk_adjust_stock(session_id: str, delta: int, category_id: str = None,
+                      product_ids: Iterable[str] = None) -> BulkUpdate:
+    """
+    Add a stock delta to a whole category or set of products (admin function)
+
+    Args:
+        session_id: Admin's session identifier
+        delta: Units to add (negative to remove)
+        category_id: Adjust every active product of this category
+        product_ids: Adjust these products instead of a category
+
+    Returns:
+        BulkUpdate with the number of products adjusted
+
+    Raises:
+        AuthenticationError: If session is invalid
+        CategoryNotFoundError: If category doesn't exist
+        ProductNotFoundError: If any product doesn't exist
+        ValueError: If any stock would become negative; no stock is changed then
+    """
+    # Validate admin session
+    validate_admin_session(session_id)
+
+    products = _select_products(category_id, product_ids)
+    inventory.adjust_stock((product, delta) for product in products)
+    for product in products:
+        products_data.mark_dirty(product.product_id)
+    return BulkUpdate("stock", len(products))
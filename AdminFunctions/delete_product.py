@@ -4,10 +4,14 @@ Delete product functionality for admin
 
 from Authentication.admin_login import validate_admin_session
 from data.products import products_data
+from data.search import search_index
 from data.exceptions import ProductNotFoundError
+from data.results import CatalogChange
+from data.instrumentation import instrumented
 
 
-def delete_product(session_id: str, product_id: str):
+@instrumented
+def delete_product(session_id: str, product_id: str) -> CatalogChange:
     """
     Delete product (admin function)
     
@@ -15,6 +19,9 @@ def delete_product(session_id: str, product_id: str):
         session_id: Admin's session identifier
         product_id: ID of the product to delete
     
+    Returns:
+        CatalogChange for the deleted product
+    
     Raises:
         AuthenticationError: If session is invalid
         ProductNotFoundError: If product doesn't exist
@@ -22,16 +29,13 @@ def delete_product(session_id: str, product_id: str):
     # Validate admin session
     validate_admin_session(session_id)
     
-    try:
-        # Check if product exists
-        if product_id not in products_data:
-            raise ProductNotFoundError(f"Product with ID {product_id} not found")
-        
-        product = products_data[product_id]
-        product.deactivate()
-        
-        print(f"Product '{product.name}' deleted successfully!")
-        
-    except ProductNotFoundError as e:
-        print(f"Error deleting product: {e}")
-        raise
\ No newline at end of file
+    # Check if product exists
+    if product_id not in products_data:
+        raise ProductNotFoundError(f"Product with ID {product_id} not found")
+    
+    product = products_data[product_id]
+    product.deactivate()
+    search_index.remove(product_id)
+    products_data.mark_dirty(product_id)
+    
+    return CatalogChange("product", "deleted", product_id, product.name)
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""
+Bulk catalog import functionality for admin
+"""
+
+from Authentication.admin_login import validate_admin_session
+from data.catalog_import import import_catalog_file, ImportReport
+from data.instrumentation import instrumented
+
+
+@instrumented
+def import_catalog(session_id: str, path: str, kind: str = "products") -> ImportReport:
+    """
+    Import products or categories from a CSV or JSONL file (admin function)
+    
+    Args:
+        session_id: Admin's session identifier
+        path: Path of the CSV or JSONL file
+        kind: "products" or "categories"
+    
+    Returns:
+        ImportReport with imported and rejected row counts
+    
+    Raises:
+        AuthenticationError: If session is invalid
+        ValueError: If kind is not supported
+        OSError: If the file cannot be read
+    """
+    # Validate admin session
+    validate_admin_session(session_id)
+    
+    return import_catalog_file(path, kind)
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Sales dashboard functionality for admin
+"""
+
+from Authentication.admin_login import validate_admin_session
+from data.analytics import sales_analytics, TOTAL
+from data.products import products_data
+from data.categories import categories_data
+from data.results import SalesDashboard, SalesFigure
+from data.instrumentation import instrumented
+
+
+@instrumented
+def sales_dashboard(session_id: str, days: int = 7, top: int = 5) -> SalesDashboard:
+    """
+    Sales totals from the checkout rollups, without reading any orders (admin function)
+
+    Args:
+        session_id: Admin's session identifier
+        days: Days covered by the daily, payment method and top seller figures
+        top: Number of top products and categories
+
+    Returns:
+        SalesDashboard with today's, hourly, daily and per-dimension totals
+
+    Raises:
+        AuthenticationError: If session is invalid
+        ValueError: If days is outside the kept daily buckets or top is not positive
+    """
+    # Validate admin session
+    validate_admin_session(session_id)
+
+    if not 0 < days <= sales_analytics.daily_buckets:
+        raise ValueError(f"Days must be between 1 and {sales_analytics.daily_buckets}")
+    if top <= 0:
+        raise ValueError("Number of top sellers must be positive")
+
+    def name_of(store, key: str) -> str:
+        entity = store.get(key)
+        return entity.name if entity is not None else key
+
+    return SalesDashboard(
+        days,
+        SalesFigure("Today", *sales_analytics.totals(TOTAL, days=1)),
+        SalesFigure("Last 24 hours", *sales_analytics.totals(TOTAL, hours=24)),
+        [SalesFigure(start.strftime("%d %b %H:00"), units, revenue)
+         for start, units, revenue in sales_analytics.hourly(TOTAL, 24)],
+        [SalesFigure(start.strftime("%d %b %Y"), units, revenue)
+         for start, units, revenue in sales_analytics.daily(TOTAL, days)],
+        [SalesFigure(method, units, revenue)
+         for method, units, revenue in sales_analytics.top("payment_method", days, 0)],
+        [SalesFigure(name_of(categories_data, category_id), units, revenue)
+         for category_id, units, revenue in sales_analytics.top("category", days, top)],
+        [SalesFigure(name_of(products_data, product_id), units, revenue)
+         for product_id, units, revenue in sales_analytics.top("product", days, top)],
+    )
@@ -0,0 +1,39 @@
+"""
+Settlement of in-doubt payments for admin
+"""
+
+from Authentication.admin_login import validate_admin_session
+from data.payment import payment_processor
+from data.shopping import settle_held_checkouts
+from data.results import PaymentSettlement
+from data.instrumentation import instrumented
+
+
+@instrumented
+def settle_payments(session_id: str) -> PaymentSettlement:
+    """
+    Settle charges whose outcome the gateway never reported (admin function)
+
+    Charges are re-sent with their original idempotency key, so the gateway
+    reports what happened to them. Checkouts held for a settled charge are
+    completed or have their stock returned.
+
+    Args:
+        session_id: Admin's session identifier
+
+    Returns:
+        PaymentSettlement with the transaction IDs by new status
+
+    Raises:
+        AuthenticationError: If session is invalid
+    """
+    # Validate admin session
+    validate_admin_session(session_id)
+
+    outcomes = payment_processor.settle_in_doubt()
+    orders_settled = settle_held_checkouts(outcomes)
+    by_status = {"SUCCESS": [], "FAILED": [], "PENDING": []}
+    for transaction_id, status in outcomes.items():
+        by_status[status].append(transaction_id)
+    return PaymentSettlement(by_status["SUCCESS"], by_status["FAILED"], by_status["PENDING"],
+                             orders_settled)
@@ -4,11 +4,17 @@ Update product functionality for admin
 
 from Authentication.admin_login import validate_admin_session
 from data.products import products_data
+from data.carts import reprice_carts
+from data.inventory import inventory
+from data.search import search_index
 from data.exceptions import ProductNotFoundError
+from data.results import CatalogChange
+from data.instrumentation import instrumented
 
 
+@instrumented
 def update_product(session_id: str, product_id: str, name: str = None, 
-                  price: float = None, description: str = None, stock: int = None):
+                  price: float = None, description: str = None, stock: int = None) -> CatalogChange:
     """
     Update existing product (admin function)
     
@@ -20,6 +26,9 @@ def update_product(session_id: str, product_id: str, name: str = None,
         description: New product description (optional)
         stock: New stock quantity (optional)
     
+    Returns:
+        CatalogChange for the updated product
+    
     Raises:
         AuthenticationError: If session is invalid
         ProductNotFoundError: If product doesn't exist
@@ -28,25 +37,26 @@ def update_product(session_id: str, product_id: str, name: str = None,
     # Validate admin session
     validate_admin_session(session_id)
     
-    try:
-        # Check if product exists
-        if product_id not in products_data:
-            raise ProductNotFoundError(f"Product with ID {product_id} not found")
-        
-        product = products_data[product_id]
-        
-        # Update product attributes if provided
-        if name is not None:
-            product.name = name
-        if price is not None:
-            product.price = price
-        if description is not None:
-            product.description = description
-        if stock is not None:
-            product.stock = stock
-        
-        print(f"Product '{product.name}' updated successfully!")
-        
-    except (ProductNotFoundError, ValueError) as e:
-        print(f"Error updating product: {e}")
-        raise
\ No newline at end of file
+    # Check if product exists
+    if product_id not in products_data:
+        raise ProductNotFoundError(f"Product with ID {product_id} not found")
+    
+    product = products_data[product_id]
+    
+    # Update product attributes if provided
+    if name is not None:
+        product.name = name
+    if price is not None:
+        old_price = product.price
+        product.price = price
+        reprice_carts(product_id, old_price)
+    if description is not None:
+        product.description = description
+    if stock is not None:
+        # Through the inventory locks, so checkouts of this product see one order of changes
+        inventory.set_stock(product, stock)
+    if name is not None or description is not None:
+        search_index.update(product)
+    products_data.mark_dirty(product_id)
+    
+    return CatalogChange("product", "updated", product_id, product.name)
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""
+Transaction ledger queries and daily revenue for admin
+"""
+
+from datetime import date, datetime
+from typing import List, Optional
+
+from Authentication.admin_login import validate_admin_session
+from data.payment import payment_processor
+from data.ledger import TransactionPage, DailyRevenue, DEFAULT_PAGE_SIZE
+from data.instrumentation import instrumented
+
+
+@instrumented
+def view_transactions(session_id: str, user_id: Optional[str] = None,
+                      start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      payment_method: Optional[str] = None,
+                      page_size: int = DEFAULT_PAGE_SIZE,
+                      cursor: Optional[str] = None) -> TransactionPage:
+    """
+    List payments newest first, filtered by user, time range and payment method (admin function)
+
+    Args:
+        session_id: Admin's session identifier
+        user_id: Only this user's payments (optional)
+        start: Earliest time, inclusive (optional)
+        end: Latest time, exclusive (optional)
+        payment_method: Only this payment method (optional)
+        page_size: Maximum number of payments per page
+        cursor: Cursor from the previous page (optional)
+
+    Returns:
+        TransactionPage with the payments and the cursor of the next page
+
+    Raises:
+        AuthenticationError: If session is invalid
+        ValueError: If the filters or the cursor are invalid
+    """
+    # Validate admin session
+    validate_admin_session(session_id)
+
+    return payment_processor.query_transactions(user_id, start, end, payment_method,
+                                                page_size=page_size, cursor=cursor)
+
+
+@instrumented
+def view_daily_revenue(session_id: str, start: Optional[date] = None,
+                       end: Optional[date] = None) -> List[DailyRevenue]:
+    """
+    Payments and revenue per day (admin function)
+
+    Args:
+        session_id: Admin's session identifier
+        start: First day, inclusive (optional)
+        end: Last day, inclusive (optional)
+
+    Returns:
+        DailyRevenue per day with payments, oldest first
+
+    Raises:
+        AuthenticationError: If session is invalid
+    """
+    # Validate admin session
+    validate_admin_session(session_id)
+
+    return payment_processor.daily_revenue(start, end)
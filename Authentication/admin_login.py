@@ -2,11 +2,13 @@
 Admin login functionality
 """
 
-from data.admin import admin_data
+from data.admin import admin_directory
 from data.sessions import auth_manager
 from data.exceptions import AuthenticationError
+from data.instrumentation import instrumented
 
 
+@instrumented
 def admin_login(username: str, password: str) -> str:
     """
     Authenticate admin and create session
@@ -21,13 +23,7 @@ def admin_login(username: str, password: str) -> str:
     Raises:
         AuthenticationError: If login fails
     """
-    try:
-        session_id = auth_manager.login_admin(admin_data, username, password)
-        print(f"Welcome Admin {username}! Login successful.")
-        return session_id
-    except AuthenticationError as e:
-        print(f"Admin login failed: {e}")
-        raise
+    return auth_manager.login_admin(admin_directory, username, password)
 
 
 def validate_admin_session(session_id: str) -> str:
@@ -57,4 +53,3 @@ def admin_logout(session_id: str):
         session_id: Session identifier to logout
     """
     auth_manager.logout_admin(session_id)
-    print("Admin logged out successfully!")
@@ -2,11 +2,13 @@
 User login functionality
 """
 
-from data.users import users_data
+from data.users import user_directory
 from data.sessions import auth_manager
 from data.exceptions import AuthenticationError
+from data.instrumentation import instrumented
 
 
+@instrumented
 def user_login(username: str, password: str) -> str:
     """
     Authenticate user and create session
@@ -21,13 +23,7 @@ def user_login(username: str, password: str) -> str:
     Raises:
         AuthenticationError: If login fails
     """
-    try:
-        session_id = auth_manager.login_user(users_data, username, password)
-        print(f"Welcome {username}! Login successful.")
-        return session_id
-    except AuthenticationError as e:
-        print(f"Login failed: {e}")
-        raise
+    return auth_manager.login_user(user_directory, username, password)
 
 
 def validate_user_session(session_id: str) -> str:
@@ -56,5 +52,4 @@ def user_logout(session_id: str):
     Args:
         session_id: Session identifier to logout
     """
-    auth_manager.logout_user(session_id)
-    print("User logged out successfully!")
\ No newline at end of file
+    auth_manager.logout_user(session_id)
\ No newline at end of file
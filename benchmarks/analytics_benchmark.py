@@ -0,0 +1,155 @@
+"""
+Sales rollup cost at checkout and dashboard reads vs. replaying orders
+
+Records synthetic orders spread over the last weeks into the sales
+rollups, timing the per-order cost including the bucket rotations. Also
+times orders that all land in the current hour, as they do at checkout
+between rotations, and the first order of a new hour. Then times the
+dashboard queries against recomputing the same figures from the list
+of orders. Fails if the rollups and the replay disagree, or if rollups
+rebuilt from the stored payments, as at startup, differ from them.
+
+Run from the project root:
+    python -m benchmarks.analytics_benchmark [orders] [products]
+"""
+
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Tuple
+
+from data.analytics import SalesAnalytics, TOTAL, HOUR, DAY
+from data.payment import Payment
+
+CATEGORIES = 50
+DAYS_OF_ORDERS = 30
+DASHBOARD_DAYS = 7
+TOP = 5
+READS = 100
+STEADY_ORDERS = 20_000
+
+
+class SyntheticProduct(NamedTuple):
+    product_id: str
+    category_id: str
+    price: float
+
+
+def generate_orders(count: int, products: List[SyntheticProduct],
+                    now: float) -> List[Tuple[float, str, List[Tuple[str, str, int, float]], float]]:
+    """(time, payment method, lines, amount) of orders over the last DAYS_OF_ORDERS days, oldest first"""
+    rng = random.Random(3)
+    orders = []
+    for _ in range(count):
+        lines = [(product.product_id, product.category_id, rng.randint(1, 3), product.price)
+                 for product in rng.sample(products, rng.randint(1, 4))]
+        orders.append((now - rng.uniform(0, DAYS_OF_ORDERS * DAY), rng.choice(Payment.PAYMENT_METHODS),
+                       lines, sum(price * quantity for _, _, quantity, price in lines)))
+    orders.sort(key=lambda order: order[0])
+    return orders
+
+
+def replay(orders, since: float) -> Dict[str, Dict[str, List]]:
+    """Figures of the dashboard recomputed from every order placed since"""
+    figures: Dict[str, Dict[str, List]] = {"total": {}, "product": {}, "category": {}}
+    for when, _, lines, amount in orders:
+        if when < since:
+            continue
+        total = figures["total"].setdefault("", [0, 0])
+        total[1] += round(amount * 100)
+        for product_id, category_id, quantity, price in lines:
+            paise = round(price * quantity * 100)
+            total[0] += quantity
+            for dimension, key in (("product", product_id), ("category", category_id)):
+                entry = figures[dimension].setdefault(key, [0, 0])
+                entry[0] += quantity
+                entry[1] += paise
+    return figures
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    product_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    rng = random.Random(1)
+    products = [SyntheticProduct(f"prod{i}", f"cat{i % CATEGORIES}", round(rng.uniform(10, 5000), 2))
+                for i in range(product_count)]
+    now = time.time()
+    orders = generate_orders(count, products, now)
+
+    analytics = SalesAnalytics(clock=lambda: now)
+    start = time.perf_counter()
+    for when, payment_method, lines, amount in orders:
+        analytics.record_order(lines, payment_method, amount, when)
+    elapsed = time.perf_counter() - start
+    print(f"Recorded {count:,} orders over {product_count:,} products in {elapsed:.2f}s "
+          f"({elapsed / count * 1_000_000:.1f} us per order, "
+          f"{DAYS_OF_ORDERS * 24} hourly rotations included)")
+
+    steady = SalesAnalytics(clock=lambda: now)
+    steady_orders = orders[-STEADY_ORDERS:]
+    start = time.perf_counter()
+    for _, payment_method, lines, amount in steady_orders:
+        steady.record_order(lines, payment_method, amount)
+    elapsed = time.perf_counter() - start
+    print(f"Within one hour: {elapsed / len(steady_orders) * 1_000_000:.1f} us per order")
+
+    # The first order of an hour only clears the slots of its own keys
+    _, payment_method, lines, amount = orders[-1]
+    start = time.perf_counter()
+    steady.record_order(lines, payment_method, amount, now + HOUR)
+    print(f"First order of a new hour: {(time.perf_counter() - start) * 1_000_000:.1f} us")
+
+    timings = []
+    for _ in range(READS):
+        start = time.perf_counter()
+        analytics.totals(TOTAL, hours=24)
+        analytics.hourly(TOTAL, 24)
+        analytics.daily(TOTAL, DASHBOARD_DAYS)
+        analytics.top("payment_method", DASHBOARD_DAYS, 0)
+        analytics.top("category", DASHBOARD_DAYS, TOP)
+        products_top = analytics.top("product", DASHBOARD_DAYS, TOP)
+        timings.append(time.perf_counter() - start)
+    print(f"Dashboard from rollups: {statistics.median(timings) * 1000:.2f} ms")
+
+    # The rollups cover whole local days, so replay from the start of the oldest one
+    local_now = now + time.localtime(now).tm_gmtoff
+    since = (local_now // DAY - DASHBOARD_DAYS + 1) * DAY - time.localtime(now).tm_gmtoff
+    start = time.perf_counter()
+    expected = replay(orders, since)
+    print(f"Same figures by replaying orders: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    errors: List[str] = []
+    units, revenue = analytics.totals(TOTAL, days=DASHBOARD_DAYS)
+    if [units, round(revenue * 100)] != expected["total"].get("", [0, 0]):
+        errors.append(f"{DASHBOARD_DAYS}-day total {units} units / {revenue:.2f} differs from the replay")
+    ranked = sorted(expected["product"].items(), key=lambda item: (-item[1][1], item[0]))[:TOP]
+    if [(key, units, round(revenue * 100)) for key, units, revenue in products_top] != \
+            [(key, units, paise) for key, (units, paise) in ranked]:
+        errors.append("top products differ from the replay")
+    for category_id, units, revenue in analytics.top("category", DASHBOARD_DAYS, 0):
+        if [units, round(revenue * 100)] != expected["category"].get(category_id):
+            errors.append(f"category {category_id} differs from the replay")
+
+    # After a restart the rollups are rebuilt from the payments stored with their lines
+    restarted = SalesAnalytics(clock=lambda: now)
+    restarted.record_payments({"timestamp": datetime.fromtimestamp(when), "payment_method": payment_method,
+                               "amount": amount, "lines": [list(line) for line in lines]}
+                              for when, payment_method, lines, amount in orders)
+    for dimension in ("payment_method", "category", "product"):
+        if restarted.top(dimension, DASHBOARD_DAYS, 0) != analytics.top(dimension, DASHBOARD_DAYS, 0):
+            errors.append(f"{dimension} rollups rebuilt from stored payments differ")
+    if restarted.hourly(TOTAL, 24) != analytics.hourly(TOTAL, 24):
+        errors.append("hourly totals rebuilt from stored payments differ")
+
+    for error in errors[:20]:
+        print(f"FAIL: {error}")
+    if not errors:
+        print("OK: rollups match a full replay of the orders")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Stress test of the async user flows with many concurrent sessions
+
+Logs in N synthetic users and runs one shopping coroutine per session
+on a single event loop: browse, add items, view and trim the cart,
+then check out twice at once to race the same cart. Scarce stock makes
+sessions compete for products. Afterwards it checks that stock was
+neither oversold nor lost and that cart totals stayed consistent.
+
+Run from the project root:
+    python -m benchmarks.async_stress [sessions]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from data.sessions import auth_manager
+from data.users import User, user_directory
+from data.categories import Category, categories_data
+from data.products import Product, products_data, index_product
+from data.carts import find_inconsistent_carts
+from data.exceptions import CartError, PaymentError, ProductNotFoundError
+from data.results import CheckoutReceipt
+from user_Functions.async_flows import (view_catalog_async, add_to_cart_async,
+                                        remove_from_cart_async, view_cart_async,
+                                        checkout_async)
+
+PRODUCTS = 200
+STOCK_PER_PRODUCT = 60
+PASSWORD = "stress-test"
+
+
+def generate_data(sessions: int) -> Tuple[List[str], List[str]]:
+    """Add a category, scarce products and logged-in users; return (session IDs, product IDs)"""
+    categories_data["stress-cat"] = Category("stress-cat", "Stress Category")
+    product_ids = []
+    for i in range(PRODUCTS):
+        product = Product(f"stress-prod{i}", f"Stress Product {i}", 100.0 + i, "stress-cat",
+                          "Synthetic product", STOCK_PER_PRODUCT)
+        products_data[product.product_id] = product
+        index_product(product)
+        product_ids.append(product.product_id)
+
+    session_ids = []
+    for i in range(sessions):
+        username = f"stress_user_{i}"
+        user_directory.add(User(f"stress-user{i}", username, PASSWORD, f"stress{i}@example.com"))
+        session_ids.append(auth_manager.login_user(user_directory, username, PASSWORD))
+    return session_ids, product_ids
+
+
+async def shop(session_id: str, product_ids: List[str], rng: random.Random,
+               sold: Dict[str, int]) -> str:
+    """One shopper's session; returns its outcome"""
+    await view_catalog_async(session_id, category_id="stress-cat", sort_by="price")
+    chosen = rng.sample(product_ids, rng.randint(1, 4))
+    for product_id in chosen:
+        try:
+            await add_to_cart_async(session_id, product_id, rng.randint(1, 3))
+        except (CartError, ProductNotFoundError):
+            pass
+        await asyncio.sleep(0)
+    if len(chosen) > 1 and rng.random() < 0.3:
+        try:
+            await remove_from_cart_async(session_id, chosen[0])
+        except CartError:
+            pass
+
+    summary = await view_cart_async(session_id)
+    if summary.is_empty():
+        return "empty"
+    lines = {line.product_id: line.quantity for line in summary.lines}
+
+    # Two concurrent checkouts of one cart: at most one may succeed
+    results = await asyncio.gather(checkout_async(session_id, "UPI"),
+                                   checkout_async(session_id, "UPI"),
+                                   return_exceptions=True)
+    successes = [result for result in results if isinstance(result, CheckoutReceipt)]
+    if len(successes) > 1:
+        return "double-checkout"
+    for result in results:
+        if isinstance(result, Exception) and not isinstance(result, (CartError, PaymentError)):
+            raise result
+    if not successes:
+        return "out-of-stock"
+    for product_id, quantity in lines.items():
+        sold[product_id] = sold.get(product_id, 0) + quantity
+    return "checked-out"
+
+
+async def run(session_ids: List[str], product_ids: List[str], seed: int) -> Tuple[Dict, Dict]:
+    rng = random.Random(seed)
+    sold: Dict[str, int] = {}
+    outcomes = await asyncio.gather(*(shop(session_id, product_ids, random.Random(rng.random()), sold)
+                                      for session_id in session_ids))
+    counts: Dict[str, int] = {}
+    for outcome in outcomes:
+        counts[outcome] = counts.get(outcome, 0) + 1
+    return counts, sold
+
+
+def main() -> int:
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    session_ids, product_ids = generate_data(sessions)
+
+    start = time.perf_counter()
+    counts, sold = asyncio.run(run(session_ids, product_ids, seed=1))
+    elapsed = time.perf_counter() - start
+
+    print(f"{sessions:,} concurrent sessions in {elapsed:.2f}s "
+          f"({sessions / elapsed:,.0f} sessions/s)")
+    for outcome, count in sorted(counts.items()):
+        print(f"  {outcome:<16} {count:>8,}")
+
+    errors = []
+    if counts.get("double-checkout"):
+        errors.append(f"{counts['double-checkout']} carts were checked out twice")
+    for product_id in product_ids:
+        remaining = products_data[product_id].stock
+        if remaining < 0 or remaining + sold.get(product_id, 0) != STOCK_PER_PRODUCT:
+            errors.append(f"{product_id}: stock {remaining} after selling {sold.get(product_id, 0)}")
+    inconsistent = find_inconsistent_carts()
+    if inconsistent:
+        errors.append(f"{len(inconsistent)} carts have inconsistent totals")
+
+    for error in errors[:20]:
+        print(f"FAIL: {error}")
+    if not errors:
+        print("OK: no stock oversold or lost, no cart checked out twice")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
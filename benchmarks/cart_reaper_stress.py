@@ -0,0 +1,131 @@
+"""
+Stress test of idle cart eviction under bot traffic
+
+Bot threads keep opening carts for user IDs that are never seen
+again, with a short idle TTL so the reaper has to keep up. The number
+of live carts is sampled while they run and must stay near
+creation rate x TTL rather than growing with the total. A group of
+returning users fills carts first; once those are evicted to the
+spill file, they must come back with the same items.
+
+Run from the project root:
+    python -m benchmarks.cart_reaper_stress [threads] [seconds]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+IDLE_TTL = 0.5
+REAP_INTERVAL = 0.1
+RETURNING_USERS = 1000
+PRODUCTS = 50
+SAMPLE_INTERVAL = 0.05
+
+
+def main() -> int:
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Settings are read on import, so set them before loading the stores
+        os.environ["SHOP_CART_IDLE_TTL"] = str(IDLE_TTL)
+        os.environ["SHOP_CART_REAP_INTERVAL"] = str(REAP_INTERVAL)
+        os.environ["SHOP_CART_SPILL"] = os.path.join(directory, "carts.db")
+        from data.categories import Category, categories_data
+        from data.products import Product, products_data, index_product
+        from data.carts import carts_data, find_inconsistent_carts
+        from data.cart_lifecycle import cart_lifecycle
+        from data.shopping import add_item, get_cart
+
+        categories_data["reaper-cat"] = Category("reaper-cat", "Reaper Category")
+        product_ids = []
+        for i in range(PRODUCTS):
+            product = Product(f"reaper-prod{i}", f"Reaper Product {i}", 10.0 + i, "reaper-cat",
+                              "", 10_000_000)
+            products_data[product.product_id] = product
+            index_product(product)
+            product_ids.append(product.product_id)
+
+        rng = random.Random(7)
+        expected: Dict[str, Dict[str, int]] = {}
+        for i in range(RETURNING_USERS):
+            user_id = f"returning-{i}"
+            expected[user_id] = {}
+            for product_id in rng.sample(product_ids, rng.randint(1, 3)):
+                quantity = rng.randint(1, 5)
+                add_item(user_id, product_id, quantity)
+                expected[user_id][product_id] = quantity
+
+        created = [0] * threads
+        stop = threading.Event()
+
+        def bot(thread_id: int):
+            bot_rng = random.Random(thread_id)
+            count = 0
+            while not stop.is_set():
+                add_item(f"bot-{thread_id}-{count}", bot_rng.choice(product_ids), 1)
+                count += 1
+            created[thread_id] = count
+
+        samples: List[int] = []
+
+        def monitor():
+            while not stop.wait(SAMPLE_INTERVAL):
+                samples.append(cart_lifecycle.stats().live)
+
+        workers = [threading.Thread(target=bot, args=(i,)) for i in range(threads)]
+        workers.append(threading.Thread(target=monitor))
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        time.sleep(seconds)
+        stop.set()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        total = sum(created)
+        rate = total / elapsed
+        peak = max(samples, default=0)
+        bound = rate * (IDLE_TTL + 2 * REAP_INTERVAL)
+        print(f"{threads} bot threads for {elapsed:.1f}s: {total:,} carts opened ({rate:,.0f}/s), "
+              f"idle TTL {IDLE_TTL}s")
+        print(f"  live carts: peak {peak:,}, expected about {bound:,.0f} (rate x TTL)")
+
+        time.sleep(IDLE_TTL + 3 * REAP_INTERVAL)
+        stats = cart_lifecycle.stats()
+        print(f"  after going idle: {stats.live:,} live, {stats.evicted:,} evicted, "
+              f"{stats.spilled:,} spilled")
+
+        errors: List[str] = []
+        for user_id, items in expected.items():
+            cart = get_cart(user_id)
+            restored = {} if cart is None else {item.product.product_id: item.quantity
+                                                for item in cart.get_items()}
+            if restored != items:
+                errors.append(f"{user_id}: restored {restored}, expected {items}")
+        stats = cart_lifecycle.stats()
+        print(f"  returning users: {stats.restored:,} carts restored, "
+              f"{stats.memory_bytes / 1024:,.0f} KiB estimated for {stats.live:,} live carts")
+
+        if peak > 2 * bound:
+            errors.append(f"live carts peaked at {peak:,}, over twice the expected {bound:,.0f}")
+        if len(carts_data) > RETURNING_USERS:
+            errors.append(f"{len(carts_data):,} carts still in memory after going idle")
+        errors.extend(f"{user_id}: running totals differ" for user_id in find_inconsistent_carts())
+        cart_lifecycle.stop()
+
+    for error in errors[:20]:
+        print(f"FAIL: {error}")
+    if not errors:
+        print("OK: cart memory stayed bounded and evicted carts came back intact")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Checkout throughput against the simulated payment gateway
+
+Runs shopper threads that add an item and check out in a loop, first
+with local payment approval and then against gateway simulator
+processes: unbatched, batched, and a flaky gateway that errors and
+stalls. Reports checkouts per second, latency percentiles, failures and
+the client's retry and circuit breaker counters.
+
+Run from the project root:
+    python -m benchmarks.checkout_benchmark [threads] [seconds per scenario]
+"""
+
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from data.sessions import auth_manager
+from data.users import User, user_directory
+from data.categories import Category, categories_data
+from data.products import Product, products_data, index_product
+from data.payment import payment_processor
+from data.gateway_client import GatewayClient, CircuitBreaker
+from data.gateway_simulator import start_simulator
+from data.exceptions import CartError, PaymentError
+from user_Functions.add_to_cart import add_to_cart
+from user_Functions.checkout import checkout
+
+PASSWORD = "checkout-bench"
+SIMULATED_LATENCY_MS = "20"
+
+SCENARIOS = [
+    # (label, simulator options or None for local approval, client options)
+    ("local approval", None, {}),
+    ("gateway, unbatched", ["--latency", SIMULATED_LATENCY_MS, "--max-concurrency", "16"],
+     {"batch_size": 1}),
+    ("gateway, batched", ["--latency", SIMULATED_LATENCY_MS, "--max-concurrency", "16"],
+     {"batch_size": 32}),
+    ("flaky gateway", ["--latency", SIMULATED_LATENCY_MS, "--max-concurrency", "16",
+                       "--error-rate", "0.05", "--stall-rate", "0.01", "--stall-seconds", "2",
+                       "--decline-rate", "0.01"],
+     {"batch_size": 32, "timeout": 0.5}),
+]
+
+
+def generate_data(threads: int) -> List[str]:
+    """Add a product with ample stock and one logged-in user per thread"""
+    categories_data["bench-cat"] = Category("bench-cat", "Benchmark Category")
+    product = Product("bench-prod", "Benchmark Product", 99.0, "bench-cat", "", 1_000_000_000)
+    products_data[product.product_id] = product
+    index_product(product)
+
+    session_ids = []
+    for i in range(threads):
+        username = f"checkout_bench_{i}"
+        user_directory.add(User(f"checkout-bench{i}", username, PASSWORD, f"cb{i}@example.com"))
+        session_ids.append(auth_manager.login_user(user_directory, username, PASSWORD))
+    return session_ids
+
+
+def run_scenario(session_ids: List[str], seconds: float) -> Dict:
+    latencies: List[float] = []
+    failures: Dict[str, int] = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def shopper(session_id: str):
+        local_latencies = []
+        local_failures: Dict[str, int] = {}
+        while time.perf_counter() < deadline:
+            add_to_cart(session_id, "bench-prod", 1)
+            start = time.perf_counter()
+            try:
+                checkout(session_id, "UPI")
+                local_latencies.append(time.perf_counter() - start)
+            except (CartError, PaymentError) as e:
+                reason = str(e).split(":")[0]
+                local_failures[reason] = local_failures.get(reason, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for reason, count in local_failures.items():
+                failures[reason] = failures.get(reason, 0) + count
+
+    workers = [threading.Thread(target=shopper, args=(session_id,)) for session_id in session_ids]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    latencies.sort()
+    return {
+        "checkouts": len(latencies),
+        "per_second": len(latencies) / seconds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        "failures": failures,
+    }
+
+
+def main() -> int:
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    session_ids = generate_data(threads)
+
+    print(f"{threads} shopper threads, {seconds:g}s per scenario")
+    print(f"{'scenario':<20} {'checkouts/s':>12} {'p50 ms':>8} {'p99 ms':>8}  details")
+    for label, simulator_options, client_options in SCENARIOS:
+        process = None
+        client: Optional[GatewayClient] = None
+        if simulator_options is not None:
+            process, (host, port) = start_simulator(*simulator_options)
+            client = GatewayClient(host, port, breaker=CircuitBreaker(reset_timeout=0.5),
+                                   **client_options)
+        payment_processor.gateway = client
+        try:
+            result = run_scenario(session_ids, seconds)
+        finally:
+            payment_processor.gateway = None
+            if client is not None:
+                client.close()
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+        details = []
+        if client is not None:
+            stats = client.stats()
+            details.append(f"{stats['charges'] / max(stats['batches'], 1):.1f} charges/batch")
+            details.append(f"{stats['retries']} retries")
+            details.append(f"{stats['breaker_trips']} breaker trips")
+        details += [f"{count} x {reason}" for reason, count in sorted(result["failures"].items())]
+        print(f"{label:<20} {result['per_second']:>12,.0f} {result['p50_ms']:>8.2f} "
+              f"{result['p99_ms']:>8.2f}  {', '.join(details)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
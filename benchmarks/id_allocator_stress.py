@@ -0,0 +1,98 @@
+"""
+Stress test of the ID allocator across threads and processes
+
+Starts worker processes that share one high-water mark file, each
+allocating IDs from several threads, and checks that no ID was handed
+out twice. Also compares single-process throughput for a few block
+sizes; a block size of 1 takes the reservation lock for every ID.
+
+Run from the project root:
+    python -m benchmarks.id_allocator_stress [processes] [threads] [ids per thread]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import List
+
+from data.id_allocator import HighWaterMarks, IdAllocator
+
+BLOCK_SIZES = [1, 64, 1024]
+
+
+def allocate(path: str, block_size: int, threads: int, per_thread: int,
+             time_ordered: bool = False) -> List[str]:
+    """Allocate threads * per_thread IDs from one allocator"""
+    allocator = IdAllocator("stress", HighWaterMarks(path), block_size, time_ordered=time_ordered)
+    results: List[List[str]] = [[] for _ in range(threads)]
+
+    def worker(index: int):
+        results[index] = [allocator.next_id() for _ in range(per_thread)]
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return [allocated_id for ids in results for allocated_id in ids]
+
+
+def process_worker(path: str, threads: int, per_thread: int, output: str):
+    with open(output, "w", encoding="utf-8") as output_file:
+        output_file.write("\n".join(allocate(path, 64, threads, per_thread, time_ordered=True)))
+
+
+def main() -> int:
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    per_thread = int(sys.argv[3]) if len(sys.argv) > 3 else 20_000
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{threads} threads x {per_thread:,} IDs, one process:")
+        for block_size in BLOCK_SIZES:
+            path = os.path.join(directory, f"single-{block_size}.json")
+            start = time.perf_counter()
+            ids = allocate(path, block_size, threads, per_thread)
+            elapsed = time.perf_counter() - start
+            print(f"  block size {block_size:>5}: {len(ids) / elapsed:>12,.0f} IDs/s")
+
+        path = os.path.join(directory, "shared.json")
+        outputs = [os.path.join(directory, f"worker-{i}.txt") for i in range(processes)]
+        workers = [multiprocessing.Process(target=process_worker,
+                                           args=(path, threads, per_thread, output))
+                   for output in outputs]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        ids = []
+        for output in outputs:
+            with open(output, encoding="utf-8") as output_file:
+                ids.extend(output_file.read().split("\n"))
+        high_water = HighWaterMarks(path).current("stress")
+
+    expected = processes * threads * per_thread
+    print(f"{processes} processes sharing a mark file: {len(ids):,} time-ordered IDs "
+          f"in {elapsed:.2f}s (high-water mark {high_water:,})")
+
+    errors = []
+    if len(ids) != expected:
+        errors.append(f"expected {expected:,} IDs, got {len(ids):,}")
+    duplicates = len(ids) - len(set(ids))
+    if duplicates:
+        errors.append(f"{duplicates:,} duplicate IDs")
+    for error in errors:
+        print(f"FAIL: {error}")
+    if not errors:
+        print("OK: every ID is unique")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
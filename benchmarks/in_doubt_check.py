@@ -0,0 +1,96 @@
+"""
+Check of checkouts whose payment the gateway never answered
+
+A gateway simulator that stalls every request past the client timeout
+leaves the charge in doubt. The checkout must keep its stock reserved
+and refuse a second checkout, and settling must then complete the order
+(the gateway approves on re-send) or return the stock (it declines).
+
+Run from the project root:
+    python -m benchmarks.in_doubt_check
+"""
+
+import sys
+from typing import List
+
+from Authentication.admin_login import admin_login
+from Authentication.user_login import user_login
+from AdminFunctions.settle_payments import settle_payments
+from data.exceptions import CartError
+from data.gateway_client import GatewayClient, GatewayTimeoutError
+from data.gateway_simulator import start_simulator
+from data.payment import payment_processor
+from data.products import products_data
+from user_Functions.add_to_cart import add_to_cart
+from user_Functions.checkout import checkout
+from user_Functions.view_cart import view_cart
+
+PRODUCT_ID = "prod1"
+QUANTITY = 2
+
+
+def use_gateway(*options: str):
+    """Point the payment processor at a new simulator; return its process"""
+    process, (host, port) = start_simulator("--latency", "1", *options)
+    payment_processor.gateway = GatewayClient(host, port, timeout=0.1, retries=1, backoff=0.01)
+    return process
+
+
+def stop_gateway(process):
+    payment_processor.gateway.close()
+    process.terminate()
+    process.wait()
+
+
+def run_case(decline: bool, errors: List[str]):
+    label = "declined" if decline else "approved"
+    session_id = user_login("john_doe", "password123")
+    admin_session = admin_login("admin", "admin123")
+    product = products_data[PRODUCT_ID]
+    stock = product.stock
+    add_to_cart(session_id, PRODUCT_ID, QUANTITY)
+    # A declined checkout leaves its items in the cart
+    quantity = sum(line.quantity for line in view_cart(session_id).lines
+                   if line.product_id == PRODUCT_ID)
+
+    process = use_gateway("--stall-rate", "1", "--stall-seconds", "0.5")
+    try:
+        checkout(session_id, "UPI")
+        errors.append(f"{label}: checkout succeeded against a stalled gateway")
+    except GatewayTimeoutError:
+        pass
+    if product.stock != stock - quantity:
+        errors.append(f"{label}: stock of an in-doubt checkout was not kept reserved")
+    try:
+        checkout(session_id, "UPI")
+        errors.append(f"{label}: a second checkout ran while the first was in doubt")
+    except CartError:
+        pass
+    if settle_payments(admin_session).pending != list(payment_processor.in_doubt):
+        errors.append(f"{label}: an unanswered charge was settled")
+    stop_gateway(process)
+
+    process = use_gateway(*(["--decline-rate", "1"] if decline else []))
+    settlement = settle_payments(admin_session)
+    stop_gateway(process)
+    expected_stock = stock if decline else stock - quantity
+    print(f"{label}: {settlement}")
+    if settlement.orders_settled != 1 or settlement.pending:
+        errors.append(f"{label}: the held checkout was not settled")
+    if product.stock != expected_stock:
+        errors.append(f"{label}: stock is {product.stock}, expected {expected_stock}")
+
+
+def main() -> int:
+    errors: List[str] = []
+    run_case(decline=True, errors=errors)
+    run_case(decline=False, errors=errors)
+    for error in errors:
+        print(f"FAIL: {error}")
+    if not errors:
+        print("OK: in-doubt checkouts kept their stock until the gateway settled them")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
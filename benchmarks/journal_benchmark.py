@@ -0,0 +1,55 @@
+"""
+Throughput benchmark for the group-commit payment journal
+
+Run from the project root:
+    python -m benchmarks.journal_benchmark [threads] [payments per thread]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from data.journal import TransactionJournal
+from data.payment import Payment
+
+
+def main() -> int:
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "payments.journal")
+        journal = TransactionJournal(path)
+        payment = Payment(journal=journal)
+
+        def worker(worker_id: int):
+            for _ in range(per_thread):
+                payment.process_payment(100.0, "UPI", f"user{worker_id}")
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        journal.close()
+
+        total = threads * per_thread
+        print(f"Payments recorded: {total}")
+        print(f"Throughput: {total / elapsed:,.0f} payments/s")
+        print(f"fsyncs: {journal.sync_count} ({total / max(journal.sync_count, 1):.1f} payments per fsync)")
+
+        # Replay must recover every payment, each settled after its pending record
+        start = time.perf_counter()
+        replayed = Payment(journal=TransactionJournal(path))
+        recovered = sum(day.transactions for day in replayed.daily_revenue())
+        print(f"Replayed {recovered} payments in {time.perf_counter() - start:.3f}s, "
+              f"{len(replayed.in_doubt)} in doubt")
+        return 0 if recovered == total and not replayed.in_doubt else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
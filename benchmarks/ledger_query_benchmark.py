@@ -0,0 +1,177 @@
+"""
+Ledger query latency with indexes vs. a full scan of the transactions
+
+Fills a payment ledger with synthetic transactions spread over a year,
+then times paginated queries by user, by day, by payment method and
+combinations of them, plus the daily revenue totals. The first page of
+each query is checked against a scan of every transaction. Fails if a
+query's median latency is over the budget or a result differs.
+
+Run from the project root:
+    python -m benchmarks.ledger_query_benchmark [transactions] [users]
+"""
+
+import itertools
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from data.ledger import LedgerIndex
+from data.payment import Payment
+from data.repository import Repository
+
+QUERIES_PER_KIND = 200
+PAGE_SIZE = 50
+DEEP_PAGES = 20
+LATENCY_BUDGET_MS = 5.0
+SCAN_SAMPLES = 3
+DAYS = 365
+
+
+def generate_ledger(count: int, users: int) -> Repository:
+    """Transactions in roughly increasing time, a few arriving out of order"""
+    rng = random.Random(11)
+    start = datetime(2025, 1, 1)
+    step = DAYS * 86400 / count
+    transactions = Repository()
+    for i in range(count):
+        jitter = rng.uniform(-5, 0) if rng.random() < 0.01 else 0.0
+        transactions[f"txn-{i:09d}"] = {
+            "amount": round(rng.uniform(100, 50_000), 2),
+            "payment_method": rng.choice(Payment.PAYMENT_METHODS),
+            "user_id": f"user{rng.randrange(users)}",
+            "timestamp": start + timedelta(seconds=i * step + jitter),
+            "status": "SUCCESS",
+            "gateway_reference": None,
+        }
+    return transactions
+
+
+def scan_page(transactions: Repository, matches: Callable[[Dict], bool],
+              limit: Optional[int] = PAGE_SIZE) -> List[str]:
+    """First page of a query (all results without a limit) by filtering and sorting every transaction"""
+    found = [(transaction["timestamp"], transaction_id)
+             for transaction_id, transaction in transactions.items() if matches(transaction)]
+    found.sort(reverse=True)
+    return [transaction_id for _, transaction_id in found[:limit]]
+
+
+def time_queries(run: Callable[[random.Random], object]) -> float:
+    """Median milliseconds per call"""
+    rng = random.Random(5)
+    timings = []
+    for _ in range(QUERIES_PER_KIND):
+        start = time.perf_counter()
+        run(rng)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    start = time.perf_counter()
+    transactions = generate_ledger(count, users)
+    print(f"Generated {count:,} transactions for {users:,} users in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    payment = Payment(transactions)
+    print(f"Indexes built at startup in {time.perf_counter() - start:.1f}s")
+    payment.process_payment(123.0, "UPI", "user0")
+
+    first_day = datetime(2025, 1, 1)
+
+    def random_day(rng: random.Random) -> datetime:
+        return first_day + timedelta(days=rng.randrange(DAYS))
+
+    def one_day(rng: random.Random) -> Dict[str, datetime]:
+        day = random_day(rng)
+        return dict(start=day, end=day + timedelta(days=1))
+
+    def deep(rng: random.Random):
+        cursor = None
+        for _ in range(DEEP_PAGES):
+            cursor = payment.query_transactions(cursor=cursor, page_size=PAGE_SIZE).next_cursor
+
+    kinds = {
+        "by user": lambda rng: payment.query_transactions(f"user{rng.randrange(users)}",
+                                                          page_size=PAGE_SIZE),
+        "by user and method": lambda rng: payment.query_transactions(
+            f"user{rng.randrange(users)}", payment_method="UPI", page_size=PAGE_SIZE),
+        "one day": lambda rng: payment.query_transactions(page_size=PAGE_SIZE, **one_day(rng)),
+        "one day by method": lambda rng: payment.query_transactions(
+            payment_method="NET_BANKING", page_size=PAGE_SIZE, **one_day(rng)),
+        f"{DEEP_PAGES} pages deep": deep,
+        "daily revenue": lambda rng: payment.daily_revenue(),
+    }
+
+    errors: List[str] = []
+    print(f"{'query':<22}{'median ms':>10}")
+    for name, run in kinds.items():
+        median_ms = time_queries(run)
+        print(f"{name:<22}{median_ms:>10.3f}")
+        if median_ms > LATENCY_BUDGET_MS:
+            errors.append(f"{name}: median {median_ms:.3f} ms over the {LATENCY_BUDGET_MS} ms budget")
+
+    rng = random.Random(9)
+    scan_timings = []
+    for _ in range(SCAN_SAMPLES):
+        user_id = f"user{rng.randrange(users)}"
+        day = random_day(rng)
+        checks: Dict[str, tuple] = {
+            "by user": (dict(user_id=user_id),
+                        lambda transaction: transaction["user_id"] == user_id),
+            "one day by method": (
+                dict(start=day, end=day + timedelta(days=1), payment_method="UPI"),
+                lambda transaction: (day <= transaction["timestamp"] < day + timedelta(days=1)
+                                     and transaction["payment_method"] == "UPI")),
+        }
+        for name, (filters, matches) in checks.items():
+            start = time.perf_counter()
+            expected = scan_page(transactions, matches)
+            scan_timings.append(time.perf_counter() - start)
+            page = payment.query_transactions(page_size=PAGE_SIZE, **filters)
+            if [transaction["transaction_id"] for transaction in page.transactions] != expected:
+                errors.append(f"{name}: index and scan disagree for {filters}")
+
+        # Small pages must walk through every transaction of the user exactly once
+        walked, cursor = [], None
+        while True:
+            page = payment.query_transactions(user_id, page_size=3, cursor=cursor)
+            walked.extend(transaction["transaction_id"] for transaction in page.transactions)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        if walked != scan_page(transactions, lambda transaction: transaction["user_id"] == user_id,
+                              limit=None):
+            errors.append(f"paging through {user_id} skipped or repeated transactions")
+    print(f"full scan for comparison: {statistics.median(scan_timings) * 1000:.0f} ms per query")
+
+    # Indexing a stored payment again must not list or count it twice
+    sample = list(itertools.islice(transactions.items(), 1000))
+    ledger = LedgerIndex(sample)
+    before = ledger.daily_totals()
+    for transaction_id, transaction in sample[::10]:
+        ledger.add(transaction_id, transaction)
+    if ledger.daily_totals() != before or len(ledger) != len(sample):
+        errors.append("indexing transactions twice changed the ledger")
+
+    days = payment.daily_revenue()
+    total = round(sum(transaction["amount"] for transaction in transactions.values()), 2)
+    if abs(sum(day.revenue for day in days) - total) > 0.01 * len(days):
+        errors.append(f"daily revenue adds up to {sum(day.revenue for day in days):,.2f}, "
+                      f"ledger holds {total:,.2f}")
+
+    for error in errors:
+        print(f"FAIL: {error}")
+    if not errors:
+        print("OK: indexed queries match full scans and stay within budget")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Load generator for the shopping flows
+
+Generates synthetic users, categories and products, then drives the
+user functions from worker threads with a weighted operation mix and
+reports throughput and latency percentiles per operation.
+
+Run from the project root:
+    python -m benchmarks.load_generator --threads 8 --duration 10 --output run.json
+    python -m benchmarks.load_generator --compare run.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from Authentication.user_login import user_login
+from user_Functions.view_catalog import view_catalog
+from user_Functions.add_to_cart import add_to_cart
+from user_Functions.view_cart import view_cart
+from user_Functions.remove_from_cart import remove_from_cart
+from user_Functions.checkout import checkout
+from data.users import User, user_directory
+from data.categories import Category, categories_data
+from data.products import Product, products_data, index_product
+from data.payment import Payment
+
+DEFAULT_MIX = "user_login=5,view_catalog=35,add_to_cart=25,view_cart=20,remove_from_cart=10,checkout=5"
+PASSWORD = "load-test"
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """Parse 'op=weight,...' into a dict of operation weights"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {name}. Supported: {', '.join(OPERATIONS)}")
+        weights[name] = int(weight)
+    return weights
+
+
+def generate_data(users: int, categories: int, products: int, seed: int) -> List[str]:
+    """Add synthetic users, categories and products; return the usernames"""
+    rng = random.Random(seed)
+
+    usernames = []
+    for i in range(users):
+        username = f"load_user_{i}"
+        user_directory.add(User(f"load-user{i}", username, PASSWORD, f"load{i}@example.com"))
+        usernames.append(username)
+
+    category_ids = []
+    for i in range(categories):
+        category_id = f"load-cat{i}"
+        categories_data[category_id] = Category(category_id, f"Load Category {i}")
+        category_ids.append(category_id)
+
+    for i in range(products):
+        product_id = f"load-prod{i}"
+        product = Product(product_id, f"Load Product {i}", round(rng.uniform(10, 5000), 2),
+                          rng.choice(category_ids), "Synthetic product", 1_000_000_000)
+        products_data[product_id] = product
+        index_product(product)
+
+    return usernames
+
+
+class Worker(threading.Thread):
+    """Runs the operation mix for one simulated shopper"""
+
+    def __init__(self, worker_id: int, usernames: List[str], product_ids: List[str],
+                 weights: Dict[str, int], deadline: float, max_ops: int):
+        super().__init__(name=f"load-worker-{worker_id}", daemon=True)
+        self.rng = random.Random(worker_id)
+        self.username = self.rng.choice(usernames)
+        self.product_ids = product_ids
+        self.operations = list(weights)
+        self.weights = list(weights.values())
+        self.deadline = deadline
+        self.max_ops = max_ops
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.cart: Set[str] = set()
+        self.session_id = user_login(self.username, PASSWORD)
+
+    def run(self):
+        done = 0
+        while done < self.max_ops and time.perf_counter() < self.deadline:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            start = time.perf_counter()
+            try:
+                OPERATIONS[operation](self)
+            except Exception as e:
+                self.errors[operation][type(e).__name__] += 1
+            self.latencies[operation].append(time.perf_counter() - start)
+            done += 1
+
+
+def _op_user_login(worker: Worker):
+    worker.session_id = user_login(worker.username, PASSWORD)
+
+
+def _op_view_catalog(worker: Worker):
+    view_catalog(worker.session_id)
+
+
+def _op_add_to_cart(worker: Worker):
+    product_id = worker.rng.choice(worker.product_ids)
+    add_to_cart(worker.session_id, product_id, 1)
+    worker.cart.add(product_id)
+
+
+def _op_view_cart(worker: Worker):
+    view_cart(worker.session_id)
+
+
+def _op_remove_from_cart(worker: Worker):
+    if worker.cart:
+        product_id = worker.rng.choice(tuple(worker.cart))
+        worker.cart.discard(product_id)
+        remove_from_cart(worker.session_id, product_id)
+
+
+def _op_checkout(worker: Worker):
+    checkout(worker.session_id, worker.rng.choice(Payment.PAYMENT_METHODS))
+    worker.cart.clear()
+
+
+OPERATIONS = {
+    "user_login": _op_user_login,
+    "view_catalog": _op_view_catalog,
+    "add_to_cart": _op_add_to_cart,
+    "view_cart": _op_view_cart,
+    "remove_from_cart": _op_remove_from_cart,
+    "checkout": _op_checkout,
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(workers: List[Worker], elapsed: float) -> Dict[str, Dict]:
+    """Merge worker samples into per-operation statistics"""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for worker in workers:
+        for operation, samples in worker.latencies.items():
+            latencies[operation].extend(samples)
+        for operation, counts in worker.errors.items():
+            for name, count in counts.items():
+                errors[operation][name] += count
+
+    results = {}
+    for operation in OPERATIONS:
+        samples = sorted(latencies.get(operation, []))
+        if not samples:
+            continue
+        results[operation] = {
+            "count": len(samples),
+            "throughput": len(samples) / elapsed,
+            "p50_ms": percentile(samples, 0.50) * 1000,
+            "p95_ms": percentile(samples, 0.95) * 1000,
+            "p99_ms": percentile(samples, 0.99) * 1000,
+            "errors": dict(errors.get(operation, {})),
+        }
+    return results
+
+
+def print_report(results: Dict[str, Dict], baseline: Dict[str, Dict] = None):
+    print(f"{'operation':<18} {'count':>8} {'ops/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    print("-" * 73)
+    for operation, stats in results.items():
+        line = (f"{operation:<18} {stats['count']:>8} {stats['throughput']:>10.1f} "
+                f"{stats['p50_ms']:>8.3f} {stats['p95_ms']:>8.3f} {stats['p99_ms']:>8.3f} "
+                f"{sum(stats['errors'].values()):>7}")
+        if baseline and operation in baseline:
+            change = stats["p95_ms"] / baseline[operation]["p95_ms"] - 1 if baseline[operation]["p95_ms"] else 0.0
+            line += f"  p95 {change:+.1%} vs baseline"
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Drive the shopping flows under load")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--max-ops", type=int, default=sys.maxsize, help="operations per thread")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="op=weight pairs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    usernames = generate_data(args.users, args.categories, args.products, args.seed)
+    product_ids = [f"load-prod{i}" for i in range(args.products)]
+
+    deadline = time.perf_counter() + args.duration
+    workers = [Worker(i, usernames, product_ids, weights, deadline, args.max_ops)
+               for i in range(args.threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    results = summarize(workers, elapsed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+    print_report(results, baseline)
+
+    if args.output:
+        report = {
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "elapsed_s": elapsed,
+            "results": results,
+        }
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Login latency benchmark for the indexed account directory
+
+Run from the project root:
+    python -m benchmarks.login_benchmark
+"""
+
+import random
+import sys
+import time
+from typing import List
+
+from data.directory import AccountDirectory
+from data.repository import Repository
+from data.sessions import Authentication
+from data.users import User
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+LOGINS_PER_SIZE = 20_000
+MAX_SLOWDOWN = 3.0
+
+
+def build_directory(size: int) -> AccountDirectory:
+    """Build a directory holding `size` synthetic users"""
+    users = Repository()
+    for i in range(size):
+        user_id = f"user{i}"
+        users[user_id] = User(user_id, f"shopper_{i}", f"secret{i}", f"shopper{i}@email.com")
+    return AccountDirectory(users, "user_id")
+
+
+def time_logins(directory: AccountDirectory, size: int, logins: int) -> float:
+    """Return the mean login latency in microseconds"""
+    auth = Authentication()
+    rng = random.Random(size)
+    picks = [rng.randrange(size) for _ in range(logins)]
+
+    start = time.perf_counter()
+    for i in picks:
+        auth.login_user(directory, f"Shopper_{i}", f"secret{i}")
+    elapsed = time.perf_counter() - start
+    return elapsed / logins * 1_000_000
+
+
+def main() -> int:
+    results: List[float] = []
+    print(f"{'users':>10} | {'login (us)':>10}")
+    print("-" * 24)
+    for size in SIZES:
+        directory = build_directory(size)
+        latency = time_logins(directory, size, LOGINS_PER_SIZE)
+        results.append(latency)
+        print(f"{size:>10} | {latency:>10.2f}")
+
+    slowdown = max(results) / min(results)
+    print(f"Slowdown from {SIZES[0]} to {SIZES[-1]} users: {slowdown:.2f}x")
+    if slowdown > MAX_SLOWDOWN:
+        print(f"FAIL: login latency grew more than {MAX_SLOWDOWN}x")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Memory benchmark for product storage representations
+
+Compares 1M products stored as the original dict-backed objects and
+as slotted Product objects. There is no columnar product table to
+compare against: products_data holds Product objects only.
+
+Run from the project root:
+    python -m benchmarks.product_memory_benchmark [count]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from data.products import Product
+
+DESCRIPTIONS = ["Latest smartphone", "Gaming laptop", "Cotton t-shirt", "Denim jeans"]
+CATEGORIES = ["cat1", "cat2", "cat3"]
+
+
+class DictProduct:
+    """Product layout before __slots__: seven attributes in a per-instance __dict__"""
+
+    def __init__(self, product_id, name, price, category_id, description, stock):
+        self.__product_id = product_id
+        self.__name = name
+        self.__price = price
+        self.__category_id = category_id
+        self.__description = description
+        self.__stock = stock
+        self.__is_active = True
+
+
+def rows(count: int):
+    for i in range(count):
+        yield (f"prod{i}", f"Product {i}", float(i % 10_000), CATEGORIES[i % len(CATEGORIES)],
+               DESCRIPTIONS[i % len(DESCRIPTIONS)], i % 100)
+
+
+def measure(label: str, build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    store = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {current / 1024 / 1024:>10.1f} MiB  {current / len(store):>7.1f} B/product")
+    del store
+    return current
+
+
+def build_dict_objects(count: int):
+    return {row[0]: DictProduct(*row) for row in rows(count)}
+
+
+def build_slotted_objects(count: int):
+    return {row[0]: Product(*row) for row in rows(count)}
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Storing {count:,} products")
+    baseline = measure("dict-backed objects", lambda: build_dict_objects(count))
+    slotted = measure("slotted Product", lambda: build_slotted_objects(count))
+    print(f"Slotted Product uses {slotted / baseline:.0%} of the original memory")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
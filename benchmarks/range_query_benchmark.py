@@ -0,0 +1,143 @@
+"""
+Benchmark of ordered price/stock indexes against full catalog scans
+
+Times price-range queries ("Rs. 500 to 2000 in a category, cheapest
+first"), top-N queries ("10 lowest-stock items") and pages of a
+name-sorted listing answered by the OrderedProductIndex and by
+scanning every product.
+
+Run from the project root:
+    python -m benchmarks.range_query_benchmark [count]
+"""
+
+import heapq
+import random
+import sys
+import time
+
+from data.products import Product
+from data.ordered_index import OrderedProductIndex
+
+CATEGORIES = [f"cat{i}" for i in range(1, 21)]
+QUERIES = 50
+RESULT_LIMIT = 20
+
+
+def build_products(count: int, rng: random.Random):
+    return [Product(f"prod{i}", f"Product {i}", round(rng.uniform(10, 100_000), 2),
+                    rng.choice(CATEGORIES), "", rng.randint(0, 1000))
+            for i in range(count)]
+
+
+def time_queries(label: str, queries, run) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        run(*query)
+    per_query = (time.perf_counter() - start) / len(queries)
+    print(f"  {label:<8} {per_query * 1000:>10.3f} ms/query")
+    return per_query
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(42)
+    products = build_products(count, rng)
+
+    start = time.perf_counter()
+    price_index = OrderedProductIndex("price", products)
+    stock_index = OrderedProductIndex("stock", products, deferred_moves=True)
+    name_index = OrderedProductIndex("name", products,
+                                     value_of=lambda product: product.name.casefold())
+    print(f"Indexed {count:,} products in {time.perf_counter() - start:.2f}s")
+
+    def price_key(product):
+        return (product.price, product.product_id)
+
+    def stock_key(product):
+        return (product.stock, product.product_id)
+
+    range_queries = []
+    for _ in range(QUERIES):
+        low = rng.uniform(10, 95_000)
+        range_queries.append((low, low + 1500, rng.choice(CATEGORIES)))
+
+    def scan_range(low, high, category_id):
+        return heapq.nsmallest(RESULT_LIMIT, (product for product in products
+                                              if product.category_id == category_id
+                                              and low <= product.price <= high), key=price_key)
+
+    def index_range(low, high, category_id):
+        return price_index.range(low, high, category_id, limit=RESULT_LIMIT)
+
+    print(f"Price range in one category, cheapest {RESULT_LIMIT}:")
+    scan = time_queries("scan", range_queries, scan_range)
+    indexed = time_queries("index", range_queries, index_range)
+    print(f"  speedup  {scan / indexed:>10.0f}x")
+
+    top_queries = [(10, None)] * QUERIES
+
+    def scan_top(count, category_id):
+        return heapq.nsmallest(count, products, key=stock_key)
+
+    def index_top(count, category_id):
+        return stock_index.smallest(count, category_id)
+
+    print("10 lowest-stock products:")
+    scan = time_queries("scan", top_queries[:5], scan_top)
+    indexed = time_queries("index", top_queries, index_top)
+    print(f"  speedup  {scan / indexed:>10.0f}x")
+
+    def name_key(product):
+        return (product.name.casefold(), product.product_id)
+
+    page_queries = [(rng.choice(products),) for _ in range(QUERIES)]
+
+    def scan_page(last):
+        after = name_key(last)
+        return heapq.nsmallest(RESULT_LIMIT, (product for product in products
+                                              if name_key(product) > after), key=name_key)
+
+    def index_page(last):
+        return name_index.range(limit=RESULT_LIMIT, after=name_key(last))
+
+    print(f"Next {RESULT_LIMIT} products by name after a cursor:")
+    scan = time_queries("scan", page_queries[:5], scan_page)
+    indexed = time_queries("index", page_queries, index_page)
+    print(f"  speedup  {scan / indexed:>10.0f}x")
+
+    for query in range_queries[:5]:
+        assert scan_range(*query) == index_range(*query)
+    assert scan_top(10, None) == index_top(10, None)
+    for query in page_queries[:5]:
+        assert scan_page(*query) == index_page(*query)
+
+    start = time.perf_counter()
+    for product in rng.sample(products, 10_000):
+        old_price = product.price
+        product.price = round(rng.uniform(10, 100_000), 2)
+        price_index.move(product, old_price)
+    print(f"Price updates: {(time.perf_counter() - start) / 10_000 * 1e6:.1f} us/update")
+
+    # Stock moves are queued, then applied in one batch by the next query
+    start = time.perf_counter()
+    for product in rng.choices(products, k=10_000):
+        delta = rng.randint(-5, 5)
+        if product.stock + delta >= 0:
+            old_stock = product.stock
+            product.stock = old_stock + delta
+            stock_index.move(product, old_stock)
+    queued = time.perf_counter() - start
+    start = time.perf_counter()
+    lowest = index_top(10, None)
+    print(f"Stock updates: {queued / 10_000 * 1e6:.1f} us/update queued, "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms to apply them on the next query")
+    assert lowest == scan_top(10, None)
+    for category_id in CATEGORIES[:5]:
+        assert stock_index.smallest(10, category_id) == heapq.nsmallest(
+            10, (product for product in products if product.category_id == category_id),
+            key=stock_key)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Multi-process stress test of the shared-memory inventory
+
+Starts worker processes that each run shopper threads buying scarce
+products through the normal user functions, first with stock kept in
+each process and then with stock in shared memory. Counts what every
+worker sold and checks it against the stock that was there at the
+start. Per-process stock oversells once there is more than one worker;
+shared stock must never sell more than there was.
+
+Run from the project root (POSIX only):
+    python -m benchmarks.shared_inventory_stress [processes] [threads] [checkouts per thread]
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from data.shared_inventory import SharedStockCounters
+
+PRODUCTS = 20
+STOCK_PER_PRODUCT = 500
+PASSWORD = "inventory-stress"
+SHARED_NAME = f"shop_inventory_stress_{os.getpid()}"
+SHARED_SLOTS = 64
+
+
+def worker(worker_id: int, threads: int, checkouts: int) -> Dict[str, int]:
+    """Run shopper threads in this process; return quantity sold per product"""
+    # Imported here so the process picks up the inventory mode set by main()
+    from data.sessions import auth_manager
+    from data.users import User, user_directory
+    from data.categories import Category, categories_data
+    from data.products import Product, products_data, index_product
+    from data.exceptions import CartError, PaymentError
+    from user_Functions.add_to_cart import add_to_cart
+    from user_Functions.remove_from_cart import remove_from_cart
+    from user_Functions.view_cart import view_cart
+    from user_Functions.checkout import checkout
+
+    categories_data["stress-cat"] = Category("stress-cat", "Stress Category")
+    product_ids = []
+    for i in range(PRODUCTS):
+        product = Product(f"inventory-prod{i}", f"Stress Product {i}", 100.0, "stress-cat",
+                          "", STOCK_PER_PRODUCT)
+        products_data[product.product_id] = product
+        index_product(product)
+        product_ids.append(product.product_id)
+
+    sold: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def shopper(thread_id: int):
+        username = f"inventory_{worker_id}_{thread_id}"
+        user_directory.add(User(f"inventory-{worker_id}-{thread_id}", username, PASSWORD,
+                                f"{username}@example.com"))
+        session_id = auth_manager.login_user(user_directory, username, PASSWORD)
+        rng = random.Random(worker_id * 1000 + thread_id)
+        local_sold: Dict[str, int] = {}
+        for _ in range(checkouts):
+            for product_id in rng.sample(product_ids, rng.randint(1, 3)):
+                try:
+                    add_to_cart(session_id, product_id, rng.randint(1, 3))
+                except CartError:
+                    pass
+            lines = [(line.product_id, line.quantity) for line in view_cart(session_id).lines]
+            try:
+                checkout(session_id, "UPI")
+            except (CartError, PaymentError):
+                for product_id, _ in lines:
+                    remove_from_cart(session_id, product_id)
+                continue
+            for product_id, quantity in lines:
+                local_sold[product_id] = local_sold.get(product_id, 0) + quantity
+        with lock:
+            for product_id, quantity in local_sold.items():
+                sold[product_id] = sold.get(product_id, 0) + quantity
+
+    shoppers = [threading.Thread(target=shopper, args=(i,)) for i in range(threads)]
+    for thread in shoppers:
+        thread.start()
+    for thread in shoppers:
+        thread.join()
+    return sold
+
+
+def run(mode: str, processes: int, threads: int, checkouts: int) -> Tuple[Dict[str, int], float]:
+    """Run the workers in one inventory mode; return total sold per product and elapsed time"""
+    os.environ["SHOP_INVENTORY"] = mode
+    os.environ["SHOP_INVENTORY_SHARED_NAME"] = SHARED_NAME
+    os.environ["SHOP_INVENTORY_SHARED_SLOTS"] = str(SHARED_SLOTS)
+    context = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    with context.Pool(processes) as pool:
+        results = pool.starmap(worker, [(i, threads, checkouts) for i in range(processes)])
+    elapsed = time.perf_counter() - start
+    sold: Dict[str, int] = {}
+    for result in results:
+        for product_id, quantity in result.items():
+            sold[product_id] = sold.get(product_id, 0) + quantity
+    return sold, elapsed
+
+
+def main() -> int:
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    checkouts = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    total_stock = PRODUCTS * STOCK_PER_PRODUCT
+    print(f"{processes} processes x {threads} threads x {checkouts} checkouts, "
+          f"{PRODUCTS} products with {STOCK_PER_PRODUCT} each")
+
+    sold, elapsed = run("local", processes, threads, checkouts)
+    print(f"  local stock:  sold {sum(sold.values()):>6,} of {total_stock:,} in {elapsed:.2f}s")
+
+    counters = SharedStockCounters(SHARED_NAME, SHARED_SLOTS)
+    try:
+        product_ids = [f"inventory-prod{i}" for i in range(PRODUCTS)]
+        for product_id in product_ids:
+            counters.register(product_id, STOCK_PER_PRODUCT)
+        sold, elapsed = run("shared", processes, threads, checkouts)
+        remaining = {product_id: counters.get(counters.slot_of(product_id))
+                     for product_id in product_ids}
+    finally:
+        counters.close()
+        counters.unlink()
+    print(f"  shared stock: sold {sum(sold.values()):>6,} of {total_stock:,} in {elapsed:.2f}s")
+
+    errors: List[str] = []
+    for product_id in product_ids:
+        if remaining[product_id] < 0 or sold.get(product_id, 0) > STOCK_PER_PRODUCT:
+            errors.append(f"{product_id}: oversold, {sold.get(product_id, 0)} sold")
+        elif remaining[product_id] + sold.get(product_id, 0) != STOCK_PER_PRODUCT:
+            errors.append(f"{product_id}: {remaining[product_id]} left after selling "
+                          f"{sold.get(product_id, 0)}")
+    for error in errors[:20]:
+        print(f"FAIL: {error}")
+    if not errors:
+        print("OK: shared stock was never oversold or lost")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
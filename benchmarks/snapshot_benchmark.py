@@ -0,0 +1,122 @@
+"""
+Snapshot write and warm restart times
+
+Fills the stores with synthetic products, carts and sessions, writes a
+snapshot, then starts fresh processes on it and measures how long
+until carts and sessions are served again. Carts and sessions load
+lazily, so that is independent of their number. The full startup,
+loading every store, is reported separately, followed by the first
+catalog query, which decodes the products to build the indexes.
+
+Run from the project root:
+    python -m benchmarks.snapshot_benchmark [products] [carts and sessions]
+"""
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+SAMPLE_LOOKUPS = 1000
+
+RESTORE_CHECK = """
+import random, sys, time
+start = time.perf_counter()
+from data.snapshot import snapshot_section
+from data.repository import SnapshotRepository
+from data.session_store import SessionStore
+from data.snapshot import SessionRestore
+carts = SnapshotRepository(snapshot_section("carts"), lambda record: record)
+sessions = SessionStore()
+sessions.restore_from(SessionRestore(snapshot_section("user_sessions")))
+opened = time.perf_counter()
+rng = random.Random(1)
+count = int(sys.argv[1])
+session_ids = [line.strip() for line in open(sys.argv[2])]
+for i in range(%d):
+    assert carts.get(f"bench-user{rng.randrange(count)}") is not None
+    assert sessions.get(rng.choice(session_ids)) is not None
+served = time.perf_counter()
+print(f"{(opened - start) * 1000:.1f} {(served - opened) * 1000:.1f}")
+""" % SAMPLE_LOOKUPS
+
+FULL_STARTUP = """
+import sys, time
+start = time.perf_counter()
+from data.carts import carts_data
+from data.sessions import auth_manager
+from data.products import products_data
+assert len(carts_data) == int(sys.argv[1])
+loaded = time.perf_counter()
+from data.catalog import query_catalog
+query_catalog(min_price=100, max_price=200)
+print(f"{loaded - start:.2f} {time.perf_counter() - loaded:.2f}")
+"""
+
+
+def generate_data(products: int, users: int) -> list:
+    """Fill the stores; return the user session IDs the session store still holds"""
+    from data.categories import Category, categories_data
+    from data.products import Product, products_data
+    from data.carts import Cart, carts_data
+    from data.sessions import auth_manager
+
+    rng = random.Random(42)
+    categories_data["bench-cat"] = Category("bench-cat", "Benchmark Category")
+    for i in range(products):
+        products_data[f"bench-prod{i}"] = Product(f"bench-prod{i}", f"Product {i}",
+                                                  round(rng.uniform(10, 10_000), 2), "bench-cat",
+                                                  "Synthetic product", 1_000_000)
+    for i in range(users):
+        cart = Cart(f"bench-user{i}")
+        for _ in range(rng.randint(1, 3)):
+            cart.add_item(products_data[f"bench-prod{rng.randrange(products)}"], rng.randint(1, 3))
+        carts_data[cart.user_id] = cart
+    session_ids = [auth_manager.user_sessions.create(f"bench-user{i}") for i in range(users)]
+    # A full shard of the session store evicts its least recently used sessions
+    return [session_id for session_id in session_ids
+            if auth_manager.user_sessions.get(session_id) is not None]
+
+
+def run_child(code: str, snapshot_path: str, *args: str) -> str:
+    environment = dict(os.environ, SHOP_SNAPSHOT=snapshot_path)
+    result = subprocess.run([sys.executable, "-c", code, *args], env=environment,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def main() -> int:
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, "shop.snapshot")
+        sessions_path = os.path.join(directory, "sessions.txt")
+
+        start = time.perf_counter()
+        session_ids = generate_data(products, users)
+        print(f"Generated {products:,} products, {users:,} carts and sessions "
+              f"in {time.perf_counter() - start:.1f}s")
+        with open(sessions_path, "w") as sessions_file:
+            sessions_file.write("\n".join(random.Random(2).sample(session_ids, SAMPLE_LOOKUPS)))
+
+        from data.snapshot import create_snapshotter
+        stats = create_snapshotter(snapshot_path).snapshot()
+        print(f"Snapshot: {sum(stats.records.values()):,} records, {stats.size / 2**20:,.1f} MiB "
+              f"in {stats.seconds:.2f}s")
+
+        opened_ms, served_ms = run_child(RESTORE_CHECK, snapshot_path, str(users),
+                                         sessions_path).split()
+        print(f"Restore: snapshot mapped in {opened_ms} ms, "
+              f"{SAMPLE_LOOKUPS} cart and session lookups in {served_ms} ms")
+
+        startup_seconds, query_seconds = run_child(FULL_STARTUP, snapshot_path, str(users)).split()
+        print(f"Full startup: {startup_seconds}s, first catalog query building the indexes: "
+              f"{query_seconds}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Cold start time of the interactive application
+
+Imports main in fresh interpreters under "python -X importtime" and
+reports the median cumulative import time, the slowest modules, and
+the wall time until the first menu is shown. Fails when the median is
+over the budget, or when a module that should only load on first use
+(the catalog, search, payments, asyncio) is imported at startup.
+
+Run from the project root:
+    python -m benchmarks.startup_benchmark [runs] [budget in ms]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+DEFAULT_RUNS = 15
+IMPORT_BUDGET_MS = 50.0
+SLOWEST_SHOWN = 8
+
+# Modules that must not load until a session uses them
+DEFERRED_MODULES = ("data.products", "data.search", "data.catalog", "data.payment",
+                    "data.sessions", "data.shared_inventory", "asyncio", "multiprocessing")
+
+
+def import_profile() -> Dict[str, Tuple[int, int]]:
+    """Import main in a fresh interpreter; return module -> (self us, cumulative us)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(own), int(cumulative))
+    return profile
+
+
+def first_menu_seconds() -> float:
+    """Wall time from starting the application until it exits at the first menu"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "main.py"], input="3\n", capture_output=True,
+                   text=True, check=True)
+    return time.perf_counter() - start
+
+
+def interpreter_seconds() -> float:
+    """Wall time of an interpreter doing nothing, for comparison"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else IMPORT_BUDGET_MS
+    if os.environ.get("SHOP_SNAPSHOT"):
+        print(f"Restoring from snapshot {os.environ['SHOP_SNAPSHOT']}")
+
+    profiles = [import_profile() for _ in range(runs)]
+    import_ms: List[float] = [profile["main"][1] / 1000 for profile in profiles]
+    median_ms = statistics.median(import_ms)
+    menu_ms = statistics.median(first_menu_seconds() for _ in range(runs)) * 1000
+    bare_ms = statistics.median(interpreter_seconds() for _ in range(runs)) * 1000
+
+    print(f"import main:  median {median_ms:.1f} ms, best {min(import_ms):.1f} ms "
+          f"over {runs} runs (budget {budget_ms:.0f} ms)")
+    print(f"first menu:   {menu_ms:.1f} ms wall time, bare interpreter {bare_ms:.1f} ms")
+
+    last = profiles[-1]
+    print("slowest modules (self time):")
+    for name, (own, cumulative) in sorted(last.items(), key=lambda item: -item[1][0])[:SLOWEST_SHOWN]:
+        print(f"  {name:<32} {own / 1000:>7.2f} ms  ({cumulative / 1000:.2f} ms with imports)")
+
+    errors = [f"{name} is imported at startup" for name in DEFERRED_MODULES if name in last]
+    if median_ms > budget_ms:
+        errors.append(f"import main took {median_ms:.1f} ms, over the {budget_ms:.0f} ms budget")
+    for error in errors:
+        print(f"FAIL: {error}")
+    if not errors:
+        print("OK: startup is within budget")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Stress test of SQLite write-behind under concurrent changes and failed writes
+
+Writer threads keep changing, adding and deleting records of a SQLite
+repository while the background flusher writes them out. Encoding
+iterates the records as the writers change them, and one record fails
+to encode once on purpose. The flusher must survive the failures and
+catch up on its own, and after closing, the table must hold exactly
+the records in memory.
+
+Run from the project root:
+    python -m benchmarks.write_behind_stress [threads] [seconds]
+"""
+
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from data.repository import SQLiteDatabase
+
+FLUSH_INTERVAL = 0.01
+RECORDS_PER_THREAD = 200
+CATCH_UP_SECONDS = 5.0
+FAILING_KEY = "writer0-0"
+
+
+def main() -> int:
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+
+    failures = {"injected": 0}
+
+    def encode(record: Dict[str, int]) -> Dict:
+        if failures["injected"] == 0 and record.get("fail"):
+            failures["injected"] += 1
+            raise ValueError("injected encode failure")
+        # Iterates the live dict, like Cart.to_record does with its items
+        return {"items": {key: value for key, value in record.items()}}
+
+    errors: List[str] = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "records.db")
+        database = SQLiteDatabase(path, FLUSH_INTERVAL, flush_batch=1_000_000)
+        records = database.open_repository("records", encode, lambda record: record["items"])
+        stop = threading.Event()
+
+        def writer(index: int):
+            rng = random.Random(index)
+            keys = [f"writer{index}-{i}" for i in range(RECORDS_PER_THREAD)]
+            while not stop.is_set():
+                key = rng.choice(keys)
+                record = records.get(key)
+                if record is None:
+                    records[key] = {"fail": 1} if key == FAILING_KEY else {}
+                elif rng.random() < 0.05:
+                    del records[key]
+                else:
+                    record[str(rng.randrange(50))] = rng.randrange(1000)
+                    if len(record) > 40:
+                        record.pop(next(iter(record)))
+                    records.mark_dirty(key)
+
+        workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        time.sleep(seconds)
+        stop.set()
+        for worker in workers:
+            worker.join()
+        # A failing record is always present until the first flush gets to it
+        if FAILING_KEY not in records:
+            records[FAILING_KEY] = {"fail": 1}
+
+        # Without any help, the flusher has to write everything that is left
+        deadline = time.monotonic() + CATCH_UP_SECONDS
+        while records.pending and time.monotonic() < deadline:
+            time.sleep(FLUSH_INTERVAL)
+        pending = records.pending
+        print(f"{threads} writers for {seconds:.1f}s, {failures['injected']} injected failure(s), "
+              f"{pending} change(s) pending after the writers stopped")
+        if not failures["injected"]:
+            errors.append("the injected encode failure never happened")
+        if pending:
+            errors.append(f"the flusher left {pending} change(s) unwritten "
+                          f"(last error: {database.last_error!r})")
+
+        expected = {key: encode(record) for key, record in records.items()}
+        database.close()
+        connection = sqlite3.connect(path)
+        stored = {key: json.loads(value)
+                  for key, value in connection.execute("SELECT key, value FROM records")}
+        connection.close()
+        missing = expected.keys() - stored.keys()
+        extra = stored.keys() - expected.keys()
+        changed = [key for key in expected.keys() & stored.keys() if expected[key] != stored[key]]
+        print(f"{len(expected):,} records in memory, {len(stored):,} in the table")
+        if missing or extra or changed:
+            errors.append(f"table differs from memory: {len(missing)} missing, {len(extra)} extra, "
+                          f"{len(changed)} out of date")
+
+    for error in errors:
+        print(f"FAIL: {error}")
+    if not errors:
+        print("OK: the flusher survived failed writes and the table matches memory")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
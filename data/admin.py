@@ -2,6 +2,11 @@
 Admin class and admin data management
 """
 
+from typing import Dict
+from data.directory import AccountDirectory
+from data.repository import create_repository
+
+
 class Admin:
     """Represents an admin user with elevated privileges"""
     
@@ -32,13 +37,40 @@ class Admin:
         """Check if admin account is active"""
         return self.__is_active
     
+    def deactivate(self):
+        """Deactivate the admin account"""
+        self.__is_active = False
+    
+    def to_record(self) -> Dict:
+        """Convert admin to a plain dict for storage"""
+        return {
+            "admin_id": self.__admin_id,
+            "username": self.__username,
+            "password": self.__password,
+            "email": self.__email,
+            "is_active": self.__is_active
+        }
+    
+    @classmethod
+    def from_record(cls, record: Dict) -> "Admin":
+        """Rebuild admin from a dict created by to_record"""
+        admin = cls(record["admin_id"], record["username"], record["password"], record["email"])
+        admin.__is_active = record["is_active"]
+        return admin
+    
     def __str__(self) -> str:
         return f"Admin(id={self.__admin_id}, username={self.__username})"
 
 
-# Demo admin data
-admin_data = {
-    "admin1": Admin("admin1", "admin", "admin123", "admin@email.com")
-}
-    "admin1": Admin("admin1", "admin", "admin123", "admin@email.com")
-}
+def _demo_admins() -> Dict[str, Admin]:
+    """Demo admin data"""
+    return {
+        "admin1": Admin("admin1", "admin", "admin123", "admin@email.com")
+    }
+
+
+admin_data = create_repository("admins", Admin.to_record, Admin.from_record,
+                               _demo_admins)
+
+# Username/email index over admin_data
+admin_directory = AccountDirectory(admin_data, "admin_id")
@@ -0,0 +1,284 @@
+"""
+Sales analytics rolled up at checkout into hourly and daily buckets
+
+Every successful order adds its units and revenue to running totals
+per product, per category, per payment method and overall. Totals are
+kept in rings of fixed-width time buckets backed by fixed-size arrays,
+so recording an order is O(1) per key and a dashboard reads
+O(buckets) numbers instead of replaying the transactions.
+"""
+
+import heapq
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from data import config
+from data.ledger import MAX_PAGE_SIZE
+from data.payment import payment_processor
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Key of the all-sales totals
+TOTAL = ("total", "")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class BucketRing:
+    """
+    Units and revenue (in paise) per (dimension, ID) key in a ring of fixed-width time buckets
+
+    Each key has one fixed-size array: the newest bucket the key sold
+    in, then the units and revenue of bucket b at slot b % size. A key
+    clears the slots it reuses when it moves on to a newer bucket, so
+    its slots always hold the `size` buckets up to its newest one, and
+    recording a sale never touches the arrays of other keys.
+    """
+
+    def __init__(self, width: int, size: int):
+        """
+        Args:
+            width: Seconds per bucket
+            size: Buckets kept
+        """
+        if width <= 0 or size <= 0:
+            raise ValueError("Bucket width and count must be positive")
+        self.__width = width
+        self.__size = size
+        # key -> newest bucket, then [units, paise] per slot
+        self.__totals: Dict[Tuple[str, Hashable], array] = {}
+        self.__empty_slots = array("q", [0]) * (size * 2)
+        # dimension -> keys that ever sold, so ranking one dimension skips the others
+        self.__dimensions: Dict[str, List[Tuple[str, Hashable]]] = {}
+
+    @property
+    def width(self) -> int:
+        return self.__width
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def bucket_of(self, local_time: float) -> int:
+        return int(local_time // self.__width)
+
+    def start_of(self, bucket: int) -> datetime:
+        """Local wall-clock time at which bucket starts"""
+        return _EPOCH + timedelta(seconds=bucket * self.__width)
+
+    def __advance(self, totals: array, bucket: int):
+        """Make bucket the newest of a key, clearing the slots it reuses"""
+        newest = totals[0]
+        if bucket - newest >= self.__size:
+            totals[1:] = self.__empty_slots
+        else:
+            for reused in range(newest + 1, bucket + 1):
+                units_index = 1 + (reused % self.__size) * 2
+                totals[units_index] = totals[units_index + 1] = 0
+        totals[0] = bucket
+
+    def add(self, bucket: int, amounts: Iterable[Tuple[Tuple[str, Hashable], int, int]]):
+        """Add (key, units, paise) entries to bucket, a key may appear more than once"""
+        units_index = 1 + (bucket % self.__size) * 2
+        for key, units, paise in amounts:
+            totals = self.__totals.get(key)
+            if totals is None:
+                totals = self.__totals[key] = array("q", [bucket]) + self.__empty_slots
+                self.__dimensions.setdefault(key[0], []).append(key)
+            elif bucket > totals[0]:
+                self.__advance(totals, bucket)
+            elif bucket <= totals[0] - self.__size:
+                continue    # Older than any bucket the key still keeps
+            totals[units_index] += units
+            totals[units_index + 1] += paise
+
+    def keys(self, dimension: str) -> List[Tuple[str, Hashable]]:
+        """Keys of a dimension that ever sold"""
+        return self.__dimensions.get(dimension, [])
+
+    def __range(self, totals: array, first: int, last: int) -> Tuple[int, int]:
+        """Buckets first..last narrowed to those the key's slots hold"""
+        newest = totals[0]
+        return max(first, newest - self.__size + 1), min(last, newest)
+
+    def __slices(self, first: int, last: int) -> List[Tuple[slice, slice]]:
+        """(units, paise) slices of buckets first..last, two if they wrap around the ring"""
+        first_slot = first % self.__size
+        end_slot = last % self.__size + 1
+        parts = [(first_slot, end_slot)] if first_slot < end_slot else \
+            [(first_slot, self.__size), (0, end_slot)]
+        return [(slice(1 + start * 2, 1 + end * 2, 2), slice(2 + start * 2, 2 + end * 2, 2))
+                for start, end in parts]
+
+    def series(self, key: Hashable, last: int, count: int) -> List[Tuple[int, int, int]]:
+        """(bucket, units, paise) of the count buckets up to last, oldest first"""
+        first = last - min(count, self.__size) + 1
+        totals = self.__totals.get(key)
+        low, high = self.__range(totals, first, last) if totals is not None else (last + 1, last)
+        series = []
+        for bucket in range(first, last + 1):
+            if low <= bucket <= high:
+                units_index = 1 + (bucket % self.__size) * 2
+                series.append((bucket, totals[units_index], totals[units_index + 1]))
+            else:
+                series.append((bucket, 0, 0))
+        return series
+
+    def total(self, key: Hashable, last: int, count: int) -> Tuple[int, int]:
+        """(units, paise) of key over the count buckets up to last"""
+        found = self.totals_by_key((key,), last, count)
+        return (found[0][1], found[0][2]) if found else (0, 0)
+
+    def totals_by_key(self, keys: Iterable[Hashable], last: int,
+                      count: int) -> List[Tuple[Hashable, int, int]]:
+        """(key, units, paise) over the count buckets up to last of every key in keys that sold"""
+        first = last - min(count, self.__size) + 1
+        window = self.__slices(first, last)
+        found = []
+        for key in keys:
+            totals = self.__totals.get(key)
+            if totals is None:
+                continue
+            low, high = self.__range(totals, first, last)
+            if low > high:
+                continue
+            units = paise = 0
+            for units_slice, paise_slice in (window if (low, high) == (first, last)
+                                             else self.__slices(low, high)):
+                units += sum(totals[units_slice])
+                paise += sum(totals[paise_slice])
+            if units:
+                found.append((key, units, paise))
+        return found
+
+
+class SalesAnalytics:
+    """Hourly and daily sales rollups per product, category and payment method"""
+
+    def __init__(self, hourly_buckets: int = 48, daily_buckets: int = 90,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            hourly_buckets: Hours of hourly totals kept
+            daily_buckets: Days of daily totals kept
+            clock: Wall-clock time source
+        """
+        self.__lock = threading.Lock()
+        self.__hourly = BucketRing(HOUR, hourly_buckets)
+        self.__daily = BucketRing(DAY, daily_buckets)
+        self.__clock = clock
+
+    @property
+    def hourly_buckets(self) -> int:
+        return self.__hourly.size
+
+    @property
+    def daily_buckets(self) -> int:
+        return self.__daily.size
+
+    def __local_now(self, when: Optional[float] = None) -> float:
+        """Seconds since the epoch on the local wall clock, so days start at local midnight"""
+        now = self.__clock() if when is None else when
+        return now + time.localtime(now).tm_gmtoff
+
+    def record_order(self, lines: Iterable[Tuple[str, str, int, float]], payment_method: str,
+                     amount: float, when: Optional[float] = None):
+        """
+        Add one successful order to the rollups
+
+        Args:
+            lines: (product ID, category ID, quantity, unit price charged) of each
+                item of the order
+            payment_method: Payment method of the order
+            amount: Amount charged for the order, counted as the payment method's and overall revenue
+            when: Time of the order (now by default)
+        """
+        amounts = []
+        order_units = 0
+        for product_id, category_id, quantity, price in lines:
+            paise = round(price * quantity * 100)
+            amounts.append((("product", product_id), quantity, paise))
+            amounts.append((("category", category_id), quantity, paise))
+            order_units += quantity
+        order_paise = round(amount * 100)
+        amounts.append((("payment_method", payment_method), order_units, order_paise))
+        amounts.append((TOTAL, order_units, order_paise))
+
+        local_now = self.__local_now(when)
+        with self.__lock:
+            self.__hourly.add(self.__hourly.bucket_of(local_now), amounts)
+            self.__daily.add(self.__daily.bucket_of(local_now), amounts)
+
+    def record_payments(self, transactions: Iterable[Dict]):
+        """Add successful payments, with the order lines stored along with them, to the rollups"""
+        for transaction in transactions:
+            self.record_order(transaction.get("lines", ()), transaction["payment_method"],
+                              transaction["amount"], transaction["timestamp"].timestamp())
+
+    def hourly(self, key: Hashable = TOTAL, hours: int = 24) -> List[Tuple[datetime, int, float]]:
+        """(hour start, units, revenue) of the last hours, oldest first"""
+        return self.__series(self.__hourly, key, hours)
+
+    def daily(self, key: Hashable = TOTAL, days: int = 7) -> List[Tuple[datetime, int, float]]:
+        """(day start, units, revenue) of the last days, oldest first"""
+        return self.__series(self.__daily, key, days)
+
+    def __series(self, ring: BucketRing, key: Hashable, count: int) -> List[Tuple[datetime, int, float]]:
+        last = ring.bucket_of(self.__local_now())
+        with self.__lock:
+            series = ring.series(key, last, count)
+        return [(ring.start_of(bucket), units, paise / 100) for bucket, units, paise in series]
+
+    def totals(self, key: Hashable = TOTAL, hours: Optional[int] = None,
+               days: Optional[int] = None) -> Tuple[int, float]:
+        """(units, revenue) of key over the last hours, or the last days (today only by default)"""
+        ring, count = (self.__hourly, hours) if hours is not None else (self.__daily, days or 1)
+        last = ring.bucket_of(self.__local_now())
+        with self.__lock:
+            units, paise = ring.total(key, last, count)
+        return units, paise / 100
+
+    def top(self, dimension: str, days: int = 7, limit: int = 5) -> List[Tuple[str, int, float]]:
+        """
+        (ID, units, revenue) of the best-selling keys of a dimension over the last days
+
+        Args:
+            dimension: "product", "category" or "payment_method"
+            days: Days to add up
+            limit: Maximum number of results (all if 0)
+
+        Returns:
+            Entries by descending revenue
+        """
+        last = self.__daily.bucket_of(self.__local_now())
+        with self.__lock:
+            ranked = self.__daily.totals_by_key(self.__daily.keys(dimension), last, days)
+        order = lambda entry: (-entry[2], entry[0][1])
+        ranked = heapq.nsmallest(limit, ranked, key=order) if limit else sorted(ranked, key=order)
+        return [(key[1], units, paise / 100) for key, units, paise in ranked]
+
+    def __str__(self) -> str:
+        return (f"SalesAnalytics(hourly_buckets={self.__hourly.size}, "
+                f"daily_buckets={self.__daily.size})")
+
+
+def _load_sales_analytics() -> SalesAnalytics:
+    """Rollups seeded with the stored payments still inside the kept buckets"""
+    analytics = SalesAnalytics(config.ANALYTICS_HOURLY_BUCKETS, config.ANALYTICS_DAILY_BUCKETS)
+    since = datetime.now() - timedelta(days=analytics.daily_buckets)
+    cursor = None
+    while True:
+        page = payment_processor.query_transactions(start=since, descending=False,
+                                                    page_size=MAX_PAGE_SIZE, cursor=cursor)
+        analytics.record_payments(page.transactions)
+        cursor = page.next_cursor
+        if cursor is None:
+            return analytics
+
+
+# Global sales rollups, rebuilt from the stored payments and then fed by checkout
+sales_analytics = _load_sales_analytics()
@@ -0,0 +1,317 @@
+"""
+Cart lifecycle: idle expiry, optional spill to disk and cart metrics
+
+Every cart operation opens the user's cart through the lifecycle
+manager, which records when the cart was last touched. A background
+thread evicts carts left untouched for the idle TTL, so carts of users
+who never come back (or of bots) do not pile up in memory. With a
+spill file, evicted carts are written there and restored on the
+user's next cart operation.
+"""
+
+import atexit
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from data import config
+from data.carts import Cart, carts_data
+from data.products import products_data
+from data.repository import Repository
+
+DEFAULT_SHARDS = 16
+
+# Carts sampled to estimate the memory of all live carts
+MEMORY_SAMPLE = 1000
+
+
+class CartSpill:
+    """SQLite file holding evicted carts until their users come back"""
+
+    def __init__(self, path: str):
+        self.__connection = sqlite3.connect(path, check_same_thread=False,
+                                            isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS spilled_carts "
+            "(user_id TEXT PRIMARY KEY, record TEXT NOT NULL) WITHOUT ROWID")
+        self.__lock = threading.Lock()
+
+    def put_many(self, records: List[Tuple[str, Dict]]):
+        """Store (user ID, cart record) pairs in one transaction"""
+        rows = [(user_id, json.dumps(record, separators=(",", ":"))) for user_id, record in records]
+        with self.__lock:
+            self.__connection.execute("BEGIN")
+            try:
+                self.__connection.executemany(
+                    "INSERT OR REPLACE INTO spilled_carts (user_id, record) VALUES (?, ?)", rows)
+            except sqlite3.Error:
+                self.__connection.execute("ROLLBACK")
+                raise
+            self.__connection.execute("COMMIT")
+
+    def take(self, user_id: str) -> Optional[Dict]:
+        """Remove and return the stored record of user's cart, or None"""
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT record FROM spilled_carts WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None:
+                return None
+            self.__connection.execute("DELETE FROM spilled_carts WHERE user_id = ?", (user_id,))
+        return json.loads(row[0])
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM spilled_carts").fetchone()[0]
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+
+class CartLifecycleStats(NamedTuple):
+    """Cart counts and estimated memory at one point in time"""
+    live: int
+    evicted: int
+    spilled: int
+    restored: int
+    memory_bytes: int
+
+
+class _CartShard:
+    """One lock stripe: last-touched times plus an expiry heap"""
+
+    __slots__ = ("lock", "touched", "expiry_heap")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.touched: Dict[str, float] = {}
+        self.expiry_heap: List[Tuple[float, str]] = []
+
+
+class CartLifecycle:
+    """Tracks cart activity and evicts carts that went idle"""
+
+    def __init__(self, carts: Repository, decode: Callable[[Dict], Cart],
+                 idle_ttl: float, spill: Optional[CartSpill] = None,
+                 shards: int = DEFAULT_SHARDS, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            carts: Store of the carts, by user ID
+            decode: Rebuilds a cart from the record Cart.to_record made
+            idle_ttl: Seconds a cart may go untouched before eviction
+            spill: Where evicted carts are kept (they are discarded without one)
+            shards: Number of lock stripes
+            clock: Monotonic time source
+        """
+        if idle_ttl <= 0:
+            raise ValueError("Cart idle TTL must be positive")
+        self.__carts = carts
+        self.__decode = decode
+        self.__idle_ttl = idle_ttl
+        self.__spill = spill
+        self.__clock = clock
+        self.__shards = [_CartShard() for _ in range(shards)]
+        self.__counter_lock = threading.Lock()
+        self.__evicted = 0
+        self.__spilled = 0
+        self.__restored = 0
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.__track_stored()
+
+    @property
+    def idle_ttl(self) -> float:
+        return self.__idle_ttl
+
+    def __track_stored(self):
+        """Start the idle clock of the carts already in the store, so abandoned ones expire too"""
+        # Keys only: carts still in a snapshot stay there until they are opened or evicted
+        user_ids = list(dict.keys(self.__carts))
+        base = self.__carts.snapshot_base()
+        if base is not None:
+            user_ids.extend(user_id for user_id, _ in base.untaken())
+        now = self.__clock()
+        for user_id in user_ids:
+            shard = self.__shard_for(user_id)
+            if user_id not in shard.touched:
+                shard.touched[user_id] = now
+                shard.expiry_heap.append((now + self.__idle_ttl, user_id))
+        for shard in self.__shards:
+            heapq.heapify(shard.expiry_heap)
+
+    def __shard_for(self, user_id: str) -> _CartShard:
+        return self.__shards[hash(user_id) % len(self.__shards)]
+
+    def open(self, user_id: str, create: bool = False) -> Optional[Cart]:
+        """
+        Touch and return the user's cart, restoring it from the spill file if it was evicted
+
+        Args:
+            user_id: Owner of the cart
+            create: Create an empty cart if the user has none
+
+        Returns:
+            The cart, or None if the user has none and create is False
+        """
+        shard = self.__shard_for(user_id)
+        now = self.__clock()
+        with shard.lock:
+            cart = self.__carts.get(user_id)
+            if cart is None and self.__spill is not None:
+                record = self.__spill.take(user_id)
+                if record is not None:
+                    cart = self.__carts[user_id] = self.__decode(record)
+                    with self.__counter_lock:
+                        self.__restored += 1
+            if cart is None:
+                if not create:
+                    return None
+                cart = self.__carts[user_id] = Cart(user_id)
+            # Touched before the caller uses it, so the reaper cannot take it mid-request
+            if user_id not in shard.touched:
+                heapq.heappush(shard.expiry_heap, (now + self.__idle_ttl, user_id))
+            shard.touched[user_id] = now
+        return cart
+
+    def reap(self) -> int:
+        """Evict every cart idle for longer than the TTL; return how many were evicted"""
+        evicted = 0
+        now = self.__clock()
+        for shard in self.__shards:
+            with shard.lock:
+                idle = self.__pop_idle(shard, now)
+                if idle:
+                    evicted += self.__evict(shard, idle, now)
+        return evicted
+
+    def __evict(self, shard: _CartShard, idle: List[str], now: float) -> int:
+        """Spill and drop the carts of idle users (caller holds the shard lock)"""
+        carts = [(user_id, self.__carts.get(user_id)) for user_id in idle]
+        spilled = 0
+        if self.__spill is not None:
+            records = [(user_id, cart.to_record()) for user_id, cart in carts
+                       if cart is not None and not cart.is_empty()]
+            # Written before the carts leave memory, so a failed write loses nothing
+            try:
+                self.__spill.put_many(records)
+            except sqlite3.Error:
+                for user_id in idle:
+                    shard.touched[user_id] = now
+                    heapq.heappush(shard.expiry_heap, (now + self.__idle_ttl, user_id))
+                raise
+            spilled = len(records)
+        evicted = 0
+        for user_id, cart in carts:
+            if cart is not None:
+                self.__carts.pop(user_id, None)
+                evicted += 1
+        with self.__counter_lock:
+            self.__evicted += evicted
+            self.__spilled += spilled
+        return evicted
+
+    def __pop_idle(self, shard: _CartShard, now: float) -> List[str]:
+        """Take the idle user IDs off the heap (caller holds the shard lock).
+
+        Heap deadlines are lower bounds: a cart touched since it was
+        pushed is re-queued with its current deadline instead.
+        """
+        heap = shard.expiry_heap
+        touched = shard.touched
+        idle = []
+        while heap and heap[0][0] <= now:
+            _, user_id = heapq.heappop(heap)
+            last_touched = touched.get(user_id)
+            if last_touched is None:
+                continue
+            deadline = last_touched + self.__idle_ttl
+            if deadline <= now:
+                del touched[user_id]
+                idle.append(user_id)
+            else:
+                heapq.heappush(heap, (deadline, user_id))
+        return idle
+
+    def start(self, interval: float):
+        """Reap idle carts every interval seconds in the background"""
+        if self.__thread is None:
+            self.__stop.clear()
+            self.__thread = threading.Thread(target=self.__loop, args=(interval,),
+                                             name="cart-reaper", daemon=True)
+            self.__thread.start()
+
+    def __loop(self, interval: float):
+        while not self.__stop.wait(interval):
+            try:
+                self.reap()
+            except sqlite3.Error:
+                # Spill file unavailable; the carts stay in memory until the next sweep
+                pass
+
+    def stop(self):
+        """Stop the background thread"""
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def stats(self) -> CartLifecycleStats:
+        """Live carts, eviction counters and the estimated memory of the live carts"""
+        sample: List[str] = []
+        live = 0
+        for shard in self.__shards:
+            with shard.lock:
+                live += len(shard.touched)
+                if len(sample) < MEMORY_SAMPLE:
+                    sample.extend(list(shard.touched)[:MEMORY_SAMPLE - len(sample)])
+        # Only carts already in memory; looking up the others would load them from a snapshot
+        carts = (dict.get(self.__carts, user_id) for user_id in sample)
+        sizes = [cart.footprint() for cart in carts if cart is not None]
+        memory_bytes = int(sum(sizes) / len(sizes) * live) if sizes else 0
+        with self.__counter_lock:
+            return CartLifecycleStats(live, self.__evicted, self.__spilled, self.__restored,
+                                      memory_bytes)
+
+    def to_prometheus(self) -> str:
+        """Render the cart stats in Prometheus text exposition format"""
+        stats = self.stats()
+        return "\n".join([
+            "# HELP shop_carts_live Carts held in memory",
+            "# TYPE shop_carts_live gauge",
+            f"shop_carts_live {stats.live}",
+            "# HELP shop_carts_evicted_total Carts evicted after going idle",
+            "# TYPE shop_carts_evicted_total counter",
+            f"shop_carts_evicted_total {stats.evicted}",
+            "# HELP shop_carts_spilled_total Evicted carts written to the spill file",
+            "# TYPE shop_carts_spilled_total counter",
+            f"shop_carts_spilled_total {stats.spilled}",
+            "# HELP shop_carts_restored_total Carts restored from the spill file",
+            "# TYPE shop_carts_restored_total counter",
+            f"shop_carts_restored_total {stats.restored}",
+            "# HELP shop_carts_memory_bytes Estimated memory of the live carts",
+            "# TYPE shop_carts_memory_bytes gauge",
+            f"shop_carts_memory_bytes {stats.memory_bytes}",
+        ]) + "\n"
+
+    def __str__(self) -> str:
+        return f"CartLifecycle(live={self.stats().live}, idle_ttl={self.__idle_ttl})"
+
+
+def create_cart_lifecycle() -> CartLifecycle:
+    """Lifecycle manager of carts_data with the configured TTL and spill file, already reaping"""
+    spill = CartSpill(config.CART_SPILL_PATH) if config.CART_SPILL_PATH else None
+    lifecycle = CartLifecycle(carts_data, lambda record: Cart.from_record(record, products_data),
+                              config.CART_IDLE_TTL, spill)
+    lifecycle.start(config.CART_REAP_INTERVAL)
+    if spill is not None:
+        atexit.register(spill.close)
+    return lifecycle
+
+
+# Global cart lifecycle manager
+cart_lifecycle = create_cart_lifecycle()
@@ -2,9 +2,15 @@
 Cart and CartItem classes for shopping cart management
 """
 
+import math
+import sys
+import threading
+import weakref
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from data.exceptions import CartError
+from data.products import products_data
+from data.repository import Repository, create_repository
 
 
 class CartItem:
@@ -45,6 +51,9 @@ class Cart:
         self.__user_id = user_id
         self.__items: Dict[str, CartItem] = {}
         self.__created_at = datetime.now()
+        # Running totals kept in step with __items
+        self.__total_amount = 0.0
+        self.__item_count = 0
     
     @property
     def user_id(self) -> str:
@@ -64,12 +73,25 @@ class Cart:
         else:
             # Add new item
             self.__items[product.product_id] = CartItem(product, quantity)
+            _remember_cart(product.product_id, self)
+        
+        self.__total_amount += product.price * quantity
+        self.__item_count += quantity
     
-    def remove_item(self, product_id: str):
-        """Remove item from cart"""
+    def remove_item(self, product_id: str) -> CartItem:
+        """Remove item from cart and return it"""
         if product_id not in self.__items:
             raise CartError(f"Product with ID {product_id} not found in cart")
-        del self.__items[product_id]
+        item = self.__items.pop(product_id)
+        _forget_cart(product_id, self)
+        
+        if not self.__items:
+            self.__total_amount = 0.0
+            self.__item_count = 0
+        else:
+            self.__total_amount -= item.get_total_price()
+            self.__item_count -= item.quantity
+        return item
     
     def update_quantity(self, product_id: str, quantity: int):
         """Update quantity of an item in cart"""
@@ -82,31 +104,130 @@ class Cart:
             product = self.__items[product_id].product
             if not product.is_available(quantity):
                 raise CartError(f"Cannot update quantity. Insufficient stock")
+            delta = quantity - self.__items[product_id].quantity
             self.__items[product_id].quantity = quantity
+            self.__total_amount += product.price * delta
+            self.__item_count += delta
     
     def get_items(self) -> List[CartItem]:
         """Get all items in cart"""
         return list(self.__items.values())
     
     def get_total_amount(self) -> float:
-        """Calculate total amount for all items in cart"""
-        return sum(item.get_total_price() for item in self.__items.values())
+        """Get total amount for all items in cart"""
+        return self.__total_amount
     
     def get_item_count(self) -> int:
         """Get total number of items in cart"""
-        return sum(item.quantity for item in self.__items.values())
+        return self.__item_count
+    
+    def recompute_totals(self) -> Tuple[float, int]:
+        """Recalculate total amount and item count from the items"""
+        return (sum(item.get_total_price() for item in self.__items.values()),
+                sum(item.quantity for item in self.__items.values()))
+    
+    def apply_price_change(self, product_id: str, old_price: float):
+        """Adjust running total after the price of a product in cart changed"""
+        item = self.__items.get(product_id)
+        if item is not None:
+            self.__total_amount += (item.product.price - old_price) * item.quantity
     
     def is_empty(self) -> bool:
         """Check if cart is empty"""
         return len(self.__items) == 0
     
+    def footprint(self) -> int:
+        """Approximate bytes held by the cart and its items (products are shared, not counted)"""
+        size = (sys.getsizeof(self) + sys.getsizeof(vars(self)) + sys.getsizeof(self.__items) +
+                sys.getsizeof(self.__created_at))
+        for item in self.__items.values():
+            size += sys.getsizeof(item) + sys.getsizeof(vars(item))
+        return size
+    
     def clear(self):
         """Clear all items from cart"""
+        for product_id in self.__items:
+            _forget_cart(product_id, self)
         self.__items.clear()
+        self.__total_amount = 0.0
+        self.__item_count = 0
+    
+    def to_record(self) -> Dict:
+        """Convert cart to a plain dict for storage"""
+        return {
+            "user_id": self.__user_id,
+            "created_at": self.__created_at.isoformat(),
+            "items": {product_id: item.quantity for product_id, item in self.__items.items()}
+        }
+    
+    @classmethod
+    def from_record(cls, record: Dict, products: Dict) -> "Cart":
+        """Rebuild cart from a dict created by to_record, skipping unknown products"""
+        cart = cls(record["user_id"])
+        cart.__created_at = datetime.fromisoformat(record["created_at"])
+        for product_id, quantity in record["items"].items():
+            product = products.get(product_id)
+            if product is not None:
+                cart.__restore_item(product, quantity)
+        return cart
+    
+    def __restore_item(self, product, quantity: int):
+        """Put a stored item back without re-checking stock"""
+        self.__items[product.product_id] = CartItem(product, quantity)
+        _remember_cart(product.product_id, self)
+        self.__total_amount += product.price * quantity
+        self.__item_count += quantity
     
     def __str__(self) -> str:
         return f"Cart(user_id={self.__user_id}, items={len(self.__items)})"
 
 
+# product_id -> carts currently holding that product
+_carts_by_product: Dict[str, "weakref.WeakSet[Cart]"] = {}
+_holders_lock = threading.Lock()
+
+
+def _remember_cart(product_id: str, cart: Cart):
+    """Add cart to the product's holder set"""
+    with _holders_lock:
+        _carts_by_product.setdefault(product_id, weakref.WeakSet()).add(cart)
+
+
+def _forget_cart(product_id: str, cart: Cart):
+    """Remove cart from the product's holder set"""
+    with _holders_lock:
+        holders = _carts_by_product.get(product_id)
+        if holders is not None:
+            holders.discard(cart)
+            if not holders:
+                del _carts_by_product[product_id]
+
+
+def reprice_carts(product_id: str, old_price: float):
+    """Refresh totals of every cart holding product after a price change"""
+    # Copy under the lock; carts are repriced outside it, as they take their own locks
+    with _holders_lock:
+        holders = list(_carts_by_product.get(product_id, ()))
+    for cart in holders:
+        cart.apply_price_change(product_id, old_price)
+
+
+def find_inconsistent_carts(carts: Optional[Repository] = None,
+                            tolerance: float = 1e-6) -> List[str]:
+    """Return user IDs of carts whose running totals differ from a full recompute"""
+    if carts is None:
+        carts = carts_data
+    
+    inconsistent = []
+    for user_id, cart in carts.items():
+        total_amount, item_count = cart.recompute_totals()
+        if (item_count != cart.get_item_count() or
+                not math.isclose(total_amount, cart.get_total_amount(),
+                                 rel_tol=tolerance, abs_tol=tolerance)):
+            inconsistent.append(user_id)
+    return inconsistent
+
+
 # Global carts storage
-carts_data: Dict[str, Cart] = {}
\ No newline at end of file
+carts_data = create_repository("carts", Cart.to_record,
+                               lambda record: Cart.from_record(record, products_data))
\ No newline at end of file
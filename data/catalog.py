@@ -0,0 +1,136 @@
+"""
+Cursor-paginated, filterable catalog queries
+"""
+
+import base64
+import json
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from data.products import catalog_order_index, name_index, price_index
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+SORT_FIELDS = ["price", "name"]
+
+
+class CatalogPage(NamedTuple):
+    """One page of catalog results"""
+    products: List
+    next_cursor: Optional[str]
+
+
+def _encode_cursor(state: dict) -> str:
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str, sort_by: Optional[str], descending: bool) -> dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid catalog cursor")
+    if not isinstance(state, dict) or state.get("s") != sort_by or state.get("d") != descending:
+        raise ValueError("Catalog cursor does not match this query")
+    return state
+
+
+def _cursor_key(state: dict, types: Tuple) -> Optional[Tuple]:
+    """The sort key a cursor resumes after, or None on the first page"""
+    if "k" not in state:
+        return None
+    key = state["k"]
+    if (not isinstance(key, list) or len(key) != len(types)
+            or not all(isinstance(value, kind) and not isinstance(value, bool)
+                       for value, kind in zip(key, types))):
+        raise ValueError("Invalid catalog cursor")
+    return tuple(key)
+
+
+def query_catalog(category_id: Optional[str] = None,
+                  min_price: Optional[float] = None,
+                  max_price: Optional[float] = None,
+                  in_stock_only: bool = False,
+                  sort_by: Optional[str] = None,
+                  descending: bool = False,
+                  page_size: int = DEFAULT_PAGE_SIZE,
+                  cursor: Optional[str] = None) -> CatalogPage:
+    """
+    Query active products one page at a time
+
+    Args:
+        category_id: Only return products of this category (optional)
+        min_price: Minimum price, inclusive (optional)
+        max_price: Maximum price, inclusive (optional)
+        in_stock_only: Only return products with stock left
+        sort_by: "price", "name" or None for catalog order (as products were added)
+        descending: Reverse the sort order
+        page_size: Maximum number of products per page
+        cursor: Opaque cursor from the previous page (optional)
+
+    Returns:
+        CatalogPage with the products and the cursor of the next page,
+        which is None when there are no more results
+
+    Raises:
+        ValueError: If the arguments or the cursor are invalid
+    """
+    if sort_by is not None and sort_by not in SORT_FIELDS:
+        raise ValueError(f"Invalid sort field. Supported fields: {', '.join(SORT_FIELDS)}")
+    if not 0 < page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"Page size must be between 1 and {MAX_PAGE_SIZE}")
+
+    state = _decode_cursor(cursor, sort_by, descending) if cursor else {}
+
+    def matches(product) -> bool:
+        if not product.is_active():
+            return False
+        if min_price is not None and product.price < min_price:
+            return False
+        if max_price is not None and product.price > max_price:
+            return False
+        if in_stock_only and product.stock <= 0:
+            return False
+        return True
+
+    if sort_by == "price":
+        return _price_index_page(category_id, min_price, max_price, in_stock_only,
+                                 descending, page_size, state)
+    if sort_by == "name":
+        return _ordered_page(name_index, sort_by, (str, str), category_id, matches,
+                             descending, page_size, state)
+    return _ordered_page(catalog_order_index, None, (int, str), category_id, matches,
+                         descending, page_size, state)
+
+
+def _ordered_page(index, sort_by: Optional[str], key_types: Tuple, category_id: Optional[str],
+                  matches: Callable, descending: bool, page_size: int,
+                  state: dict) -> CatalogPage:
+    """Read the next page of a listing straight from the index ordering it, after the cursor key"""
+    after = _cursor_key(state, key_types)
+    products = index.range(category_id=category_id, descending=descending,
+                           limit=page_size + 1, after=after, predicate=matches)
+
+    next_cursor = None
+    if len(products) > page_size:
+        products = products[:page_size]
+        next_cursor = _encode_cursor({"s": sort_by, "d": descending,
+                                      "k": list(index.key(products[-1]))})
+    return CatalogPage(products, next_cursor)
+
+
+def _price_index_page(category_id: Optional[str], min_price: Optional[float],
+                      max_price: Optional[float], in_stock_only: bool, descending: bool,
+                      page_size: int, state: dict) -> CatalogPage:
+    """Read the next page of a price-sorted listing straight from the price index"""
+    after = _cursor_key(state, ((int, float), str))
+    predicate = (lambda product: product.stock > 0) if in_stock_only else None
+    products = price_index.range(min_price, max_price, category_id, descending,
+                                 page_size + 1, after, predicate)
+
+    next_cursor = None
+    if len(products) > page_size:
+        products = products[:page_size]
+        last = products[-1]
+        next_cursor = _encode_cursor({"s": "price", "d": descending,
+                                      "k": [last.price, last.product_id]})
+    return CatalogPage(products, next_cursor)
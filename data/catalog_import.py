@@ -0,0 +1,193 @@
+"""
+Streaming bulk import of products and categories from CSV or JSONL files
+"""
+
+import csv
+import itertools
+import json
+from typing import Dict, Iterator, List, Tuple, Union
+
+from data.categories import Category, categories_data, category_ids
+from data.products import (Product, products_data, product_ids, index_product,
+                           clean_product_name, validate_price, validate_stock)
+from data.search import search_index
+
+CHUNK_SIZE = 10_000
+MAX_REJECTED_DETAILS = 1000
+IMPORT_KINDS = ["products", "categories"]
+
+
+class ImportReport:
+    """Outcome of one catalog import"""
+
+    def __init__(self, kind: str):
+        self.__kind = kind
+        self.__imported = 0
+        self.__rejected = 0
+        self.__rejections: List[Tuple[int, str]] = []
+
+    @property
+    def kind(self) -> str:
+        return self.__kind
+
+    @property
+    def imported(self) -> int:
+        return self.__imported
+
+    @property
+    def rejected(self) -> int:
+        return self.__rejected
+
+    @property
+    def rejections(self) -> List[Tuple[int, str]]:
+        """(line number, reason) of the first rejected rows"""
+        return list(self.__rejections)
+
+    def add_imported(self, count: int):
+        self.__imported += count
+
+    def reject(self, line: int, reason: str):
+        self.__rejected += 1
+        if len(self.__rejections) < MAX_REJECTED_DETAILS:
+            self.__rejections.append((line, reason))
+
+    def __str__(self) -> str:
+        return f"ImportReport(kind={self.__kind}, imported={self.__imported}, rejected={self.__rejected})"
+
+
+def _is_utf8(text: str) -> bool:
+    """Check that text read with surrogateescape held valid UTF-8"""
+    try:
+        text.encode("utf-8")
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def _read_rows(path: str) -> Iterator[Tuple[int, Union[Dict, str]]]:
+    """Yield (line number, row) pairs; row is the reason instead for unreadable lines"""
+    # Undecodable bytes are kept as surrogates so that only their own line is rejected
+    with open(path, newline="", encoding="utf-8", errors="surrogateescape") as source:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                if not _is_utf8(line):
+                    yield line_number, "Invalid UTF-8"
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_number, row if isinstance(row, dict) else "Malformed row"
+        else:
+            reader = csv.reader(source)
+            try:
+                header = [column.strip() for column in next(reader, [])]
+            except csv.Error as e:
+                raise ValueError(f"Unreadable CSV header: {e}")
+            if not all(_is_utf8(column) for column in header):
+                raise ValueError("Unreadable CSV header: invalid UTF-8")
+            while True:
+                try:
+                    values = next(reader)
+                except StopIteration:
+                    break
+                except csv.Error as e:
+                    yield reader.line_num, f"Malformed row: {e}"
+                    continue
+                if not values:
+                    continue
+                if not all(_is_utf8(value) for value in values):
+                    yield reader.line_num, "Invalid UTF-8"
+                    continue
+                yield reader.line_num, dict(zip(header, values))
+
+
+def _parse_product(row: Dict) -> Tuple:
+    name = clean_product_name(str(row.get("name") or ""))
+    price = float(row["price"])
+    validate_price(price)
+    stock_value = row.get("stock")
+    stock = int(stock_value) if stock_value not in (None, "") else 0
+    validate_stock(stock)
+    category_id = str(row.get("category_id") or "").strip()
+    description = str(row.get("description") or "")
+    return name, price, category_id, description, stock
+
+
+def _import_product_chunk(chunk: List[Tuple[int, Union[Dict, str]]], report: ImportReport):
+    parsed = []
+    for line_number, row in chunk:
+        if isinstance(row, str):
+            report.reject(line_number, row)
+            continue
+        try:
+            parsed.append((line_number, _parse_product(row)))
+        except (KeyError, TypeError, ValueError, OverflowError) as e:
+            report.reject(line_number, str(e) if not isinstance(e, KeyError) else f"Missing field {e}")
+
+    # Resolve each distinct category of the chunk once
+    known_categories = {category_id for category_id in {fields[2] for _, fields in parsed}
+                        if category_id in categories_data and categories_data[category_id].is_active()}
+
+    valid = []
+    for line_number, fields in parsed:
+        if fields[2] in known_categories:
+            valid.append(fields)
+        else:
+            report.reject(line_number, f"Category with ID {fields[2]} not found")
+
+    for product_id, (name, price, category_id, description, stock) in zip(
+            product_ids.next_ids(len(valid)), valid):
+        product = Product(product_id, name, price, category_id, description, stock)
+        products_data[product_id] = product
+        index_product(product)
+        search_index.add(product)
+    report.add_imported(len(valid))
+
+
+def _import_category_chunk(chunk: List[Tuple[int, Union[Dict, str]]], report: ImportReport):
+    valid = []
+    for line_number, row in chunk:
+        if isinstance(row, str):
+            report.reject(line_number, row)
+            continue
+        name = str(row.get("name") or "").strip()
+        if not name:
+            report.reject(line_number, "Category name cannot be empty")
+            continue
+        valid.append((name, str(row.get("description") or "")))
+
+    for category_id, (name, description) in zip(
+            category_ids.next_ids(len(valid)), valid):
+        categories_data[category_id] = Category(category_id, name, description)
+    report.add_imported(len(valid))
+
+
+def import_catalog_file(path: str, kind: str = "products",
+                        chunk_size: int = CHUNK_SIZE) -> ImportReport:
+    """
+    Stream a CSV or JSONL file into the catalog chunk by chunk
+
+    Product rows need name, price and category_id and may have
+    description and stock. Category rows need name and may have
+    description. Bad rows, unreadable lines included, are recorded in
+    the report and skipped.
+
+    Raises:
+        ValueError: If kind is not supported or a CSV header cannot be read
+        OSError: If the file cannot be read
+    """
+    if kind not in IMPORT_KINDS:
+        raise ValueError(f"Invalid import kind. Supported kinds: {', '.join(IMPORT_KINDS)}")
+
+    import_chunk = _import_product_chunk if kind == "products" else _import_category_chunk
+    report = ImportReport(kind)
+    rows = _read_rows(path)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        import_chunk(chunk, report)
+    return report
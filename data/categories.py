@@ -2,6 +2,11 @@
 Category class and category data management
 """
 
+from typing import Dict
+from data.repository import create_repository
+from data.id_allocator import create_allocator
+
+
 class Category:
     """Represents a product category"""
     
@@ -40,13 +45,37 @@ class Category:
         """Deactivate the category"""
         self.__is_active = False
     
+    def to_record(self) -> Dict:
+        """Convert category to a plain dict for storage"""
+        return {
+            "category_id": self.__category_id,
+            "name": self.__name,
+            "description": self.__description,
+            "is_active": self.__is_active
+        }
+    
+    @classmethod
+    def from_record(cls, record: Dict) -> "Category":
+        """Rebuild category from a dict created by to_record"""
+        category = cls(record["category_id"], record["name"], record["description"])
+        category.__is_active = record["is_active"]
+        return category
+    
     def __str__(self) -> str:
         return f"Category(id={self.__category_id}, name={self.__name})"
 
 
-# Demo categories data
-categories_data = {
-    "cat1": Category("cat1", "Electronics", "Electronic devices and gadgets"),
-    "cat2": Category("cat2", "Clothing", "Fashion and apparel"),
-    "cat3": Category("cat3", "Books", "Books and literature")
-}
\ No newline at end of file
+def _demo_categories() -> Dict[str, Category]:
+    """Demo categories data"""
+    return {
+        "cat1": Category("cat1", "Electronics", "Electronic devices and gadgets"),
+        "cat2": Category("cat2", "Clothing", "Fashion and apparel"),
+        "cat3": Category("cat3", "Books", "Books and literature")
+    }
+
+
+categories_data = create_repository("categories", Category.to_record, Category.from_record,
+                                    _demo_categories)
+
+# Category ID allocation, starting above the IDs already stored
+category_ids = create_allocator("cat", categories_data.keys)
\ No newline at end of file
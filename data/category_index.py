@@ -0,0 +1,48 @@
+"""
+Secondary index from category to its active products
+"""
+
+from typing import Dict, Iterable, Iterator, List
+
+
+class CategoryIndex:
+    """Tracks the active products of each category"""
+
+    def __init__(self, products: Iterable = ()):
+        # category_id -> {product_id: product}, in insertion order
+        self.__products: Dict[str, Dict[str, object]] = {}
+        for product in products:
+            self.add(product)
+
+    def add(self, product):
+        """Index product under its category if it is active"""
+        if not product.is_active():
+            return
+        members = self.__products.setdefault(product.category_id, {})
+        members[product.product_id] = product
+
+    def remove(self, product):
+        """Drop product from its category (no-op if not indexed)"""
+        members = self.__products.get(product.category_id)
+        if members is not None:
+            members.pop(product.product_id, None)
+
+    def count(self, category_id: str) -> int:
+        """Get number of active products in category"""
+        members = self.__products.get(category_id)
+        return len(members) if members else 0
+
+    def has_products(self, category_id: str) -> bool:
+        """Check if category still has active products"""
+        return self.count(category_id) > 0
+
+    def get_products(self, category_id: str) -> List:
+        """Get active products of category"""
+        return list(self.__products.get(category_id, {}).values())
+
+    def iter_products(self, category_id: str) -> Iterator:
+        """Iterate lazily over active products of category"""
+        return iter(self.__products.get(category_id, {}).values())
+
+    def __str__(self) -> str:
+        return f"CategoryIndex(categories={len(self.__products)})"
@@ -0,0 +1,67 @@
+"""
+Application settings, read from environment variables
+"""
+
+import os
+
+# Storage backend for the data stores: "memory" or "sqlite"
+STORAGE_BACKEND = os.environ.get("SHOP_STORAGE_BACKEND", "memory")
+
+# SQLite database file used by the "sqlite" backend
+SQLITE_PATH = os.environ.get("SHOP_SQLITE_PATH", "shopping_cart.db")
+
+# Seconds between background write-behind flushes
+SQLITE_FLUSH_INTERVAL = float(os.environ.get("SHOP_SQLITE_FLUSH_INTERVAL", "0.5"))
+
+# Pending writes that trigger an early flush
+SQLITE_FLUSH_BATCH = int(os.environ.get("SHOP_SQLITE_FLUSH_BATCH", "1000"))
+
+# Record call counts, errors and latency of user and admin functions
+INSTRUMENTATION_ENABLED = os.environ.get("SHOP_INSTRUMENTATION", "0") == "1"
+
+# Append-only payment journal file; empty disables the journal
+PAYMENT_JOURNAL_PATH = os.environ.get("SHOP_PAYMENT_JOURNAL", "")
+
+# Payment gateway address as host:port; empty approves payments locally
+PAYMENT_GATEWAY = os.environ.get("SHOP_PAYMENT_GATEWAY", "")
+
+# Seconds allowed for each payment gateway request
+PAYMENT_GATEWAY_TIMEOUT = float(os.environ.get("SHOP_PAYMENT_GATEWAY_TIMEOUT", "2.0"))
+
+# Pooled connections to the payment gateway
+PAYMENT_GATEWAY_POOL_SIZE = int(os.environ.get("SHOP_PAYMENT_GATEWAY_POOL_SIZE", "8"))
+
+# File keeping the ID allocators' high-water marks; empty keeps them in memory
+ID_STATE_PATH = os.environ.get("SHOP_ID_STATE_PATH", "")
+
+# IDs each worker thread reserves at a time
+ID_BLOCK_SIZE = int(os.environ.get("SHOP_ID_BLOCK_SIZE", "64"))
+
+# Where stock levels live: "local" (in each process) or "shared" (shared memory for worker processes)
+INVENTORY_MODE = os.environ.get("SHOP_INVENTORY", "local")
+
+# Shared memory block holding the stock counters in "shared" mode
+INVENTORY_SHARED_NAME = os.environ.get("SHOP_INVENTORY_SHARED_NAME", "shop_inventory")
+
+# Product slots in the shared memory block
+INVENTORY_SHARED_SLOTS = int(os.environ.get("SHOP_INVENTORY_SHARED_SLOTS", "65536"))
+
+# Snapshot file the in-memory stores are saved to and restored from; empty disables snapshots
+SNAPSHOT_PATH = os.environ.get("SHOP_SNAPSHOT", "")
+
+# Seconds between background snapshots
+SNAPSHOT_INTERVAL = float(os.environ.get("SHOP_SNAPSHOT_INTERVAL", "60"))
+
+# Seconds a cart may go untouched before it is evicted from memory
+CART_IDLE_TTL = float(os.environ.get("SHOP_CART_IDLE_TTL", "7200"))
+
+# Seconds between background sweeps for idle carts
+CART_REAP_INTERVAL = float(os.environ.get("SHOP_CART_REAP_INTERVAL", "30"))
+
+# SQLite file evicted carts are kept in until their users return; empty discards them,
+# which with the SQLite storage backend deletes their stored rows as well
+CART_SPILL_PATH = os.environ.get("SHOP_CART_SPILL", "")
+
+# Hours of hourly and days of daily sales totals kept for the sales dashboard
+ANALYTICS_HOURLY_BUCKETS = int(os.environ.get("SHOP_ANALYTICS_HOURS", "48"))
+ANALYTICS_DAILY_BUCKETS = int(os.environ.get("SHOP_ANALYTICS_DAYS", "90"))
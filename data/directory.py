@@ -0,0 +1,73 @@
+"""
+Account directory with indexed username and email lookups
+"""
+
+from typing import Dict, Optional
+from data.repository import Repository
+
+
+class AccountDirectory:
+    """Indexes active accounts by case-normalized username and email"""
+
+    def __init__(self, accounts: Repository, id_attribute: str):
+        self.__accounts = accounts
+        self.__id_attribute = id_attribute
+        self.__by_username: Dict[str, object] = {}
+        self.__by_email: Dict[str, object] = {}
+
+        for account in accounts.values():
+            if account.is_active():
+                self.__index(account)
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        """Normalize a username or email for case-insensitive lookups"""
+        return value.strip().casefold()
+
+    def __index(self, account):
+        self.__by_username[self.normalize(account.username)] = account
+        if account.email:
+            self.__by_email[self.normalize(account.email)] = account
+
+    def __unindex(self, account):
+        username_key = self.normalize(account.username)
+        if self.__by_username.get(username_key) is account:
+            del self.__by_username[username_key]
+        if account.email:
+            email_key = self.normalize(account.email)
+            if self.__by_email.get(email_key) is account:
+                del self.__by_email[email_key]
+
+    def add(self, account):
+        """Add account to the backing store and the lookup indexes"""
+        if self.normalize(account.username) in self.__by_username:
+            raise ValueError(f"Username {account.username} is already taken")
+        if account.email and self.normalize(account.email) in self.__by_email:
+            raise ValueError(f"Email {account.email} is already registered")
+
+        self.__accounts[getattr(account, self.__id_attribute)] = account
+        if account.is_active():
+            self.__index(account)
+
+    def deactivate(self, account_id: str):
+        """Deactivate account and drop it from the lookup indexes"""
+        account = self.__accounts.get(account_id)
+        if account is None:
+            raise KeyError(f"Account with ID {account_id} not found")
+        account.deactivate()
+        self.__accounts.mark_dirty(account_id)
+        self.__unindex(account)
+
+    def find_by_username(self, username: str) -> Optional[object]:
+        """Get active account by username (case-insensitive)"""
+        return self.__by_username.get(self.normalize(username))
+
+    def find_by_email(self, email: str) -> Optional[object]:
+        """Get active account by email (case-insensitive)"""
+        return self.__by_email.get(self.normalize(email))
+
+    def __len__(self) -> int:
+        return len(self.__by_username)
+
+    def __str__(self) -> str:
+        return f"AccountDirectory(accounts={len(self.__by_username)})"
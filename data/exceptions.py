@@ -29,4 +29,14 @@ class CartError(Exception):
 
 class PaymentError(Exception):
     """Raised for payment-related errors"""
+    pass
+
+
+class JournalError(Exception):
+    """Raised when a journal record could not be made durable"""
+    pass
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is unreadable or corrupt"""
     pass
\ No newline at end of file
@@ -0,0 +1,377 @@
+"""
+Payment gateway client with pooling, batching, retries and a circuit breaker
+"""
+
+import itertools
+import json
+import random
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional, Tuple
+
+from data.exceptions import PaymentError
+
+MAX_RESPONSE_SIZE = 1 << 20
+
+
+class GatewayUnavailableError(Exception):
+    """Transient gateway failure that may succeed on retry"""
+    pass
+
+
+class GatewayNoAnswerError(GatewayUnavailableError):
+    """Request sent but not answered; the gateway may have processed it"""
+    pass
+
+
+class PaymentDeclinedError(PaymentError):
+    """The gateway answered and did not approve the charge"""
+    pass
+
+
+class GatewayTimeoutError(PaymentError):
+    """The gateway did not answer in time; the charge may still have gone through"""
+
+    def __init__(self, message: str, transaction_id: Optional[str] = None):
+        super().__init__(message)
+        # Set once the payment has a journal record the charge can be settled against
+        self.transaction_id = transaction_id
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing gateway for a while
+
+    After failure_threshold consecutive failures the breaker opens and
+    calls fail fast. Once reset_timeout has passed one trial call is let
+    through; its success closes the breaker, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.__failure_threshold = failure_threshold
+        self.__reset_timeout = reset_timeout
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__state = self.CLOSED
+        self.__failures = 0
+        self.__opened_at = 0.0
+        self.__trips = 0
+
+    @property
+    def state(self) -> str:
+        return self.__state
+
+    @property
+    def trips(self) -> int:
+        """Number of times the breaker has opened"""
+        return self.__trips
+
+    def is_open(self) -> bool:
+        """Check if calls are currently refused"""
+        return (self.__state == self.OPEN
+                and self.__clock() - self.__opened_at < self.__reset_timeout)
+
+    def allow(self) -> bool:
+        """Ask to make a call; False means fail fast"""
+        with self.__lock:
+            if self.__state == self.CLOSED:
+                return True
+            if self.__state == self.OPEN and self.__clock() - self.__opened_at >= self.__reset_timeout:
+                self.__state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self.__lock:
+            self.__state = self.CLOSED
+            self.__failures = 0
+
+    def record_failure(self):
+        with self.__lock:
+            self.__failures += 1
+            if self.__state == self.HALF_OPEN or (
+                    self.__state == self.CLOSED and self.__failures >= self.__failure_threshold):
+                self.__state = self.OPEN
+                self.__opened_at = self.__clock()
+                self.__trips += 1
+
+
+class _Connection:
+    """One persistent connection speaking the gateway's JSON line protocol"""
+
+    def __init__(self, address: Tuple[str, int], timeout: float):
+        self.__socket = socket.create_connection(address, timeout=timeout)
+        self.__socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.__reader = self.__socket.makefile("rb")
+        self.__request_ids = itertools.count(1)
+
+    def call(self, charges: List[Dict]) -> Dict:
+        """Send one request and wait for its response (bounded by the socket timeout)"""
+        request_id = next(self.__request_ids)
+        payload = json.dumps({"id": request_id, "charges": charges}, separators=(",", ":"))
+        self.__socket.sendall(payload.encode("utf-8") + b"\n")
+        try:
+            line = self.__reader.readline(MAX_RESPONSE_SIZE)
+            if not line.endswith(b"\n"):
+                raise ConnectionError("Gateway closed the connection")
+            response = json.loads(line)
+        except (OSError, ValueError) as e:
+            raise GatewayNoAnswerError(str(e) or type(e).__name__)
+        if not isinstance(response, dict) or response.get("id") != request_id:
+            raise GatewayNoAnswerError("Gateway response out of sequence")
+        return response
+
+    def close(self):
+        try:
+            self.__reader.close()
+            self.__socket.close()
+        except OSError:
+            pass
+
+
+class ConnectionPool:
+    """Reuses up to size idle gateway connections"""
+
+    def __init__(self, address: Tuple[str, int], size: int, timeout: float):
+        self.__address = address
+        self.__size = size
+        self.__timeout = timeout
+        self.__lock = threading.Lock()
+        self.__idle: List[_Connection] = []
+        self.__opened = 0
+
+    @property
+    def opened(self) -> int:
+        """Connections opened so far"""
+        return self.__opened
+
+    def call(self, charges: List[Dict]) -> Dict:
+        """Send charges on a pooled connection; broken connections are discarded"""
+        with self.__lock:
+            connection = self.__idle.pop() if self.__idle else None
+        if connection is None:
+            connection = _Connection(self.__address, self.__timeout)
+            with self.__lock:
+                self.__opened += 1
+        try:
+            response = connection.call(charges)
+        except BaseException:
+            connection.close()
+            raise
+        with self.__lock:
+            if len(self.__idle) < self.__size:
+                self.__idle.append(connection)
+                connection = None
+        if connection is not None:
+            connection.close()
+        return response
+
+    def close(self):
+        with self.__lock:
+            idle, self.__idle = self.__idle, []
+        for connection in idle:
+            connection.close()
+
+
+class GatewayClient:
+    """
+    Thread-safe client for charging payments through the gateway
+
+    Concurrent charge() calls are queued and sent in batches of up to
+    batch_size, at most pool_size requests at a time, so batches grow
+    by themselves while the gateway is slow. Each request is bounded by
+    timeout; transient failures are retried with exponential backoff
+    and full jitter, and a circuit breaker makes calls fail fast while
+    the gateway keeps failing. A charge waits at most charge_timeout in
+    total, time spent queued included.
+    """
+
+    def __init__(self, host: str, port: int, pool_size: int = 8, timeout: float = 2.0,
+                 retries: int = 3, backoff: float = 0.05, batch_size: int = 32,
+                 batch_wait: float = 0.0, breaker: Optional[CircuitBreaker] = None,
+                 charge_timeout: Optional[float] = None):
+        """
+        Args:
+            host: Gateway host
+            port: Gateway port
+            pool_size: Connections, and so requests in flight, at most
+            timeout: Seconds allowed for connecting and for each request
+            retries: Extra attempts after a transient failure
+            backoff: Base delay in seconds between attempts
+            batch_size: Most charges sent in one request
+            batch_wait: Seconds to wait for a batch to fill when the gateway is idle
+            breaker: Circuit breaker (a default one if omitted)
+            charge_timeout: Seconds a charge() call waits in total (by default
+                enough for every attempt to time out, plus the backoff between them)
+        """
+        self.__pool = ConnectionPool((host, port), pool_size, timeout)
+        self.__retries = retries
+        self.__backoff = backoff
+        self.__batch_size = batch_size
+        self.__batch_wait = batch_wait
+        self.__breaker = breaker if breaker is not None else CircuitBreaker()
+        if charge_timeout is None:
+            charge_timeout = timeout * (retries + 1) + backoff * (2 ** (retries + 1) - 2)
+        self.__charge_timeout = charge_timeout
+        self.__condition = threading.Condition()
+        self.__pending: List[Tuple[Dict, Future]] = []
+        self.__closed = False
+        self.__slots = threading.Semaphore(pool_size)
+        self.__senders = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="gateway")
+        self.__stats = {"charges": 0, "batches": 0, "retries": 0, "failed_batches": 0}
+        self.__dispatcher = threading.Thread(target=self.__dispatch_loop,
+                                             name="gateway-dispatcher", daemon=True)
+        self.__dispatcher.start()
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self.__breaker
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of charges, batches, retries, failures and connections"""
+        with self.__condition:
+            stats = dict(self.__stats)
+        stats["connections_opened"] = self.__pool.opened
+        stats["breaker_trips"] = self.__breaker.trips
+        return stats
+
+    def charge(self, key: str, amount: float, payment_method: str, user_id: str) -> str:
+        """
+        Charge a payment and wait for the gateway's answer
+
+        Args:
+            key: Idempotency key; retries with the same key charge only once
+            amount: Amount to charge
+            payment_method: Payment method
+            user_id: Paying user
+
+        Returns:
+            Gateway reference of the approved charge
+
+        Raises:
+            GatewayTimeoutError: If the charge was sent but not answered, within
+                charge_timeout or at all
+            PaymentDeclinedError: If the gateway declined the charge
+            PaymentError: If the gateway is unavailable and the charge was not sent
+        """
+        if self.__breaker.is_open():
+            raise PaymentError("Payment gateway unavailable, please try again later")
+
+        deadline = time.monotonic() + self.__charge_timeout
+        future: Future = Future()
+        charge = {"key": key, "amount": amount, "payment_method": payment_method, "user_id": user_id}
+        with self.__condition:
+            if self.__closed:
+                raise PaymentError("Payment gateway client is closed")
+            self.__pending.append((charge, future))
+            self.__condition.notify()
+
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            with self.__condition:
+                queued = next((i for i, (_, waiting) in enumerate(self.__pending)
+                               if waiting is future), None)
+                if queued is not None:
+                    del self.__pending[queued]
+            if queued is not None:
+                raise PaymentError("Payment gateway busy, please try again later")
+            raise GatewayTimeoutError("Payment gateway did not answer in time")
+        if result.get("status") != "APPROVED":
+            raise PaymentDeclinedError("Payment declined by the gateway")
+        return result["reference"]
+
+    def __dispatch_loop(self):
+        while True:
+            # Only form a batch once a connection is free to send it
+            self.__slots.acquire()
+            with self.__condition:
+                while not self.__pending and not self.__closed:
+                    self.__condition.wait()
+                if not self.__pending:
+                    self.__slots.release()
+                    return
+                if self.__batch_wait > 0:
+                    deadline = time.monotonic() + self.__batch_wait
+                    while len(self.__pending) < self.__batch_size and not self.__closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self.__condition.wait(remaining)
+                batch = self.__pending[:self.__batch_size]
+                del self.__pending[:self.__batch_size]
+                self.__stats["charges"] += len(batch)
+                self.__stats["batches"] += 1
+            self.__senders.submit(self.__send_batch, batch)
+
+    def __send_batch(self, batch: List[Tuple[Dict, Future]]):
+        try:
+            results = self.__call_with_retries([charge for charge, _ in batch])
+        except PaymentError as e:
+            with self.__condition:
+                self.__stats["failed_batches"] += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(PaymentError(f"Payment gateway error: {e}"))
+            raise
+        finally:
+            self.__slots.release()
+
+        for charge, future in batch:
+            result = results.get(charge["key"])
+            if result is None:
+                future.set_exception(PaymentError("Payment gateway returned no result"))
+            else:
+                future.set_result(result)
+
+    def __call_with_retries(self, charges: List[Dict]) -> Dict[str, Dict]:
+        attempt = 0
+        # Whether an attempt may have reached the gateway; retries reuse the
+        # idempotency keys, so only giving up leaves the charges in doubt
+        sent = False
+        while True:
+            if not self.__breaker.allow():
+                raise self.__failure("Payment gateway unavailable, please try again later", sent)
+            try:
+                response = self.__pool.call(charges)
+                if "error" in response:
+                    raise GatewayUnavailableError(response["error"])
+                sent = True
+                self.__breaker.record_success()
+                return {result["key"]: result for result in response["results"]}
+            except (OSError, ValueError, KeyError, TypeError, GatewayUnavailableError) as e:
+                sent = sent or isinstance(e, GatewayNoAnswerError)
+                self.__breaker.record_failure()
+                attempt += 1
+                if attempt > self.__retries:
+                    raise self.__failure(f"Payment gateway error: {str(e) or type(e).__name__}", sent)
+                with self.__condition:
+                    self.__stats["retries"] += 1
+                # Exponential backoff with full jitter spreads out retry storms
+                time.sleep(random.uniform(0, self.__backoff * (2 ** attempt)))
+
+    @staticmethod
+    def __failure(message: str, sent: bool) -> PaymentError:
+        """Error for charges given up on; in doubt if a request may have gone through"""
+        if sent:
+            return GatewayTimeoutError(f"{message} (the charge may have gone through)")
+        return PaymentError(message)
+
+    def close(self):
+        """Send queued charges, then stop the client and close its connections"""
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+        self.__dispatcher.join()
+        self.__senders.shutdown(wait=True)
+        self.__pool.close()
@@ -0,0 +1,166 @@
+"""
+Local stand-in for the payment gateway with configurable latency and faults
+
+The gateway speaks newline-delimited JSON over TCP. Each request carries
+a batch of charges and is answered in order on the same connection:
+
+    {"id": 7, "charges": [{"key": "...", "amount": 10.0, "payment_method": "UPI", "user_id": "user1"}]}
+    {"id": 7, "results": [{"key": "...", "status": "APPROVED", "reference": "..."}]}
+
+or, for a busy or failing gateway, {"id": 7, "error": "..."}. Results
+are remembered per idempotency key, so a retried charge is never
+approved twice.
+
+Run from the project root:
+    python -m data.gateway_simulator --port 8765 --latency 50 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import uuid
+from typing import Dict, Optional, Tuple
+
+MAX_LINE_SIZE = 1 << 20
+
+
+class GatewaySimulator:
+    """Simulated payment gateway served with asyncio"""
+
+    def __init__(self, latency: float = 0.05, per_charge_latency: float = 0.0005,
+                 error_rate: float = 0.0, decline_rate: float = 0.0,
+                 stall_rate: float = 0.0, stall_seconds: float = 5.0,
+                 max_concurrency: int = 32, seed: Optional[int] = None):
+        """
+        Args:
+            latency: Mean seconds to answer one request
+            per_charge_latency: Extra seconds per charge in a batch
+            error_rate: Probability a request fails with a transient error
+            decline_rate: Probability a charge is declined
+            stall_rate: Probability a request hangs for stall_seconds
+            stall_seconds: How long a stalled request hangs
+            max_concurrency: Requests processed at once; more are refused as busy
+            seed: Random seed for reproducible runs (optional)
+        """
+        self.__latency = latency
+        self.__per_charge_latency = per_charge_latency
+        self.__error_rate = error_rate
+        self.__decline_rate = decline_rate
+        self.__stall_rate = stall_rate
+        self.__stall_seconds = stall_seconds
+        self.__max_concurrency = max_concurrency
+        self.__rng = random.Random(seed)
+        self.__in_flight = 0
+        self.__results: Dict[str, Dict] = {}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests from one client connection until it closes"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    response = await self.__process(request)
+                except (ValueError, KeyError, TypeError):
+                    response = {"id": None, "error": "bad request"}
+                writer.write(json.dumps(response, separators=(",", ":")).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def __process(self, request: Dict) -> Dict:
+        request_id = request["id"]
+        charges = request["charges"]
+        if self.__in_flight >= self.__max_concurrency:
+            return {"id": request_id, "error": "busy"}
+
+        self.__in_flight += 1
+        try:
+            if self.__rng.random() < self.__stall_rate:
+                await asyncio.sleep(self.__stall_seconds)
+            delay = self.__rng.uniform(0.5, 1.5) * self.__latency
+            await asyncio.sleep(delay + self.__per_charge_latency * len(charges))
+            if self.__rng.random() < self.__error_rate:
+                return {"id": request_id, "error": "internal error"}
+            return {"id": request_id, "results": [self.__charge(charge) for charge in charges]}
+        finally:
+            self.__in_flight -= 1
+
+    def __charge(self, charge: Dict) -> Dict:
+        key = str(charge["key"])
+        result = self.__results.get(key)
+        if result is None:
+            if float(charge["amount"]) <= 0 or self.__rng.random() < self.__decline_rate:
+                status = "DECLINED"
+            else:
+                status = "APPROVED"
+            result = {"key": key, "status": status, "reference": uuid.uuid4().hex}
+            self.__results[key] = result
+        return result
+
+    async def serve(self, host: str, port: int):
+        """Listen on host:port until cancelled"""
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE_SIZE)
+        bound_host, bound_port = server.sockets[0].getsockname()[:2]
+        print(f"Payment gateway simulator listening on {bound_host}:{bound_port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def start_simulator(*options: str) -> Tuple[subprocess.Popen, Tuple[str, int]]:
+    """
+    Run the simulator in a child process on a free local port
+
+    Args:
+        options: Extra command line options, e.g. "--latency", "20"
+
+    Returns:
+        (process, (host, port)); terminate the process when done
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "data.gateway_simulator", "--port", "0", *options],
+        stdout=subprocess.PIPE, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    line = process.stdout.readline().strip()
+    if not line:
+        process.kill()
+        raise RuntimeError("Payment gateway simulator failed to start")
+    host, _, port = line.rpartition(" ")[2].rpartition(":")
+    return process, (host, int(port))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local payment gateway simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--latency", type=float, default=50.0, help="mean request latency in ms")
+    parser.add_argument("--per-charge-latency", type=float, default=0.5,
+                        help="extra latency per charge in a batch, in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--decline-rate", type=float, default=0.0)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-seconds", type=float, default=5.0)
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    simulator = GatewaySimulator(args.latency / 1000, args.per_charge_latency / 1000,
+                                 args.error_rate, args.decline_rate, args.stall_rate,
+                                 args.stall_seconds, args.max_concurrency, args.seed)
+    try:
+        asyncio.run(simulator.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Collision-free ID allocation for products, categories and other records
+
+Numbers are handed out in blocks reserved from a shared high-water mark.
+Each thread draws IDs from its own block without locking; only reserving
+the next block takes a lock, and when the mark is kept in a file a file
+lock as well, so several processes can allocate from the same sequence.
+A reserved block is recorded before any of its IDs are used, so IDs are
+never reused after a restart, though unused parts of blocks leave gaps.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from data import config
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are coordinated
+    fcntl = None
+
+# Hex digits of the millisecond timestamp and sequence in time-ordered IDs
+TIMESTAMP_DIGITS = 11
+SEQUENCE_DIGITS = 8
+
+
+class HighWaterMarks:
+    """
+    Highest reserved number of each ID sequence
+
+    Kept in memory, or in a JSON file when a path is given so reserved
+    numbers survive restarts and are shared between processes.
+    """
+
+    def __init__(self, path: str = ""):
+        self.__path = path
+        self.__lock = threading.Lock()
+        self.__marks: Dict[str, int] = {}
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def reserve(self, name: str, count: int, floor: int = 0) -> int:
+        """
+        Reserve count numbers of a sequence
+
+        Args:
+            name: Sequence name
+            count: Numbers to reserve
+            floor: Highest number already in use outside the allocator
+
+        Returns:
+            First reserved number; the block ends at first + count - 1
+        """
+        with self.__lock:
+            if not self.__path:
+                first = max(self.__marks.get(name, 0), floor) + 1
+                self.__marks[name] = first + count - 1
+                return first
+            with open(self.__path + ".lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                marks = self.__read()
+                first = max(marks.get(name, 0), floor) + 1
+                marks[name] = first + count - 1
+                self.__write(marks)
+                return first
+
+    def current(self, name: str) -> int:
+        """Highest number reserved so far"""
+        with self.__lock:
+            marks = self.__read() if self.__path else self.__marks
+            return marks.get(name, 0)
+
+    def __read(self) -> Dict[str, int]:
+        try:
+            with open(self.__path, "r", encoding="utf-8") as marks_file:
+                return json.load(marks_file)
+        except FileNotFoundError:
+            return {}
+
+    def __write(self, marks: Dict[str, int]):
+        # Write a new file and swap it in so a crash never leaves half a file
+        temporary_path = self.__path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as marks_file:
+            json.dump(marks, marks_file)
+            marks_file.flush()
+            os.fsync(marks_file.fileno())
+        os.replace(temporary_path, self.__path)
+
+
+class IdAllocator:
+    """
+    Allocates unique IDs made of a prefix and a number
+
+    Plain IDs look like "prod42". Time-ordered IDs put a millisecond
+    timestamp before the number ("ord" + 11 + 8 hex digits), so they sort
+    by creation time across workers.
+    """
+
+    def __init__(self, prefix: str, marks: HighWaterMarks, block_size: int = 64,
+                 existing: Optional[Callable[[], Iterable[str]]] = None,
+                 time_ordered: bool = False, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            prefix: Text before the number, also the sequence name
+            marks: Shared high-water marks
+            block_size: Numbers each thread reserves at a time
+            existing: Returns IDs already in use, checked once before the first reservation
+            time_ordered: Produce time-ordered IDs
+            clock: Time source for time-ordered IDs, in seconds
+        """
+        if block_size <= 0:
+            raise ValueError("Block size must be positive")
+        self.__prefix = prefix
+        self.__marks = marks
+        self.__block_size = block_size
+        self.__existing = existing
+        self.__time_ordered = time_ordered
+        self.__clock = clock
+        self.__floor_lock = threading.Lock()
+        self.__floor: Optional[int] = None
+        self.__local = threading.local()
+
+    @property
+    def prefix(self) -> str:
+        return self.__prefix
+
+    @property
+    def time_ordered(self) -> bool:
+        return self.__time_ordered
+
+    def next_id(self) -> str:
+        """Allocate one ID from this thread's block"""
+        local = self.__local
+        number = getattr(local, "next", 0)
+        if number >= getattr(local, "end", 0):
+            number = self.__reserve(self.__block_size)
+            local.end = number + self.__block_size
+        local.next = number + 1
+        return self.__format(number)
+
+    def next_ids(self, count: int) -> List[str]:
+        """Allocate count IDs at once from a block of their own"""
+        if count <= 0:
+            return []
+        first = self.__reserve(count)
+        return [self.__format(number) for number in range(first, first + count)]
+
+    def __reserve(self, count: int) -> int:
+        return self.__marks.reserve(self.__prefix, count, self.__existing_floor())
+
+    def __existing_floor(self) -> int:
+        """Highest number among the IDs already in use"""
+        if self.__floor is None:
+            with self.__floor_lock:
+                if self.__floor is None:
+                    floor = 0
+                    if self.__existing is not None:
+                        for existing_id in self.__existing():
+                            floor = max(floor, self.number_of(existing_id))
+                    self.__floor = floor
+        return self.__floor
+
+    def number_of(self, existing_id: str) -> int:
+        """Sequence number of an ID from this allocator; 0 for any other ID"""
+        if not existing_id.startswith(self.__prefix):
+            return 0
+        digits = existing_id[len(self.__prefix):]
+        try:
+            if self.__time_ordered:
+                return int(digits[TIMESTAMP_DIGITS:], 16) if len(digits) > TIMESTAMP_DIGITS else 0
+            return int(digits) if digits.isdigit() else 0
+        except ValueError:
+            return 0
+
+    def __format(self, number: int) -> str:
+        if not self.__time_ordered:
+            return f"{self.__prefix}{number}"
+        # Never step back in time within a thread, even if the clock does
+        local = self.__local
+        millis = max(int(self.__clock() * 1000), getattr(local, "last_millis", 0))
+        local.last_millis = millis
+        return f"{self.__prefix}{millis:0{TIMESTAMP_DIGITS}x}{number:0{SEQUENCE_DIGITS}x}"
+
+
+# High-water marks of every ID sequence
+id_marks = HighWaterMarks(config.ID_STATE_PATH)
+
+
+def create_allocator(prefix: str, existing: Optional[Callable[[], Iterable[str]]] = None,
+                     time_ordered: bool = False) -> IdAllocator:
+    """Create an allocator drawing from the configured high-water marks"""
+    return IdAllocator(prefix, id_marks, config.ID_BLOCK_SIZE, existing, time_ordered)
@@ -0,0 +1,162 @@
+"""
+Latency and error instrumentation for user and admin functions
+"""
+
+import functools
+import threading
+import time
+from typing import Callable, Dict, List
+
+from data import config
+
+# Code flag of "async def" functions (inspect.CO_COROUTINE, without importing inspect)
+CO_COROUTINE = 0x80
+
+# Latency histogram buckets: bucket i counts calls taking < 2**i microseconds
+HISTOGRAM_BUCKETS = 26  # 1us .. ~33s, slower calls land in the last bucket
+
+
+class FunctionStats:
+    """Call count, errors and latency histogram of one function"""
+
+    __slots__ = ("lock", "calls", "errors", "buckets", "total_seconds")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors: Dict[str, int] = {}
+        self.buckets: List[int] = [0] * HISTOGRAM_BUCKETS
+        self.total_seconds = 0.0
+
+    def record(self, seconds: float, error_class: str = None):
+        bucket = min(int(seconds * 1_000_000).bit_length(), HISTOGRAM_BUCKETS - 1)
+        with self.lock:
+            self.calls += 1
+            self.total_seconds += seconds
+            self.buckets[bucket] += 1
+            if error_class is not None:
+                self.errors[error_class] = self.errors.get(error_class, 0) + 1
+
+
+class Instrumentation:
+    """Registry of per-function statistics"""
+
+    def __init__(self, enabled: bool = False):
+        self.__enabled = enabled
+        self.__stats: Dict[str, FunctionStats] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    def enable(self):
+        self.__enabled = True
+
+    def disable(self):
+        self.__enabled = False
+
+    def reset(self):
+        """Drop all recorded statistics"""
+        self.__stats = {}
+
+    def __stats_for(self, name: str) -> FunctionStats:
+        stats = self.__stats.get(name)
+        if stats is None:
+            stats = self.__stats.setdefault(name, FunctionStats())
+        return stats
+
+    def instrument(self, func: Callable) -> Callable:
+        """Decorator recording calls, errors and latency of func while enabled"""
+        name = func.__name__
+        code = getattr(func, "__code__", None)
+
+        if code is not None and code.co_flags & CO_COROUTINE:
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not self.__enabled:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    self.__stats_for(name).record(time.perf_counter() - start, type(e).__name__)
+                    raise
+                self.__stats_for(name).record(time.perf_counter() - start)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.__enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self.__stats_for(name).record(time.perf_counter() - start, type(e).__name__)
+                raise
+            self.__stats_for(name).record(time.perf_counter() - start)
+            return result
+
+        return wrapper
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Get a consistent copy of the statistics of every function"""
+        snapshot = {}
+        for name, stats in sorted(self.__stats.items()):
+            with stats.lock:
+                snapshot[name] = {
+                    "calls": stats.calls,
+                    "errors": dict(stats.errors),
+                    "buckets": list(stats.buckets),
+                    "total_seconds": stats.total_seconds,
+                }
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        """Render the statistics in Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP shop_function_calls_total Calls per function",
+            "# TYPE shop_function_calls_total counter",
+        ]
+        for name, stats in snapshot.items():
+            lines.append(f'shop_function_calls_total{{function="{name}"}} {stats["calls"]}')
+
+        lines += [
+            "# HELP shop_function_errors_total Failed calls per function and exception class",
+            "# TYPE shop_function_errors_total counter",
+        ]
+        for name, stats in snapshot.items():
+            for error_class, count in sorted(stats["errors"].items()):
+                lines.append(f'shop_function_errors_total{{function="{name}",'
+                             f'exception="{error_class}"}} {count}')
+
+        lines += [
+            "# HELP shop_function_latency_seconds Function latency",
+            "# TYPE shop_function_latency_seconds histogram",
+        ]
+        for name, stats in snapshot.items():
+            cumulative = 0
+            for bucket, count in enumerate(stats["buckets"][:-1]):
+                cumulative += count
+                upper_bound = (1 << bucket) / 1_000_000
+                lines.append(f'shop_function_latency_seconds_bucket{{function="{name}",'
+                             f'le="{upper_bound:g}"}} {cumulative}')
+            lines.append(f'shop_function_latency_seconds_bucket{{function="{name}",'
+                         f'le="+Inf"}} {stats["calls"]}')
+            lines.append(f'shop_function_latency_seconds_sum{{function="{name}"}} '
+                         f'{stats["total_seconds"]:.9f}')
+            lines.append(f'shop_function_latency_seconds_count{{function="{name}"}} {stats["calls"]}')
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path: str):
+        """Write the statistics to path in Prometheus text format"""
+        with open(path, "w") as metrics_file:
+            metrics_file.write(self.to_prometheus())
+
+
+# Global instrumentation registry
+metrics = Instrumentation(enabled=config.INSTRUMENTATION_ENABLED)
+instrumented = metrics.instrument
@@ -0,0 +1,155 @@
+"""
+Inventory engine with per-product locking for concurrent checkouts
+
+The locks order threads of one process. With shared stock counters,
+other worker processes can still take stock between the availability
+check and the reduction, so every step that fails part-way gives back
+what it already took.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from data.exceptions import CartError
+from data.products import validate_stock
+
+
+class Reservation:
+    """Stock taken for one checkout, pending commit or rollback"""
+
+    def __init__(self, engine: "InventoryEngine", lines: List[Tuple[object, int]]):
+        self.__engine = engine
+        self.__lines = lines
+        self.__settled = False
+
+    @property
+    def lines(self) -> List[Tuple[object, int]]:
+        return list(self.__lines)
+
+    def commit(self):
+        """Make the stock reduction final"""
+        if self.__settled:
+            raise CartError("Reservation already settled")
+        self.__settled = True
+
+    def rollback(self):
+        """Return reserved stock to the products"""
+        if self.__settled:
+            raise CartError("Reservation already settled")
+        self.__settled = True
+        self.__engine.release(self.__lines)
+
+
+class InventoryEngine:
+    """Reserves stock for several products atomically"""
+
+    def __init__(self):
+        self.__locks: Dict[str, threading.Lock] = {}
+
+    def __lock_for(self, product_id: str) -> threading.Lock:
+        lock = self.__locks.get(product_id)
+        if lock is None:
+            # setdefault is atomic, so racing threads agree on one lock
+            lock = self.__locks.setdefault(product_id, threading.Lock())
+        return lock
+
+    def __acquire(self, product_ids: Iterable[str]) -> List[threading.Lock]:
+        # Always lock in product ID order so two checkouts cannot deadlock
+        locks = [self.__lock_for(product_id) for product_id in sorted(set(product_ids))]
+        for lock in locks:
+            lock.acquire()
+        return locks
+
+    @staticmethod
+    def __release_locks(locks: List[threading.Lock]):
+        for lock in reversed(locks):
+            lock.release()
+
+    def reserve(self, lines: Iterable[Tuple[object, int]]) -> Reservation:
+        """
+        Take stock for every (product, quantity) line or for none of them
+
+        Raises:
+            CartError: If any product is not available in the required quantity
+        """
+        lines = list(lines)
+        locks = self.__acquire(product.product_id for product, _ in lines)
+        try:
+            for product, quantity in lines:
+                if not product.is_available(quantity):
+                    raise CartError(f"Product {product.name} is not available in required quantity")
+            taken = []
+            try:
+                for product, quantity in lines:
+                    product.reduce_stock(quantity)
+                    taken.append((product, quantity))
+            except ValueError:
+                for product, quantity in taken:
+                    product.increase_stock(quantity)
+                raise CartError(f"Product {product.name} is not available in required quantity")
+        finally:
+            self.__release_locks(locks)
+        return Reservation(self, lines)
+
+    def release(self, lines: Iterable[Tuple[object, int]]):
+        """Return stock for every (product, quantity) line"""
+        lines = list(lines)
+        locks = self.__acquire(product.product_id for product, _ in lines)
+        try:
+            for product, quantity in lines:
+                product.increase_stock(quantity)
+        finally:
+            self.__release_locks(locks)
+
+    def set_stock(self, product, level: int):
+        """
+        Set product's stock level, ordered with concurrent reservations
+
+        Raises:
+            ValueError: If level is negative
+        """
+        locks = self.__acquire([product.product_id])
+        try:
+            product.stock = level
+        finally:
+            self.__release_locks(locks)
+
+    def adjust_stock(self, lines: Iterable[Tuple[object, int]]):
+        """
+        Add a (possibly negative) delta to the stock of every product or to none
+
+        Raises:
+            ValueError: If any resulting stock level would be negative
+        """
+        lines = list(lines)
+        locks = self.__acquire(product.product_id for product, _ in lines)
+        try:
+            new_levels = [product.stock + delta for product, delta in lines]
+            if new_levels:
+                validate_stock(min(new_levels))
+            applied = []
+            try:
+                # Apply deltas rather than levels so concurrent sales by other processes are kept
+                for product, delta in lines:
+                    if delta < 0:
+                        product.reduce_stock(-delta)
+                    elif delta > 0:
+                        product.increase_stock(delta)
+                    applied.append((product, delta))
+            except ValueError:
+                for product, delta in applied:
+                    if delta < 0:
+                        product.increase_stock(-delta)
+                    elif delta > 0:
+                        product.reduce_stock(delta)
+                raise ValueError("Stock cannot be negative")
+        finally:
+            self.__release_locks(locks)
+
+    def reserve_cart(self, cart) -> Reservation:
+        """Reserve stock for every item in cart"""
+        return self.reserve((item.product, item.quantity) for item in cart.get_items())
+
+
+# Global inventory engine
+inventory = InventoryEngine()
@@ -0,0 +1,164 @@
+"""
+Append-only transaction journal with checksummed records and group commit
+"""
+
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Iterator, List, Tuple
+from data.exceptions import JournalError
+
+# Each record is framed as <payload length, CRC-32 of payload> + JSON payload
+RECORD_HEADER = struct.Struct("<II")
+MAX_RECORD_SIZE = 1 << 20
+
+
+class TransactionJournal:
+    """
+    Durable log of payment records
+
+    Appending threads share fsyncs: the first waiting thread writes and
+    syncs everything buffered so far while the others wait for it, so
+    one fsync covers every record that arrived during the previous one.
+    """
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__condition = threading.Condition()
+        self.__buffer: List[bytes] = []
+        self.__appended = 0      # sequence number of the last buffered record
+        self.__durable = 0       # sequence number of the last settled record
+        self.__syncing = False
+        # [first, last, error, appenders not told yet] of each failed batch still being reported
+        self.__failures: List[List] = []
+        self.__sync_count = 0
+        self.__size = self.__recover()
+        self.__file = open(path, "ab")
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def sync_count(self) -> int:
+        return self.__sync_count
+
+    def __recover(self) -> int:
+        """Return the length of the valid prefix, truncating a torn tail"""
+        if not os.path.exists(self.__path):
+            return 0
+        valid = 0
+        for end, _ in self.__scan():
+            valid = end
+        if valid != os.path.getsize(self.__path):
+            with open(self.__path, "r+b") as journal_file:
+                journal_file.truncate(valid)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+        return valid
+
+    def __scan(self) -> Iterator[Tuple[int, bytes]]:
+        """Yield (end offset, payload) of each intact record from the start"""
+        with open(self.__path, "rb") as journal_file:
+            offset = 0
+            while True:
+                header = journal_file.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                length, checksum = RECORD_HEADER.unpack(header)
+                if length > MAX_RECORD_SIZE:
+                    return
+                payload = journal_file.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    return
+                offset += RECORD_HEADER.size + length
+                yield offset, payload
+
+    def replay(self) -> Iterator[Dict]:
+        """Yield every durable record in append order"""
+        with self.__condition:
+            limit = self.__size
+        for end, payload in self.__scan():
+            if end > limit:
+                return
+            yield json.loads(payload)
+
+    def append(self, record: Dict):
+        """
+        Append record and return once it is on disk
+
+        Raises:
+            JournalError: If the record could not be written and synced
+        """
+        payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        if len(payload) > MAX_RECORD_SIZE:
+            raise JournalError("Journal record too large")
+        frame = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self.__condition:
+            self.__buffer.append(frame)
+            self.__appended += 1
+            sequence = self.__appended
+
+            while self.__durable < sequence:
+                if self.__syncing:
+                    self.__condition.wait()
+                else:
+                    self.__sync_buffered()
+
+            failure = self.__take_failure(sequence)
+            if failure is not None:
+                raise JournalError(f"Could not write journal: {failure}")
+
+    def __take_failure(self, sequence: int):
+        """Error of the failed batch holding sequence, dropping the batch once all its appenders are told"""
+        for position, failure in enumerate(self.__failures):
+            first, last, error, unreported = failure
+            if first <= sequence <= last:
+                if unreported == 1:
+                    del self.__failures[position]
+                else:
+                    failure[3] = unreported - 1
+                return error
+        return None
+
+    def __sync_buffered(self):
+        """Write and fsync the buffer as group leader (called with the lock held)"""
+        batch, self.__buffer = self.__buffer, []
+        first, last = self.__durable + 1, self.__appended
+        self.__syncing = True
+        self.__condition.release()
+        error = None
+        try:
+            data = b"".join(batch)
+            self.__file.write(data)
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+        except OSError as e:
+            error = e
+            # Cut off whatever part of the batch reached the file
+            try:
+                self.__file.truncate(self.__size)
+            except OSError:
+                pass
+        finally:
+            self.__condition.acquire()
+            self.__syncing = False
+
+        if error is None:
+            self.__size += len(data)
+            self.__sync_count += 1
+        else:
+            self.__failures.append([first, last, error, last - first + 1])
+        self.__durable = last
+        self.__condition.notify_all()
+
+    def close(self):
+        """Close the journal file"""
+        with self.__condition:
+            self.__file.close()
+
+    def __str__(self) -> str:
+        return f"TransactionJournal(path={self.__path}, bytes={self.__size})"
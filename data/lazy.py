@@ -0,0 +1,96 @@
+"""
+Deferred imports and on-first-use construction for a fast cold start
+
+Functions are imported when first called and indexes are built when
+first queried, so starting the application only pays for the modules
+and data structures a session actually uses.
+"""
+
+import importlib
+import threading
+from typing import Any, Callable, Iterable
+
+
+def lazy_function(module: str, name: str) -> Callable:
+    """
+    Stand-in for module.name that imports the module on its first call
+
+    Args:
+        module: Dotted module path
+        name: Function name in the module
+
+    Returns:
+        Callable forwarding all arguments to the real function
+    """
+    target = None
+
+    def call(*args, **kwargs):
+        nonlocal target
+        if target is None:
+            target = getattr(importlib.import_module(module), name)
+        return target(*args, **kwargs)
+
+    call.__name__ = name
+    call.__qualname__ = name
+    call.__doc__ = f"Calls {module}.{name}, importing it on first use"
+    return call
+
+
+def _skip_update(*args, **kwargs):
+    """Update of an index that is not built yet; the build will see it"""
+
+
+class LazyIndex:
+    """
+    Index built from the current contents of its source on first query
+
+    Updates (add, remove, move, update) before the first query are
+    skipped, since the build reads the source as it is by then. Updates
+    arriving while the build runs wait for it and are applied after, so
+    the index's own updates must be idempotent.
+    """
+
+    UPDATES = frozenset({"add", "remove", "move", "update"})
+
+    def __init__(self, build: Callable[[Iterable], Any], source: Callable[[], Iterable]):
+        """
+        Args:
+            build: Creates the index from an iterable of items
+            source: Returns the items to build from
+        """
+        self.__build = build
+        self.__source = source
+        self.__index = None
+        self.__lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self.__index is not None
+
+    def get(self) -> Any:
+        """The index, building it on the first call"""
+        index = self.__index
+        if index is None:
+            with self.__lock:
+                if self.__index is None:
+                    # Take a copy so concurrent inserts into the source cannot break the build
+                    self.__index = self.__build(list(self.__source()))
+                index = self.__index
+        return index
+
+    def __getattr__(self, name: str) -> Any:
+        index = self.__index
+        if index is None:
+            if name not in self.UPDATES:
+                return getattr(self.get(), name)
+            with self.__lock:
+                index = self.__index
+            if index is None:
+                return _skip_update
+        return getattr(index, name)
+
+    def __len__(self) -> int:
+        return len(self.get())
+
+    def __str__(self) -> str:
+        return str(self.get()) if self.built else "LazyIndex(not built)"
@@ -0,0 +1,212 @@
+"""
+Indexes over the payment ledger for user, time-range and payment-method queries
+
+Transactions are kept in time order overall, per user and per payment
+method as parallel arrays of timestamps and sequence numbers, so a
+query is a binary search plus a walk over one page of results.
+Revenue per day is summed as payments arrive.
+"""
+
+import base64
+import bisect
+import json
+import threading
+from array import array
+from datetime import date, datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+
+class TransactionPage(NamedTuple):
+    """One page of transactions, each with its transaction_id"""
+    transactions: List[Dict]
+    next_cursor: Optional[str]
+
+
+class DailyRevenue(NamedTuple):
+    """Successful payments of one day"""
+    day: date
+    transactions: int
+    revenue: float
+
+
+def encode_cursor(time: float, transaction_id: str, descending: bool) -> str:
+    raw = json.dumps({"t": time, "i": transaction_id, "d": descending},
+                     separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, descending: bool) -> Tuple[float, str]:
+    """(time, transaction ID) to resume after"""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid transaction cursor")
+    if (not isinstance(state, dict) or state.get("d") != descending
+            or not isinstance(state.get("t"), (int, float)) or not isinstance(state.get("i"), str)):
+        raise ValueError("Transaction cursor does not match this query")
+    return state["t"], state["i"]
+
+
+class _TimeOrder:
+    """Sequence numbers sorted by time, in two parallel arrays"""
+
+    __slots__ = ("times", "seqs")
+
+    def __init__(self):
+        self.times = array("d")
+        self.seqs = array("Q")
+
+    def insert(self, time: float, seq: int):
+        # Payments arrive almost in time order, so this is nearly always an append
+        if not self.times or time >= self.times[-1]:
+            self.times.append(time)
+            self.seqs.append(seq)
+        else:
+            position = bisect.bisect_right(self.times, time)
+            self.times.insert(position, time)
+            self.seqs.insert(position, seq)
+
+    def bounds(self, start: Optional[float], end: Optional[float]) -> Tuple[int, int]:
+        """Positions of the entries with start <= time < end"""
+        low = bisect.bisect_left(self.times, start) if start is not None else 0
+        high = bisect.bisect_left(self.times, end) if end is not None else len(self.times)
+        return low, high
+
+
+class LedgerIndex:
+    """Time-ordered, per-user and per-method indexes plus daily revenue of a ledger"""
+
+    def __init__(self, transactions: Iterable[Tuple[str, Dict]] = ()):
+        """
+        Args:
+            transactions: (transaction ID, transaction) pairs already in the ledger
+        """
+        self.__lock = threading.Lock()
+        self.__ids: List[str] = []
+        # Payment method of each transaction, as a code into __method_codes
+        self.__methods = bytearray()
+        self.__method_codes: Dict[str, int] = {}
+        self.__all = _TimeOrder()
+        self.__by_user: Dict[str, _TimeOrder] = {}
+        self.__by_method: Dict[str, _TimeOrder] = {}
+        self.__daily: Dict[date, List] = {}
+        for transaction_id, transaction in sorted(transactions, key=lambda item: item[1]["timestamp"]):
+            self.add(transaction_id, transaction)
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    def add(self, transaction_id: str, transaction: Dict):
+        """Index a successful transaction; one already indexed is skipped"""
+        if transaction.get("status") != "SUCCESS":
+            return
+        timestamp: datetime = transaction["timestamp"]
+        time = timestamp.timestamp()
+        with self.__lock:
+            user_order = self.__by_user.get(transaction["user_id"])
+            if user_order is not None and self.__holds(user_order, time, transaction_id):
+                return
+            seq = len(self.__ids)
+            self.__ids.append(transaction_id)
+            method_code = self.__method_codes.setdefault(transaction["payment_method"],
+                                                         len(self.__method_codes))
+            self.__methods.append(method_code)
+            self.__all.insert(time, seq)
+            if user_order is None:
+                user_order = self.__by_user[transaction["user_id"]] = _TimeOrder()
+            user_order.insert(time, seq)
+            method_order = self.__by_method.get(transaction["payment_method"])
+            if method_order is None:
+                method_order = self.__by_method[transaction["payment_method"]] = _TimeOrder()
+            method_order.insert(time, seq)
+            totals = self.__daily.get(timestamp.date())
+            if totals is None:
+                totals = self.__daily[timestamp.date()] = [0, 0.0]
+            totals[0] += 1
+            totals[1] += transaction["amount"]
+
+    def __holds(self, order: _TimeOrder, time: float, transaction_id: str) -> bool:
+        """Whether order has transaction_id at time"""
+        return any(self.__ids[order.seqs[position]] == transaction_id
+                   for position in range(bisect.bisect_left(order.times, time),
+                                         bisect.bisect_right(order.times, time)))
+
+    def query(self, user_id: Optional[str] = None, start: Optional[datetime] = None,
+              end: Optional[datetime] = None, payment_method: Optional[str] = None,
+              descending: bool = True, limit: int = DEFAULT_PAGE_SIZE,
+              after: Optional[Tuple[float, str]] = None) -> Tuple[List[str], Optional[Tuple[float, str]]]:
+        """
+        IDs of the transactions matching every given filter, in time order
+
+        Args:
+            user_id: Only this user's transactions (optional)
+            start: Earliest time, inclusive (optional)
+            end: Latest time, exclusive (optional)
+            payment_method: Only this payment method (optional)
+            descending: Newest first
+            limit: Maximum number of IDs
+            after: (time, transaction ID) to resume after, exclusive (optional)
+
+        Returns:
+            (transaction IDs, (time, ID) of the last one if more may follow, else None)
+        """
+        with self.__lock:
+            method_code = None
+            if user_id is not None:
+                # A user has few transactions, so the method is checked on each of them
+                order = self.__by_user.get(user_id)
+                if payment_method is not None:
+                    method_code = self.__method_codes.get(payment_method)
+                    if method_code is None:
+                        return [], None
+            elif payment_method is not None:
+                order = self.__by_method.get(payment_method)
+            else:
+                order = self.__all
+            if order is None:
+                return [], None
+
+            low, high = order.bounds(start.timestamp() if start is not None else None,
+                                     end.timestamp() if end is not None else None)
+            if after is not None:
+                low, high = self.__resume(order, low, high, after, descending)
+            positions = range(high - 1, low - 1, -1) if descending else range(low, high)
+
+            found: List[str] = []
+            last: Optional[Tuple[float, str]] = None
+            for position in positions:
+                seq = order.seqs[position]
+                if method_code is not None and self.__methods[seq] != method_code:
+                    continue
+                if len(found) == limit:
+                    return found, last
+                found.append(self.__ids[seq])
+                last = (order.times[position], found[-1])
+            return found, None
+
+    def __resume(self, order: _TimeOrder, low: int, high: int, after: Tuple[float, str],
+                 descending: bool) -> Tuple[int, int]:
+        """Narrow [low, high) to the entries past the (time, ID) of the previous page"""
+        time, transaction_id = after
+        first = bisect.bisect_left(order.times, time)
+        last = bisect.bisect_right(order.times, time)
+        # Entries with equal times keep their insertion order; find the previous page's last one
+        position = next((position for position in range(first, last)
+                         if self.__ids[order.seqs[position]] == transaction_id), None)
+        if descending:
+            return low, min(high, position if position is not None else first)
+        return max(low, position + 1 if position is not None else last), high
+
+    def daily_totals(self, start: Optional[date] = None,
+                     end: Optional[date] = None) -> List[DailyRevenue]:
+        """Transactions and revenue per day with start <= day <= end, oldest first"""
+        with self.__lock:
+            days = [(day, totals[0], totals[1]) for day, totals in self.__daily.items()
+                    if (start is None or day >= start) and (end is None or day <= end)]
+        return [DailyRevenue(day, count, round(revenue, 2)) for day, count, revenue in sorted(days)]
+
+    def __str__(self) -> str:
+        return f"LedgerIndex(transactions={len(self.__ids)}, users={len(self.__by_user)})"
@@ -0,0 +1,307 @@
+"""
+Ordered secondary indexes on product attributes
+"""
+
+import bisect
+import operator
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Entries per bucket of a SortedKeyList; buckets split at twice this size
+BUCKET_SIZE = 512
+# Queued moves after which the thread queuing one applies them
+MAX_PENDING_MOVES = 4096
+
+
+class _Highest:
+    """Sorts after every other value, used to bound searches from above"""
+
+    def __lt__(self, other) -> bool:
+        return False
+
+    def __gt__(self, other) -> bool:
+        return True
+
+
+_HIGHEST = _Highest()
+
+
+class SortedKeyList:
+    """
+    Sorted list of (value, product_id, product) entries
+
+    Entries are kept in small sorted buckets with a list of bucket
+    maxima on top, so an insert or removal moves at most one bucket
+    of entries and finding a position takes two binary searches.
+    """
+
+    def __init__(self, entries: Iterable[Tuple] = ()):
+        entries = sorted(entries)
+        self.__buckets: List[List[Tuple]] = [entries[start:start + BUCKET_SIZE]
+                                             for start in range(0, len(entries), BUCKET_SIZE)]
+        self.__maxes: List[Tuple] = [bucket[-1] for bucket in self.__buckets]
+        self.__length = len(entries)
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def insert(self, entry: Tuple):
+        """Add entry at its sorted position"""
+        self.__length += 1
+        if not self.__buckets:
+            self.__buckets.append([entry])
+            self.__maxes.append(entry)
+            return
+
+        position = bisect.bisect_left(self.__maxes, entry)
+        if position == len(self.__maxes):
+            position -= 1
+            bucket = self.__buckets[position]
+            bucket.append(entry)
+            self.__maxes[position] = entry
+        else:
+            bucket = self.__buckets[position]
+            bisect.insort(bucket, entry)
+
+        if len(bucket) > 2 * BUCKET_SIZE:
+            self.__buckets[position:position + 1] = [bucket[:BUCKET_SIZE], bucket[BUCKET_SIZE:]]
+            self.__maxes[position:position + 1] = [bucket[BUCKET_SIZE - 1], bucket[-1]]
+
+    def remove(self, key: Tuple) -> bool:
+        """Remove the entry starting with key (value, product_id), if present"""
+        position = bisect.bisect_left(self.__maxes, key)
+        if position == len(self.__maxes):
+            return False
+        bucket = self.__buckets[position]
+        offset = bisect.bisect_left(bucket, key)
+        if offset == len(bucket) or bucket[offset][:2] != key:
+            return False
+
+        del bucket[offset]
+        self.__length -= 1
+        if not bucket:
+            del self.__buckets[position]
+            del self.__maxes[position]
+        elif offset == len(bucket):
+            self.__maxes[position] = bucket[-1]
+        return True
+
+    def __locate(self, key: Tuple) -> Tuple[int, int]:
+        """(bucket, offset) of the first entry not less than key"""
+        position = bisect.bisect_left(self.__maxes, key)
+        if position == len(self.__maxes):
+            return position, 0
+        return position, bisect.bisect_left(self.__buckets[position], key)
+
+    def iter_from(self, key: Tuple) -> Iterator[Tuple]:
+        """Iterate entries not less than key in ascending order"""
+        position, offset = self.__locate(key)
+        buckets = self.__buckets
+        while position < len(buckets):
+            yield from buckets[position][offset:]
+            position += 1
+            offset = 0
+
+    def iter_before(self, key: Tuple) -> Iterator[Tuple]:
+        """Iterate entries less than key in descending order"""
+        position, offset = self.__locate(key)
+        buckets = self.__buckets
+        if position == len(buckets):
+            position, offset = position - 1, len(buckets[-1]) if buckets else 0
+        while position >= 0:
+            yield from reversed(buckets[position][:offset])
+            position -= 1
+            offset = len(buckets[position]) if position >= 0 else 0
+
+
+class OrderedProductIndex:
+    """
+    Active products ordered by one attribute, overall and per category
+
+    Product setters report value changes through move(), so range and
+    top-N queries never need to scan the catalog. With deferred_moves,
+    move() only queues the change without taking the index lock, and
+    the queue is applied in one batch by the next query, add or remove
+    (or once MAX_PENDING_MOVES changes are waiting). A product whose
+    changes were reported out of order is found by a scan of its
+    category and moved to its current value.
+    """
+
+    def __init__(self, attribute: str, products: Iterable = (), deferred_moves: bool = False,
+                 value_of: Optional[Callable] = None):
+        """
+        Args:
+            attribute: Name of the product attribute the index orders by
+            products: Products to index
+            deferred_moves: Queue moves instead of applying them at once
+            value_of: Computes the indexed value from a product (the
+                attribute itself by default)
+        """
+        self.__attribute = attribute
+        self.__value_of: Callable = value_of if value_of is not None else operator.attrgetter(attribute)
+        self.__lock = threading.Lock()
+        self.__moves: Optional[Deque[Tuple]] = deque() if deferred_moves else None
+
+        entries = sorted((self.__value_of(product), product.product_id, product)
+                         for product in products if product.is_active())
+        # Grouping the sorted entries keeps each category already in order
+        grouped: Dict[str, List[Tuple]] = {}
+        for entry in entries:
+            grouped.setdefault(entry[2].category_id, []).append(entry)
+        self.__all = SortedKeyList(entries)
+        self.__by_category: Dict[str, SortedKeyList] = {
+            category_id: SortedKeyList(members) for category_id, members in grouped.items()}
+
+    @property
+    def attribute(self) -> str:
+        return self.__attribute
+
+    def __len__(self) -> int:
+        return len(self.__all)
+
+    def key(self, product) -> Tuple:
+        """(value, product_id) product is ordered by, as taken by range(after=...)"""
+        return self.__value_of(product), product.product_id
+
+    def add(self, product):
+        """Index product if it is active (replaces an entry at the same value)"""
+        if not product.is_active():
+            return
+        entry = (self.__value_of(product), product.product_id, product)
+        with self.__lock:
+            self.__apply_moves()
+            self.__remove(product, entry[:2])
+            self.__all.insert(entry)
+            members = self.__by_category.get(product.category_id)
+            if members is None:
+                members = self.__by_category[product.category_id] = SortedKeyList()
+            members.insert(entry)
+
+    def remove(self, product, value=None):
+        """Drop product, indexed under value (its current value by default)"""
+        key = (self.__value_of(product) if value is None else value, product.product_id)
+        with self.__lock:
+            self.__apply_moves()
+            self.__remove(product, key)
+
+    def __remove(self, product, key: Tuple) -> bool:
+        if not self.__all.remove(key):
+            return False
+        self.__by_category[product.category_id].remove(key)
+        return True
+
+    def move(self, product, old_value):
+        """Re-position product after its value changed from old_value"""
+        new_value = self.__value_of(product)
+        if new_value == old_value:
+            return
+        moves = self.__moves
+        if moves is not None:
+            moves.append((product, old_value, new_value))
+            if len(moves) > MAX_PENDING_MOVES and self.__lock.acquire(blocking=False):
+                try:
+                    self.__apply_moves()
+                finally:
+                    self.__lock.release()
+            return
+        with self.__lock:
+            self.__move(product, old_value, new_value)
+
+    def __move(self, product, old_value, new_value):
+        if not self.__remove(product, (old_value, product.product_id)):
+            # Changes reported out of order: move the product from wherever it
+            # really is to its current value
+            key = self.__find(product) if product.is_active() else None
+            if key is None or not self.__remove(product, key):
+                return
+            new_value = self.__value_of(product)
+        entry = (new_value, product.product_id, product)
+        self.__all.insert(entry)
+        self.__by_category[product.category_id].insert(entry)
+
+    def __find(self, product) -> Optional[Tuple]:
+        """(value, product_id) product is indexed under, by a scan of its category"""
+        members = self.__by_category.get(product.category_id)
+        if members is None:
+            return None
+        for value, product_id, _ in members.iter_from(()):
+            if product_id == product.product_id:
+                return value, product_id
+        return None
+
+    def __apply_moves(self):
+        """Apply queued moves, taking each product from its first old value to its current one"""
+        moves = self.__moves
+        if not moves:
+            return
+        batch: Dict[str, Tuple] = {}
+        for _ in range(len(moves)):
+            product, old_value, _ = moves.popleft()
+            batch.setdefault(product.product_id, (product, old_value))
+        for product, old_value in batch.values():
+            new_value = self.__value_of(product)
+            if new_value != old_value:
+                self.__move(product, old_value, new_value)
+
+    def range(self, low: Optional[float] = None, high: Optional[float] = None,
+              category_id: Optional[str] = None, descending: bool = False,
+              limit: Optional[int] = None, after: Optional[Tuple] = None,
+              predicate: Optional[Callable] = None) -> List:
+        """
+        Products with low <= value <= high in value order
+
+        Args:
+            low: Smallest value, inclusive (optional)
+            high: Largest value, inclusive (optional)
+            category_id: Only products of this category (optional)
+            descending: Largest values first
+            limit: Maximum number of products (optional)
+            after: (value, product_id) to resume after, exclusive (optional)
+            predicate: Extra filter applied to each product (optional)
+
+        Returns:
+            List of matching products
+        """
+        if limit is not None and limit <= 0:
+            return []
+        with self.__lock:
+            self.__apply_moves()
+            entries = self.__all if category_id is None else self.__by_category.get(category_id)
+            if entries is None:
+                return []
+
+            if descending:
+                start = (high, _HIGHEST) if high is not None else (_HIGHEST,)
+                if after is not None and tuple(after) < start:
+                    start = tuple(after)
+                candidates = entries.iter_before(start)
+                in_range = (lambda value: value >= low) if low is not None else None
+            else:
+                start = (low,) if low is not None else ()
+                if after is not None and (*after, _HIGHEST) > start:
+                    start = (*after, _HIGHEST)
+                candidates = entries.iter_from(start)
+                in_range = (lambda value: value <= high) if high is not None else None
+
+            products = []
+            for value, _, product in candidates:
+                if in_range is not None and not in_range(value):
+                    break
+                if predicate is not None and not predicate(product):
+                    continue
+                products.append(product)
+                if len(products) == limit:
+                    break
+            return products
+
+    def smallest(self, count: int, category_id: Optional[str] = None) -> List:
+        """The count products with the lowest values"""
+        return self.range(category_id=category_id, limit=count)
+
+    def largest(self, count: int, category_id: Optional[str] = None) -> List:
+        """The count products with the highest values"""
+        return self.range(category_id=category_id, descending=True, limit=count)
+
+    def __str__(self) -> str:
+        return f"OrderedProductIndex(attribute={self.__attribute}, products={len(self.__all)})"
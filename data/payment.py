@@ -2,10 +2,17 @@
 Payment processing functionality
 """
 
+import threading
 import uuid
-from datetime import datetime
-from typing import Dict, Optional
-from data.exceptions import PaymentError
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from data import config
+from data.journal import TransactionJournal
+from data.ledger import (LedgerIndex, TransactionPage, DailyRevenue, DEFAULT_PAGE_SIZE,
+                         MAX_PAGE_SIZE, encode_cursor, decode_cursor)
+from data.gateway_client import GatewayClient, GatewayTimeoutError, PaymentDeclinedError
+from data.repository import Repository, create_repository
+from data.exceptions import PaymentError, JournalError
 
 
 class Payment:
@@ -13,12 +20,59 @@ class Payment:
     
     PAYMENT_METHODS = ["UPI", "DEBIT_CARD", "NET_BANKING"]
     
-    def __init__(self):
-        self.__transactions: Dict[str, Dict] = {}
+    def __init__(self, transactions: Optional[Repository] = None,
+                 journal: Optional[TransactionJournal] = None,
+                 gateway: Optional[GatewayClient] = None):
+        # transaction_id -> transaction details
+        self.__transactions = transactions if transactions is not None else Repository()
+        self.__journal = journal
+        # Payments are approved locally when there is no gateway
+        self.__gateway = gateway
+        # transaction_id -> details of charges whose outcome was never recorded
+        self.__in_doubt: Dict[str, Dict] = {}
+        self.__settle_lock = threading.Lock()
+        if journal is not None:
+            self.__replay_journal()
+        # User, time and payment method indexes, built along with the replay so that
+        # no payment ever waits for them
+        self.__ledger = LedgerIndex(list(self.__transactions.items()))
+    
+    def __replay_journal(self):
+        """Rebuild transactions recorded in the journal; the last record of a transaction wins"""
+        latest: Dict[str, Dict] = {}
+        for record in self.__journal.replay():
+            latest[record.pop("transaction_id")] = record
+        for transaction_id, record in latest.items():
+            if transaction_id in self.__transactions or record["status"] == "FAILED":
+                continue
+            if record["status"] == "PENDING":
+                # Charged or not, the gateway knows; the idempotency key is the transaction ID
+                self.__in_doubt[transaction_id] = _decode_transaction(record)
+            else:
+                self.__transactions[transaction_id] = _decode_transaction(record)
+    
+    def __record(self, transaction_id: str, transaction: Dict):
+        """Append a transaction's current state to the journal, if there is one"""
+        if self.__journal is not None:
+            self.__journal.append(dict(_encode_transaction(transaction),
+                                       transaction_id=transaction_id))
+    
+    @property
+    def in_doubt(self) -> Dict[str, Dict]:
+        """Charges sent to the gateway whose outcome was never recorded, by transaction ID"""
+        return dict(self.__in_doubt)
+    
+    @property
+    def gateway(self) -> Optional[GatewayClient]:
+        return self.__gateway
+    
+    @gateway.setter
+    def gateway(self, value: Optional[GatewayClient]):
+        self.__gateway = value
     
     def process_payment(self, amount: float, payment_method: str, 
-                       user_id: str) -> str:
-        """Process payment and return transaction ID"""
+                       user_id: str, lines: Iterable[Tuple] = ()) -> str:
+        """Process payment and return transaction ID; lines of the order are stored with it"""
         if payment_method not in self.PAYMENT_METHODS:
             raise PaymentError(f"Invalid payment method. Supported methods: {', '.join(self.PAYMENT_METHODS)}")
         
@@ -28,21 +82,144 @@ class Payment:
         # Generate transaction ID
         transaction_id = str(uuid.uuid4())
         
-        # Store transaction details
-        self.__transactions[transaction_id] = {
+        transaction = {
             "amount": amount,
             "payment_method": payment_method,
             "user_id": user_id,
             "timestamp": datetime.now(),
-            "status": "SUCCESS"
+            "status": "PENDING",
+            "gateway_reference": None,
+            # (product ID, category ID, quantity, unit price), so sales rollups can be rebuilt
+            "lines": [list(line) for line in lines]
         }
         
+        # Record the attempt before charging, so no charge is ever made without a trace
+        try:
+            self.__record(transaction_id, transaction)
+        except JournalError as e:
+            raise PaymentError(f"Payment could not be recorded: {e}")
+        
+        # Charge through the gateway; the transaction ID keeps retries idempotent
+        if self.__gateway is not None:
+            try:
+                transaction["gateway_reference"] = self.__gateway.charge(
+                    transaction_id, amount, payment_method, user_id)
+            except GatewayTimeoutError:
+                # The charge may still go through, so the record stays pending
+                self.__in_doubt[transaction_id] = transaction
+                raise GatewayTimeoutError("Payment not confirmed by the gateway yet; "
+                                          "the order is on hold until it is", transaction_id)
+            except PaymentError:
+                self.__fail(transaction_id, transaction)
+                raise
+        
+        self.__succeed(transaction_id, transaction)
         return transaction_id
     
+    def __succeed(self, transaction_id: str, transaction: Dict):
+        """Record and store a charged transaction"""
+        transaction["status"] = "SUCCESS"
+        # The customer has been charged, so a failure to settle the record must
+        # not fail the payment: its pending record lists it as in doubt after a restart
+        try:
+            self.__record(transaction_id, transaction)
+        except JournalError:
+            pass
+        
+        # Store transaction details
+        self.__transactions[transaction_id] = transaction
+        self.__ledger.add(transaction_id, transaction)
+    
+    def __fail(self, transaction_id: str, transaction: Dict):
+        """Record that a transaction was not charged"""
+        try:
+            self.__record(transaction_id, dict(transaction, status="FAILED"))
+        except JournalError:
+            pass    # Left pending, which only lists it as in doubt after a restart
+    
+    def settle_in_doubt(self) -> Dict[str, str]:
+        """
+        Ask the gateway again about every charge in doubt
+        
+        Each charge is re-sent with its transaction ID as idempotency key,
+        so the gateway answers with the original outcome if it got the
+        first request, and charges it now if it did not.
+        
+        Returns:
+            New status per transaction ID: "SUCCESS", "FAILED", or "PENDING"
+            if the gateway gave no answer (or there is no gateway)
+        """
+        outcomes = {}
+        with self.__settle_lock:
+            for transaction_id, transaction in list(self.__in_doubt.items()):
+                if self.__gateway is None:
+                    outcomes[transaction_id] = "PENDING"
+                    continue
+                try:
+                    transaction["gateway_reference"] = self.__gateway.charge(
+                        transaction_id, transaction["amount"], transaction["payment_method"],
+                        transaction["user_id"])
+                except PaymentDeclinedError:
+                    self.__fail(transaction_id, transaction)
+                    outcomes[transaction_id] = "FAILED"
+                except PaymentError:
+                    # Not answered, so still unknown
+                    outcomes[transaction_id] = "PENDING"
+                    continue
+                else:
+                    self.__succeed(transaction_id, transaction)
+                    outcomes[transaction_id] = "SUCCESS"
+                del self.__in_doubt[transaction_id]
+        return outcomes
+    
     def get_transaction(self, transaction_id: str) -> Optional[Dict]:
         """Get transaction details"""
         return self.__transactions.get(transaction_id)
     
+    def query_transactions(self, user_id: Optional[str] = None,
+                           start: Optional[datetime] = None,
+                           end: Optional[datetime] = None,
+                           payment_method: Optional[str] = None,
+                           descending: bool = True,
+                           page_size: int = DEFAULT_PAGE_SIZE,
+                           cursor: Optional[str] = None) -> TransactionPage:
+        """
+        Successful transactions one page at a time, newest first by default
+        
+        Args:
+            user_id: Only this user's transactions (optional)
+            start: Earliest time, inclusive (optional)
+            end: Latest time, exclusive (optional)
+            payment_method: Only this payment method (optional)
+            descending: Newest first
+            page_size: Maximum number of transactions per page
+            cursor: Opaque cursor from the previous page (optional)
+        
+        Returns:
+            TransactionPage with the transactions and the cursor of the next
+            page, which is None when there are no more results
+        
+        Raises:
+            ValueError: If the arguments or the cursor are invalid
+        """
+        if payment_method is not None and payment_method not in self.PAYMENT_METHODS:
+            raise ValueError(f"Invalid payment method. Supported methods: {', '.join(self.PAYMENT_METHODS)}")
+        if not 0 < page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"Page size must be between 1 and {MAX_PAGE_SIZE}")
+        after = decode_cursor(cursor, descending) if cursor else None
+        
+        transaction_ids, last = self.__ledger.query(user_id, start, end, payment_method,
+                                                    descending, page_size, after)
+        transactions = [dict(self.__transactions[transaction_id], transaction_id=transaction_id)
+                        for transaction_id in transaction_ids]
+        return TransactionPage(transactions,
+                               encode_cursor(*last, descending) if last is not None else None)
+    
+    def daily_revenue(self, start: Optional[date] = None,
+                      end: Optional[date] = None) -> List[DailyRevenue]:
+        """Transactions and revenue per day from start to end (inclusive), oldest first"""
+        return self.__ledger.daily_totals(start, end)
+    
     def get_payment_message(self, payment_method: str, amount: float) -> str:
         """Get appropriate payment message"""
         messages = {
@@ -53,5 +230,28 @@ class Payment:
         return messages.get(payment_method, f"Payment of Rs. {amount:.2f} will be processed")
 
 
+def _encode_transaction(transaction: Dict) -> Dict:
+    """Convert transaction details to a JSON-compatible dict"""
+    return dict(transaction, timestamp=transaction["timestamp"].isoformat())
+
+
+def _decode_transaction(record: Dict) -> Dict:
+    """Rebuild transaction details from a stored dict"""
+    return dict(record, timestamp=datetime.fromisoformat(record["timestamp"]))
+
+
+def _create_gateway() -> Optional[GatewayClient]:
+    """Build the configured gateway client, if any"""
+    if not config.PAYMENT_GATEWAY:
+        return None
+    host, _, port = config.PAYMENT_GATEWAY.rpartition(":")
+    return GatewayClient(host or "127.0.0.1", int(port), pool_size=config.PAYMENT_GATEWAY_POOL_SIZE,
+                         timeout=config.PAYMENT_GATEWAY_TIMEOUT)
+
+
 # Global payment processor
-payment_processor = Payment()
\ No newline at end of file
+payment_processor = Payment(
+    create_repository("transactions", _encode_transaction, _decode_transaction),
+    TransactionJournal(config.PAYMENT_JOURNAL_PATH) if config.PAYMENT_JOURNAL_PATH else None,
+    _create_gateway()
+)
\ No newline at end of file
@@ -2,9 +2,43 @@
 Product class and product data management
 """
 
+import math
+from typing import Dict
+from data.category_index import CategoryIndex
+from data.ordered_index import OrderedProductIndex
+from data.repository import create_repository
+from data.id_allocator import create_allocator
+from data.shared_inventory import create_shared_stock
+from data.lazy import LazyIndex
+
+
+def clean_product_name(value: str) -> str:
+    """Validate product name and return it stripped"""
+    if not value.strip():
+        raise ValueError("Product name cannot be empty")
+    return value.strip()
+
+
+def validate_price(value: float):
+    """Validate a product price"""
+    if not math.isfinite(value):
+        raise ValueError("Price must be a finite number")
+    if value < 0:
+        raise ValueError("Price cannot be negative")
+
+
+def validate_stock(value: int):
+    """Validate a product stock level"""
+    if value < 0:
+        raise ValueError("Stock cannot be negative")
+
+
 class Product:
     """Represents a product in the shopping system"""
     
+    __slots__ = ("__product_id", "__name", "__price", "__category_id",
+                 "__description", "__stock", "__stock_slot", "__is_active")
+    
     def __init__(self, product_id: str, name: str, price: float, 
                  category_id: str, description: str = "", stock: int = 0):
         self.__product_id = product_id
@@ -13,6 +47,8 @@ class Product:
         self.__category_id = category_id
         self.__description = description
         self.__stock = stock
+        # Slot in the shared stock counters, or -1 when stock is kept here
+        self.__stock_slot = shared_stock.register(product_id, stock) if shared_stock is not None else -1
         self.__is_active = True
     
     @property
@@ -25,9 +61,9 @@ class Product:
     
     @name.setter
     def name(self, value: str):
-        if not value.strip():
-            raise ValueError("Product name cannot be empty")
-        self.__name = value.strip()
+        old_name = self.__name
+        self.__name = clean_product_name(value)
+        name_index.move(self, old_name.casefold())
     
     @property
     def price(self) -> float:
@@ -35,9 +71,10 @@ class Product:
     
     @price.setter
     def price(self, value: float):
-        if value < 0:
-            raise ValueError("Price cannot be negative")
+        validate_price(value)
+        old_price = self.__price
         self.__price = value
+        price_index.move(self, old_price)
     
     @property
     def category_id(self) -> str:
@@ -53,44 +90,142 @@ class Product:
     
     @property
     def stock(self) -> int:
+        if self.__stock_slot >= 0:
+            return shared_stock.get(self.__stock_slot)
         return self.__stock
     
     @stock.setter
     def stock(self, value: int):
-        if value < 0:
-            raise ValueError("Stock cannot be negative")
+        validate_stock(value)
+        if self.__stock_slot >= 0:
+            shared_stock.set(self.__stock_slot, value)
+            return
+        old_stock = self.__stock
         self.__stock = value
+        stock_index.move(self, old_stock)
     
     def is_active(self) -> bool:
         return self.__is_active
     
     def is_available(self, quantity: int = 1) -> bool:
         """Check if product is available in required quantity"""
-        return self.__is_active and self.__stock >= quantity
+        return self.__is_active and self.stock >= quantity
     
     def reduce_stock(self, quantity: int):
         """Reduce stock by given quantity"""
+        if self.__stock_slot >= 0:
+            if not shared_stock.reserve(self.__stock_slot, quantity):
+                raise ValueError("Insufficient stock")
+            return
         if quantity > self.__stock:
             raise ValueError("Insufficient stock")
         self.__stock -= quantity
+        stock_index.move(self, self.__stock + quantity)
     
     def increase_stock(self, quantity: int):
         """Increase stock by given quantity"""
+        if self.__stock_slot >= 0:
+            shared_stock.release(self.__stock_slot, quantity)
+            return
         self.__stock += quantity
+        stock_index.move(self, self.__stock - quantity)
     
     def deactivate(self):
         """Deactivate the product"""
         self.__is_active = False
+        unindex_product(self)
+    
+    def to_record(self) -> Dict:
+        """Convert product to a plain dict for storage"""
+        return {
+            "product_id": self.__product_id,
+            "name": self.__name,
+            "price": self.__price,
+            "category_id": self.__category_id,
+            "description": self.__description,
+            "stock": self.stock,
+            "is_active": self.__is_active
+        }
+    
+    @classmethod
+    def from_record(cls, record: Dict) -> "Product":
+        """Rebuild product from a dict created by to_record"""
+        product = cls(record["product_id"], record["name"], record["price"],
+                      record["category_id"], record["description"], record["stock"])
+        product.__is_active = record["is_active"]
+        return product
     
     def __str__(self) -> str:
         return f"Product(id={self.__product_id}, name={self.__name}, price={self.__price})"
 
 
-# Demo products data
-products_data = {
-    "prod1": Product("prod1", "Smartphone", 25000.0, "cat1", "Latest smartphone", 10),
-    "prod2": Product("prod2", "Laptop", 55000.0, "cat1", "Gaming laptop", 5),
-    "prod3": Product("prod3", "T-Shirt", 500.0, "cat2", "Cotton t-shirt", 20),
-    "prod4": Product("prod4", "Jeans", 1500.0, "cat2", "Denim jeans", 15),
-    "prod5": Product("prod5", "Python Book", 800.0, "cat3", "Learn Python programming", 8)
-}
\ No newline at end of file
+def _demo_products() -> Dict[str, Product]:
+    """Demo products data"""
+    return {
+        "prod1": Product("prod1", "Smartphone", 25000.0, "cat1", "Latest smartphone", 10),
+        "prod2": Product("prod2", "Laptop", 55000.0, "cat1", "Gaming laptop", 5),
+        "prod3": Product("prod3", "T-Shirt", 500.0, "cat2", "Cotton t-shirt", 20),
+        "prod4": Product("prod4", "Jeans", 1500.0, "cat2", "Denim jeans", 15),
+        "prod5": Product("prod5", "Python Book", 800.0, "cat3", "Learn Python programming", 8)
+    }
+
+
+# Stock counters shared with other worker processes, or None to keep stock in each product
+shared_stock = create_shared_stock()
+
+products_data = create_repository("products", Product.to_record, Product.from_record,
+                                  _demo_products)
+
+# Product ID allocation, starting above the IDs already stored
+product_ids = create_allocator("prod", products_data.keys)
+
+# Category -> active products index over products_data, built on first query
+category_index = LazyIndex(CategoryIndex, products_data.values)
+
+# Active products in the order their IDs were allocated, the catalog order of
+# unsorted listings, and by case-insensitive name
+catalog_order_index = LazyIndex(
+    lambda products: OrderedProductIndex(
+        "product_id", products,
+        value_of=lambda product: product_ids.number_of(product.product_id)),
+    products_data.values)
+name_index = LazyIndex(
+    lambda products: OrderedProductIndex("name", products,
+                                         value_of=lambda product: product.name.casefold()),
+    products_data.values)
+
+
+def _no_stock_order(products):
+    """Stock index builder with shared inventory, where there is no stock order"""
+    raise RuntimeError("Stock order is not indexed with shared inventory, "
+                       "since other workers change stock levels behind this process's back")
+
+
+# Active products ordered by price and by stock level. Stock changes on the
+# checkout path are queued rather than taking the index lock; with shared
+# inventory there is no stock order and querying it raises RuntimeError
+price_index = LazyIndex(lambda products: OrderedProductIndex("price", products),
+                        products_data.values)
+stock_index = LazyIndex(_no_stock_order if shared_stock is not None else
+                        lambda products: OrderedProductIndex("stock", products,
+                                                             deferred_moves=True),
+                        products_data.values)
+
+
+def index_product(product):
+    """Add a newly stored product to the category, catalog order, name, price and stock indexes"""
+    category_index.add(product)
+    catalog_order_index.add(product)
+    name_index.add(product)
+    price_index.add(product)
+    if shared_stock is None:
+        stock_index.add(product)
+
+
+def unindex_product(product):
+    """Drop a product from the category, catalog order, name, price and stock indexes"""
+    category_index.remove(product)
+    catalog_order_index.remove(product)
+    name_index.remove(product)
+    price_index.remove(product)
+    stock_index.remove(product)
@@ -0,0 +1,399 @@
+"""
+Repository layer for the data stores with in-memory and SQLite backends
+"""
+
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from data import config
+from data.snapshot import SnapshotSection, snapshot_section, encode_live
+
+_MISSING = object()
+
+_log = logging.getLogger(__name__)
+
+
+class Repository(dict):
+    """
+    Keyed store of model objects (in-memory backend)
+
+    Reads and writes behave like a dict. Code that mutates a stored
+    object in place calls mark_dirty() so persistent backends can
+    write it back; here that and flush() are no-ops.
+    """
+
+    def mark_dirty(self, key: str):
+        """Record that the object stored under key changed in place"""
+
+    def flush(self):
+        """Write pending changes to durable storage"""
+
+    def close(self):
+        """Flush and release backend resources"""
+
+    def snapshot_base(self) -> Optional[SnapshotSection]:
+        """Snapshot section holding records not loaded into the store yet"""
+        return None
+
+
+class SnapshotRepository(Repository):
+    """
+    In-memory repository that starts from a snapshot section
+
+    Records stay in the memory-mapped snapshot until a key is first
+    looked up, so startup does not depend on the size of the store.
+    Iterating loads every remaining record.
+    """
+
+    def __init__(self, section: SnapshotSection, decode: Callable[[Dict], object]):
+        super().__init__()
+        self.__section = section
+        self.__decode = decode
+        self.__lock = threading.Lock()
+
+    def __load(self, key) -> bool:
+        """Move key's record from the snapshot into the store; False if there is none"""
+        if not self.__section.remaining or not isinstance(key, str):
+            return False
+        with self.__lock:
+            if super().__contains__(key):
+                return True
+            record = self.__section.take(key)
+            if record is None:
+                return False
+            super().__setitem__(key, self.__decode(record))
+            return True
+
+    def __load_all(self):
+        if self.__section.remaining:
+            with self.__lock:
+                for key, record in self.__section.take_all():
+                    if not super().__contains__(key):
+                        super().__setitem__(key, self.__decode(record))
+
+    def __getitem__(self, key: str):
+        try:
+            return super().__getitem__(key)
+        except KeyError:
+            if not self.__load(key):
+                raise
+            return super().__getitem__(key)
+
+    def get(self, key: str, default=None):
+        value = super().get(key, _MISSING)
+        if value is _MISSING:
+            if not self.__load(key):
+                return default
+            value = super().__getitem__(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return super().__contains__(key) or self.__load(key)
+
+    def __setitem__(self, key: str, value):
+        if self.__section.remaining:
+            with self.__lock:
+                # The new value replaces any record still in the snapshot
+                self.__section.take(key)
+                super().__setitem__(key, value)
+        else:
+            super().__setitem__(key, value)
+
+    def __delitem__(self, key: str):
+        self.__load(key)
+        super().__delitem__(key)
+
+    def __len__(self) -> int:
+        return super().__len__() + self.__section.remaining
+
+    def __iter__(self):
+        self.__load_all()
+        return super().__iter__()
+
+    def keys(self):
+        self.__load_all()
+        return super().keys()
+
+    def values(self):
+        self.__load_all()
+        return super().values()
+
+    def items(self):
+        self.__load_all()
+        return super().items()
+
+    def setdefault(self, key: str, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def pop(self, key: str, default=_MISSING):
+        self.__load(key)
+        if default is _MISSING:
+            return super().pop(key)
+        return super().pop(key, default)
+
+    def popitem(self):
+        self.__load_all()
+        return super().popitem()
+
+    def clear(self):
+        self.__load_all()
+        super().clear()
+
+    def snapshot_base(self) -> Optional[SnapshotSection]:
+        return self.__section if self.__section.remaining else None
+
+
+class SQLiteRepository(Repository):
+    """Repository persisted to one SQLite table with write-behind flushing"""
+
+    def __init__(self, database: "SQLiteDatabase", table: str,
+                 encode: Callable[[object], Dict], decode: Callable[[Dict], object]):
+        super().__init__()
+        self.__database = database
+        self.__encode = encode
+        self.__lock = threading.Lock()
+        self.__dirty: Set[str] = set()
+        self.__deleted: Set[str] = set()
+        self.__upsert_sql = f"INSERT OR REPLACE INTO {table} (key, value) VALUES (?, ?)"
+        self.__delete_sql = f"DELETE FROM {table} WHERE key = ?"
+
+        for key, value in database.load_table(table):
+            super().__setitem__(key, decode(json.loads(value)))
+
+    @property
+    def pending(self) -> int:
+        return len(self.__dirty) + len(self.__deleted)
+
+    def __track_write(self, key: str):
+        with self.__lock:
+            self.__deleted.discard(key)
+            self.__dirty.add(key)
+        self.__database.notify_pending(self.pending)
+
+    def __track_delete(self, key: str):
+        with self.__lock:
+            self.__dirty.discard(key)
+            self.__deleted.add(key)
+        self.__database.notify_pending(self.pending)
+
+    def __setitem__(self, key: str, value):
+        super().__setitem__(key, value)
+        self.__track_write(key)
+
+    def __delitem__(self, key: str):
+        super().__delitem__(key)
+        self.__track_delete(key)
+
+    def setdefault(self, key: str, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def pop(self, key: str, default=_MISSING):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.__track_delete(key)
+        return key, value
+
+    def clear(self):
+        for key in list(self):
+            del self[key]
+
+    def mark_dirty(self, key: str):
+        if key in self:
+            self.__track_write(key)
+
+    def write_pending(self, connection: sqlite3.Connection) -> Tuple[Set[str], Set[str]]:
+        """
+        Write pending changes inside the caller's transaction
+
+        Returns:
+            (written, deleted) keys, to hand back to requeue() if the transaction fails
+        """
+        with self.__lock:
+            dirty, self.__dirty = self.__dirty, set()
+            deleted, self.__deleted = self.__deleted, set()
+
+        try:
+            rows = []
+            for key in dirty:
+                value = self.get(key)
+                if value is not None:
+                    # Request threads may change the object while it is encoded here
+                    record = encode_live(value, self.__encode)
+                    rows.append((key, json.dumps(record, separators=(",", ":"))))
+            if rows:
+                connection.executemany(self.__upsert_sql, rows)
+            if deleted:
+                connection.executemany(self.__delete_sql, [(key,) for key in deleted])
+        except Exception:
+            self.requeue(dirty, deleted)
+            raise
+        return dirty, deleted
+
+    def requeue(self, dirty: Set[str], deleted: Set[str]):
+        """Make keys of a write that was not committed pending again, unless they changed since"""
+        with self.__lock:
+            self.__dirty.update(key for key in dirty if key not in self.__deleted)
+            self.__deleted.update(key for key in deleted if key not in self.__dirty)
+
+    def flush(self):
+        self.__database.flush()
+
+    def close(self):
+        self.__database.close()
+
+
+class SQLiteDatabase:
+    """Shared SQLite connection with a background write-behind flusher"""
+
+    def __init__(self, path: str, flush_interval: float, flush_batch: int):
+        self.__connection = sqlite3.connect(path, check_same_thread=False,
+                                            isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__lock = threading.RLock()
+        self.__repositories: List[SQLiteRepository] = []
+        self.__flush_batch = flush_batch
+        self.__flush_interval = flush_interval
+        self.__wakeup = threading.Event()
+        self.__closed = False
+        self.__last_error: Optional[Exception] = None
+        self.__flusher = threading.Thread(target=self.__flush_loop,
+                                          name="sqlite-write-behind", daemon=True)
+        self.__flusher.start()
+        atexit.register(self.close)
+
+    def load_table(self, table: str) -> Iterable:
+        """Create table if needed and return its (key, value) rows"""
+        with self.__lock:
+            self.__connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID")
+            return self.__connection.execute(f"SELECT key, value FROM {table}").fetchall()
+
+    def open_repository(self, table: str, encode: Callable[[object], Dict],
+                        decode: Callable[[Dict], object]) -> SQLiteRepository:
+        repository = SQLiteRepository(self, table, encode, decode)
+        with self.__lock:
+            self.__repositories.append(repository)
+        return repository
+
+    @property
+    def last_error(self) -> Optional[Exception]:
+        """Error of the most recent background flush, if it failed"""
+        return self.__last_error
+
+    def notify_pending(self, pending: int):
+        """Wake the flusher early once enough writes are pending"""
+        if pending >= self.__flush_batch:
+            self.__wakeup.set()
+
+    def flush(self):
+        """Write pending changes of all repositories in one transaction"""
+        with self.__lock:
+            if self.__closed and self.__connection is None:
+                return
+            written = []
+            self.__connection.execute("BEGIN")
+            try:
+                for repository in self.__repositories:
+                    written.append((repository, repository.write_pending(self.__connection)))
+                self.__connection.execute("COMMIT")
+            except Exception:
+                # Nothing was stored, so every repository's changes stay pending
+                for repository, (dirty, deleted) in written:
+                    repository.requeue(dirty, deleted)
+                if self.__connection.in_transaction:
+                    self.__connection.execute("ROLLBACK")
+                raise
+
+    def __flush_loop(self):
+        while not self.__closed:
+            self.__wakeup.wait(self.__flush_interval)
+            self.__wakeup.clear()
+            if not self.__closed:
+                try:
+                    self.flush()
+                    self.__last_error = None
+                except Exception as e:
+                    # The changes stay pending and are written on a later round
+                    self.__last_error = e
+                    _log.exception("Write-behind flush failed")
+
+    def close(self):
+        """Stop the flusher, write what is pending and close the connection"""
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+        self.__wakeup.set()
+        self.__flusher.join()
+        with self.__lock:
+            self.flush()
+            self.__connection.close()
+            self.__connection = None
+
+
+_database: Optional[SQLiteDatabase] = None
+
+
+def _get_database() -> SQLiteDatabase:
+    global _database
+    if _database is None:
+        _database = SQLiteDatabase(config.SQLITE_PATH, config.SQLITE_FLUSH_INTERVAL,
+                                   config.SQLITE_FLUSH_BATCH)
+    return _database
+
+
+def create_repository(table: str, encode: Callable[[object], Dict],
+                      decode: Callable[[Dict], object],
+                      seed: Callable[[], Dict] = dict) -> Repository:
+    """
+    Create the repository for one data store using the configured backend
+
+    Args:
+        table: Table name used by persistent backends
+        encode: Converts a stored object to a JSON-compatible dict
+        decode: Rebuilds a stored object from its dict
+        seed: Returns initial contents when the store is empty
+
+    Returns:
+        Repository for the store
+
+    Raises:
+        ValueError: If the configured backend is unknown
+    """
+    if config.STORAGE_BACKEND == "memory":
+        section = snapshot_section(table)
+        if section is not None:
+            return SnapshotRepository(section, decode)
+        return Repository(seed())
+    if config.STORAGE_BACKEND == "sqlite":
+        repository = _get_database().open_repository(table, encode, decode)
+        if not repository:
+            repository.update(seed())
+        return repository
+    raise ValueError(f"Unknown storage backend: {config.STORAGE_BACKEND}")
@@ -0,0 +1,98 @@
+"""
+Typed results returned by the user and admin functions
+
+Results hold plain data only; turning them into text is the job of the
+renderer used by the interactive front end.
+"""
+
+from typing import List, NamedTuple
+
+
+class CartUpdate(NamedTuple):
+    """Product added to or removed from a cart"""
+    product_id: str
+    product_name: str
+    quantity: int
+
+
+class CartLine(NamedTuple):
+    """One item of a cart summary"""
+    product_id: str
+    product_name: str
+    quantity: int
+    unit_price: float
+    total_price: float
+
+
+class CartSummary(NamedTuple):
+    """Contents and totals of a cart"""
+    lines: List[CartLine]
+    total_amount: float
+    item_count: int
+
+    @classmethod
+    def of(cls, cart) -> "CartSummary":
+        """Summarize cart (an empty summary if cart is None)"""
+        if cart is None:
+            return cls([], 0.0, 0)
+        lines = [CartLine(item.product.product_id, item.product.name, item.quantity,
+                          item.product.price, item.get_total_price())
+                 for item in cart.get_items()]
+        return cls(lines, cart.get_total_amount(), cart.get_item_count())
+
+    def is_empty(self) -> bool:
+        return not self.lines
+
+
+class CheckoutReceipt(NamedTuple):
+    """Successful checkout"""
+    transaction_id: str
+    payment_method: str
+    amount: float
+
+
+class SearchResults(NamedTuple):
+    """Products matching a search query, most relevant first"""
+    query: str
+    products: List
+
+
+class CatalogChange(NamedTuple):
+    """Product or category added, updated or deleted by an admin"""
+    entity: str      # "product" or "category"
+    action: str      # "added", "updated" or "deleted"
+    entity_id: str
+    name: str
+
+
+class BulkUpdate(NamedTuple):
+    """Products changed by a bulk price or stock operation"""
+    field: str       # "price" or "stock"
+    count: int
+
+
+class PaymentSettlement(NamedTuple):
+    """Outcome of asking the gateway again about charges in doubt"""
+    succeeded: List[str]     # transaction IDs now charged
+    failed: List[str]        # transaction IDs the gateway declined
+    pending: List[str]       # transaction IDs still without an answer
+    orders_settled: int      # held checkouts completed or rolled back
+
+
+class SalesFigure(NamedTuple):
+    """Units sold and revenue under one label (a period, product, category or payment method)"""
+    label: str
+    units: int
+    revenue: float
+
+
+class SalesDashboard(NamedTuple):
+    """Pre-aggregated sales totals for the admin sales dashboard"""
+    days: int
+    today: SalesFigure
+    last_24_hours: SalesFigure
+    hourly: List[SalesFigure]           # last 24 hours, oldest first
+    daily: List[SalesFigure]            # last `days` days, oldest first
+    payment_methods: List[SalesFigure]  # over the last `days` days
+    top_categories: List[SalesFigure]
+    top_products: List[SalesFigure]
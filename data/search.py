@@ -0,0 +1,206 @@
+"""
+Full-text product search over an inverted index
+"""
+
+import bisect
+import heapq
+import itertools
+import math
+import re
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from data.lazy import LazyIndex
+from data.products import products_data
+
+TOKEN_PATTERN = re.compile(r"\w+")
+NAME_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+PREFIX_PENALTY = 0.5
+# New tokens kept in a small sorted list before merging into the vocabulary
+MAX_NEW_TOKENS = 4096
+DEFAULT_SEARCH_LIMIT = 20
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+class SearchIndex:
+    """
+    Inverted index over product names and descriptions
+
+    Each token maps to the products containing it and a per-product
+    weight (name matches count more than description matches). Prefix
+    matching uses a sorted vocabulary of tokens. New tokens go into a
+    small sorted list of their own and are merged into the vocabulary
+    in one linear pass once that list fills up, so neither indexing
+    nor searching ever re-sorts the whole vocabulary.
+    """
+
+    def __init__(self, products: Iterable = ()):
+        self.__lock = threading.Lock()
+        self.__postings: Dict[str, Dict[str, float]] = {}
+        self.__documents: Dict[str, Tuple[str, ...]] = {}
+        self.__vocabulary: List[str] = []
+        self.__new_tokens: List[str] = []
+        for product in products:
+            self.__index(product, self.__weights(product))
+        self.__vocabulary = sorted(self.__postings)
+
+    def __len__(self) -> int:
+        return len(self.__documents)
+
+    def add(self, product):
+        """Index an active product (replaces any previous entry)"""
+        weights = self.__weights(product)
+        with self.__lock:
+            for token in self.__index(product, weights):
+                # A token whose products were all removed may still be listed
+                if not (self.__listed(self.__vocabulary, token)
+                        or self.__listed(self.__new_tokens, token)):
+                    bisect.insort(self.__new_tokens, token)
+            if len(self.__new_tokens) > MAX_NEW_TOKENS:
+                self.__merge_vocabulary()
+
+    @staticmethod
+    def __weights(product) -> Dict[str, float]:
+        weights: Dict[str, float] = {}
+        for token in tokenize(product.name):
+            weights[token] = weights.get(token, 0.0) + NAME_WEIGHT
+        for token in tokenize(product.description):
+            weights[token] = weights.get(token, 0.0) + DESCRIPTION_WEIGHT
+        return weights
+
+    def __index(self, product, weights: Dict[str, float]) -> List[str]:
+        """Store product's postings, returning the tokens seen for the first time"""
+        self.__remove(product.product_id)
+        if not product.is_active():
+            return []
+        created = []
+        for token, weight in weights.items():
+            posting = self.__postings.get(token)
+            if posting is None:
+                posting = self.__postings[token] = {}
+                created.append(token)
+            posting[product.product_id] = weight
+        self.__documents[product.product_id] = tuple(weights)
+        return created
+
+    def update(self, product):
+        """Re-index product after its name or description changed"""
+        self.add(product)
+
+    def remove(self, product_id: str):
+        """Drop product from the index (no-op if not indexed)"""
+        with self.__lock:
+            self.__remove(product_id)
+
+    def __remove(self, product_id: str):
+        for token in self.__documents.pop(product_id, ()):
+            posting = self.__postings.get(token)
+            if posting is not None:
+                posting.pop(product_id, None)
+                if not posting:
+                    del self.__postings[token]
+
+    @staticmethod
+    def __listed(tokens: List[str], token: str) -> bool:
+        position = bisect.bisect_left(tokens, token)
+        return position < len(tokens) and tokens[position] == token
+
+    def __merge_vocabulary(self):
+        """Merge the new tokens into the vocabulary, dropping unused tokens"""
+        postings = self.__postings
+        merged = self.__vocabulary + self.__new_tokens
+        # Two sorted runs, so this is a single linear merge
+        merged.sort()
+        self.__vocabulary = [token for token in merged if token in postings]
+        self.__new_tokens = []
+
+    @staticmethod
+    def __prefixed(tokens: List[str], term: str) -> Iterable[str]:
+        start = bisect.bisect_right(tokens, term)
+        return itertools.takewhile(lambda token: token.startswith(term),
+                                   (tokens[position] for position in range(start, len(tokens))))
+
+    def __expand(self, term: str) -> List[Tuple[str, float]]:
+        """Tokens matching term exactly or by prefix, with their match factor"""
+        matches = []
+        if term in self.__postings:
+            matches.append((term, 1.0))
+        prefixed = heapq.merge(self.__prefixed(self.__vocabulary, term),
+                               self.__prefixed(self.__new_tokens, term))
+        matches.extend((token, PREFIX_PENALTY) for token in prefixed if token in self.__postings)
+        return matches
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Tuple[str, float]]:
+        """
+        Find products matching every query term, best matches first
+
+        Terms match whole tokens or token prefixes. Results are ranked
+        by the sum of field weight x inverse document frequency. Only the
+        term with the fewest postings is read in full; every other term
+        is looked up for those candidates alone, unless reading its own
+        postings is cheaper. So a common term next to a rare one costs no
+        more than the rare one, and no match is ever dropped.
+
+        Returns:
+            List of (product_id, score) tuples
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self.__lock:
+            total = max(len(self.__documents), 1)
+
+            term_matches: List[Tuple[int, List[Tuple[Dict[str, float], float]]]] = []
+            for term in terms:
+                matches = [(posting, math.log(1 + total / len(posting)) * factor)
+                           for posting, factor in ((self.__postings[token], factor)
+                                                   for token, factor in self.__expand(term))]
+                if not matches:
+                    return []
+                term_matches.append((sum(len(posting) for posting, _ in matches), matches))
+
+            # Start from the most selective term
+            term_matches.sort(key=lambda item: item[0])
+            candidates = self.__scores(term_matches[0][1])
+            for size, matches in term_matches[1:]:
+                if len(candidates) * len(matches) <= size:
+                    candidates = {product_id: score + best
+                                  for product_id, score in candidates.items()
+                                  for best in (self.__best(matches, product_id),) if best}
+                else:
+                    scores = self.__scores(matches)
+                    candidates = {product_id: score + scores[product_id]
+                                  for product_id, score in candidates.items() if product_id in scores}
+                if not candidates:
+                    return []
+
+        return heapq.nlargest(limit, candidates.items(), key=lambda item: (item[1], item[0]))
+
+    @staticmethod
+    def __scores(matches: List[Tuple[Dict[str, float], float]]) -> Dict[str, float]:
+        """Best score of each product in any of the matched postings"""
+        scores: Dict[str, float] = {}
+        for posting, multiplier in matches:
+            for product_id, weight in posting.items():
+                score = weight * multiplier
+                if score > scores.get(product_id, 0.0):
+                    scores[product_id] = score
+        return scores
+
+    @staticmethod
+    def __best(matches: List[Tuple[Dict[str, float], float]], product_id: str) -> float:
+        """Best score of product_id in the matched postings, 0 if it is in none"""
+        return max(posting.get(product_id, 0.0) * multiplier for posting, multiplier in matches)
+
+    def __str__(self) -> str:
+        return f"SearchIndex(products={len(self.__documents)}, tokens={len(self.__postings)})"
+
+
+# Global product search index, built on the first search
+search_index = LazyIndex(SearchIndex, products_data.values)
@@ -0,0 +1,198 @@
+"""
+Session store with TTL expiry, LRU capacity limit and striped locking
+"""
+
+import heapq
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+DEFAULT_IDLE_TTL = 30 * 60          # seconds without activity
+DEFAULT_ABSOLUTE_TTL = 12 * 60 * 60  # seconds since login
+DEFAULT_MAX_SESSIONS = 1_000_000
+DEFAULT_SHARDS = 16
+
+# Expired sessions reclaimed per request, keeping expiry off the hot path
+EXPIRE_BATCH = 8
+
+
+class _SessionEntry:
+    """Owner and timestamps of a single session"""
+
+    __slots__ = ("owner_id", "created_at", "last_seen")
+
+    def __init__(self, owner_id: str, now: float):
+        self.owner_id = owner_id
+        self.created_at = now
+        self.last_seen = now
+
+
+class _SessionShard:
+    """One lock stripe: LRU-ordered sessions plus an expiry heap"""
+
+    __slots__ = ("lock", "sessions", "expiry_heap", "capacity")
+
+    def __init__(self, capacity: int):
+        self.lock = threading.Lock()
+        self.sessions: "OrderedDict[str, _SessionEntry]" = OrderedDict()
+        self.expiry_heap: List[Tuple[float, str]] = []
+        self.capacity = capacity
+
+
+class SessionStore:
+    """Thread-safe mapping of session IDs to owner IDs with expiry"""
+
+    def __init__(self, idle_ttl: float = DEFAULT_IDLE_TTL,
+                 absolute_ttl: float = DEFAULT_ABSOLUTE_TTL,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 shards: int = DEFAULT_SHARDS,
+                 clock: Callable[[], float] = time.monotonic):
+        if idle_ttl <= 0 or absolute_ttl <= 0:
+            raise ValueError("Session TTLs must be positive")
+        if max_sessions < shards:
+            raise ValueError("max_sessions must be at least the number of shards")
+
+        self.__idle_ttl = idle_ttl
+        self.__absolute_ttl = absolute_ttl
+        self.__clock = clock
+        self.__shards = [_SessionShard(max_sessions // shards) for _ in range(shards)]
+        self.__restore: Optional[Callable[[str], Optional[Tuple[str, float, float]]]] = None
+
+    @property
+    def idle_ttl(self) -> float:
+        return self.__idle_ttl
+
+    @property
+    def absolute_ttl(self) -> float:
+        return self.__absolute_ttl
+
+    def restore_from(self, lookup: Callable[[str], Optional[Tuple[str, float, float]]]):
+        """
+        Resume sessions from an earlier process on first use
+
+        Args:
+            lookup: Returns (owner ID, created, last seen) in wall-clock
+                time for a saved session, at most once per session
+        """
+        self.__restore = lookup
+
+    def __restored(self, shard: _SessionShard, session_id: str, now: float) -> Optional[_SessionEntry]:
+        """Bring a saved session back into shard (caller holds the shard lock)"""
+        saved = self.__restore(session_id)
+        if saved is None:
+            return None
+        owner_id, created_at, last_seen = saved
+        # Wall-clock times carry over restarts; convert them to this process's clock
+        offset = now - time.time()
+        entry = _SessionEntry(owner_id, created_at + offset)
+        entry.last_seen = last_seen + offset
+        shard.sessions[session_id] = entry
+        heapq.heappush(shard.expiry_heap, (self.__deadline(entry), session_id))
+        return entry
+
+    def export(self) -> List[Tuple[str, str, float, float]]:
+        """(session ID, owner ID, created, last seen) of every live session, in wall-clock time"""
+        sessions = []
+        for shard in self.__shards:
+            with shard.lock:
+                offset = time.time() - self.__clock()
+                sessions.extend((session_id, entry.owner_id, entry.created_at + offset,
+                                 entry.last_seen + offset)
+                                for session_id, entry in shard.sessions.items())
+        return sessions
+
+    def __shard_for(self, session_id: str) -> _SessionShard:
+        return self.__shards[hash(session_id) % len(self.__shards)]
+
+    def __deadline(self, entry: _SessionEntry) -> float:
+        return min(entry.created_at + self.__absolute_ttl,
+                   entry.last_seen + self.__idle_ttl)
+
+    def __expire(self, shard: _SessionShard, now: float, limit: Optional[int]):
+        """Reclaim up to `limit` expired sessions from the head of the heap.
+
+        Heap deadlines are lower bounds: a session touched since it was
+        pushed is re-queued with its current deadline instead of removed.
+        """
+        heap = shard.expiry_heap
+        sessions = shard.sessions
+        processed = 0
+        while heap and heap[0][0] <= now and (limit is None or processed < limit):
+            _, session_id = heapq.heappop(heap)
+            processed += 1
+            entry = sessions.get(session_id)
+            if entry is None:
+                continue
+            deadline = self.__deadline(entry)
+            if deadline <= now:
+                del sessions[session_id]
+            else:
+                heapq.heappush(heap, (deadline, session_id))
+
+        # Drop stale heap entries left by logouts and evictions
+        if len(heap) > 2 * len(sessions) + 64:
+            shard.expiry_heap = [(self.__deadline(entry), session_id)
+                                 for session_id, entry in sessions.items()]
+            heapq.heapify(shard.expiry_heap)
+
+    def create(self, owner_id: str) -> str:
+        """Create a new session for owner and return its ID"""
+        session_id = str(uuid.uuid4())
+        shard = self.__shard_for(session_id)
+        now = self.__clock()
+        entry = _SessionEntry(owner_id, now)
+
+        with shard.lock:
+            self.__expire(shard, now, EXPIRE_BATCH)
+            shard.sessions[session_id] = entry
+            heapq.heappush(shard.expiry_heap, (self.__deadline(entry), session_id))
+            while len(shard.sessions) > shard.capacity:
+                shard.sessions.popitem(last=False)
+        return session_id
+
+    def get(self, session_id: str) -> Optional[str]:
+        """Return owner ID of a live session and refresh its idle timer"""
+        shard = self.__shard_for(session_id)
+        now = self.__clock()
+
+        with shard.lock:
+            self.__expire(shard, now, EXPIRE_BATCH)
+            entry = shard.sessions.get(session_id)
+            if entry is None and self.__restore is not None:
+                entry = self.__restored(shard, session_id, now)
+            if entry is None:
+                return None
+            if self.__deadline(entry) <= now:
+                del shard.sessions[session_id]
+                return None
+            entry.last_seen = now
+            shard.sessions.move_to_end(session_id)
+            return entry.owner_id
+
+    def remove(self, session_id: str):
+        """Remove session if present"""
+        shard = self.__shard_for(session_id)
+        with shard.lock:
+            shard.sessions.pop(session_id, None)
+            if self.__restore is not None:
+                # Take a saved session too, so it cannot come back later
+                self.__restore(session_id)
+
+    def purge_expired(self) -> int:
+        """Remove every expired session (maintenance task, not request path)"""
+        removed = 0
+        now = self.__clock()
+        for shard in self.__shards:
+            with shard.lock:
+                before = len(shard.sessions)
+                self.__expire(shard, now, None)
+                removed += before - len(shard.sessions)
+        return removed
+
+    def __len__(self) -> int:
+        return sum(len(shard.sessions) for shard in self.__shards)
+
+    def __str__(self) -> str:
+        return f"SessionStore(sessions={len(self)}, shards={len(self.__shards)})"
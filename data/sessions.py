@@ -2,49 +2,50 @@
 Session management for authentication
 """
 
-import uuid
-from typing import Dict, Optional
+from typing import Optional
+from data.directory import AccountDirectory
 from data.exceptions import AuthenticationError, AuthorizationError
+from data.session_store import (SessionStore, DEFAULT_IDLE_TTL,
+                                DEFAULT_ABSOLUTE_TTL, DEFAULT_MAX_SESSIONS)
+from data.snapshot import restore_sessions
 
 
 class Authentication:
     """Handles user and admin authentication"""
     
-    def __init__(self):
-        self.__user_sessions: Dict[str, str] = {}  # session_id -> user_id
-        self.__admin_sessions: Dict[str, str] = {}  # session_id -> admin_id
+    def __init__(self, idle_ttl: float = DEFAULT_IDLE_TTL,
+                 absolute_ttl: float = DEFAULT_ABSOLUTE_TTL,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS):
+        # session_id -> user_id
+        self.__user_sessions = SessionStore(idle_ttl, absolute_ttl, max_sessions)
+        # session_id -> admin_id
+        self.__admin_sessions = SessionStore(idle_ttl, absolute_ttl, max_sessions)
     
-    def login_user(self, users: Dict, username: str, password: str) -> str:
+    @property
+    def user_sessions(self) -> SessionStore:
+        return self.__user_sessions
+    
+    @property
+    def admin_sessions(self) -> SessionStore:
+        return self.__admin_sessions
+    
+    def login_user(self, users: AccountDirectory, username: str, password: str) -> str:
         """Authenticate user and create session"""
-        user = None
-        for u in users.values():
-            if u.username == username:
-                user = u
-                break
-        
+        user = users.find_by_username(username)
         if not user or not user.verify_password(password) or not user.is_active():
             raise AuthenticationError("Invalid username or password")
         
         # Create session
-        session_id = str(uuid.uuid4())
-        self.__user_sessions[session_id] = user.user_id
-        return session_id
+        return self.__user_sessions.create(user.user_id)
     
-    def login_admin(self, admins: Dict, username: str, password: str) -> str:
+    def login_admin(self, admins: AccountDirectory, username: str, password: str) -> str:
         """Authenticate admin and create session"""
-        admin = None
-        for a in admins.values():
-            if a.username == username:
-                admin = a
-                break
-        
+        admin = admins.find_by_username(username)
         if not admin or not admin.verify_password(password) or not admin.is_active():
             raise AuthenticationError("Invalid admin credentials")
         
         # Create session
-        session_id = str(uuid.uuid4())
-        self.__admin_sessions[session_id] = admin.admin_id
-        return session_id
+        return self.__admin_sessions.create(admin.admin_id)
     
     def validate_user_session(self, session_id: str) -> Optional[str]:
         """Validate user session and return user ID"""
@@ -56,14 +57,21 @@ class Authentication:
     
     def logout_user(self, session_id: str):
         """Logout user by removing session"""
-        if session_id in self.__user_sessions:
-            del self.__user_sessions[session_id]
+        self.__user_sessions.remove(session_id)
     
     def logout_admin(self, session_id: str):
         """Logout admin by removing session"""
-        if session_id in self.__admin_sessions:
-            del self.__admin_sessions[session_id]
+        self.__admin_sessions.remove(session_id)
+    
+    def purge_expired_sessions(self) -> int:
+        """Remove all expired user and admin sessions"""
+        return (self.__user_sessions.purge_expired() +
+                self.__admin_sessions.purge_expired())
 
 
 # Global authentication instance
-auth_manager = Authentication()
\ No newline at end of file
+auth_manager = Authentication()
+
+# Resume the sessions saved in the last snapshot, if there is one
+restore_sessions(auth_manager.user_sessions, "user_sessions")
+restore_sessions(auth_manager.admin_sessions, "admin_sessions")
\ No newline at end of file
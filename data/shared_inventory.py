@@ -0,0 +1,219 @@
+"""
+Stock counters in shared memory for running several worker processes
+
+Every process attaches to one named shared memory block holding a
+fixed-width 64-bit stock counter per product slot, plus the product ID
+of each slot so processes agree on the slot numbers. Updates take a
+striped lock that is both a thread lock and a byte-range lock on a lock
+file, so reserve and release are atomic across threads and processes.
+"""
+
+import os
+import struct
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+from data import config
+
+try:
+    import fcntl
+except ImportError:  # Windows has no byte-range locks in fcntl
+    fcntl = None
+
+# Layout: <slots in use> then KEY_SIZE bytes of product ID per slot, then one counter per slot
+HEADER = struct.Struct("<q")
+KEY_SIZE = 64
+COUNTER_SIZE = 8
+LOCK_STRIPES = 64
+REGISTRY_STRIPE = LOCK_STRIPES
+
+
+class SharedStockCounters:
+    """
+    Per-product stock counters shared by all processes attached to name
+
+    The first process to open a name creates the block; the others
+    attach to it. The block stays until unlink() is called, so workers
+    can come and go.
+    """
+
+    def __init__(self, name: str, capacity: int = 65536, lock_path: Optional[str] = None):
+        """
+        Args:
+            name: Shared memory block name
+            capacity: Product slots in the block
+            lock_path: Lock file (a file named after the block in the temp directory by default)
+
+        Raises:
+            RuntimeError: If the platform has no byte-range file locks
+        """
+        if fcntl is None:
+            raise RuntimeError("Shared inventory needs fcntl file locks (POSIX only)")
+        # Imported here so processes keeping stock locally do not load multiprocessing
+        from multiprocessing import resource_tracker, shared_memory
+        size = HEADER.size + capacity * (KEY_SIZE + COUNTER_SIZE)
+        try:
+            self.__memory = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            self.__memory = shared_memory.SharedMemory(name)
+            if self.__memory.size < size:
+                self.__memory.close()
+                raise ValueError(f"Shared inventory {name} is smaller than {capacity} slots")
+        # The block outlives any one worker; only unlink() removes it
+        resource_tracker.unregister(self.__memory._name, "shared_memory")
+
+        self.__name = name
+        self.__capacity = capacity
+        keys_end = HEADER.size + capacity * KEY_SIZE
+        self.__counters = self.__memory.buf[keys_end:keys_end + capacity * COUNTER_SIZE].cast("q")
+        self.__lock_file = open(lock_path or os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a")
+        self.__thread_locks = [threading.Lock() for _ in range(LOCK_STRIPES + 1)]
+        self.__slots: Dict[str, int] = {}
+        self.__known = 0
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    def __len__(self) -> int:
+        return HEADER.unpack_from(self.__memory.buf, 0)[0]
+
+    def __lock(self, stripe: int):
+        self.__thread_locks[stripe].acquire()
+        fcntl.lockf(self.__lock_file.fileno(), fcntl.LOCK_EX, 1, stripe)
+
+    def __unlock(self, stripe: int):
+        fcntl.lockf(self.__lock_file.fileno(), fcntl.LOCK_UN, 1, stripe)
+        self.__thread_locks[stripe].release()
+
+    def __read_new_slots(self):
+        """Learn the slots other processes registered since the last look"""
+        used = len(self)
+        buffer = self.__memory.buf
+        for slot in range(self.__known, used):
+            offset = HEADER.size + slot * KEY_SIZE
+            key = bytes(buffer[offset:offset + KEY_SIZE]).rstrip(b"\0").decode("utf-8")
+            self.__slots[key] = slot
+        self.__known = used
+
+    def slot_of(self, product_id: str) -> Optional[int]:
+        """Slot of a registered product, or None"""
+        slot = self.__slots.get(product_id)
+        if slot is None:
+            self.__lock(REGISTRY_STRIPE)
+            try:
+                self.__read_new_slots()
+            finally:
+                self.__unlock(REGISTRY_STRIPE)
+            slot = self.__slots.get(product_id)
+        return slot
+
+    def register(self, product_id: str, stock: int) -> int:
+        """
+        Give a product a slot, starting at stock if no process registered it before
+
+        Returns:
+            The product's slot
+
+        Raises:
+            ValueError: If the product ID is too long or every slot is taken
+        """
+        slot = self.__slots.get(product_id)
+        if slot is not None:
+            return slot
+        key = product_id.encode("utf-8")
+        if len(key) > KEY_SIZE:
+            raise ValueError(f"Product ID longer than {KEY_SIZE} bytes: {product_id}")
+        self.__lock(REGISTRY_STRIPE)
+        try:
+            self.__read_new_slots()
+            slot = self.__slots.get(product_id)
+            if slot is None:
+                slot = self.__known
+                if slot >= self.__capacity:
+                    raise ValueError("Shared inventory is full")
+                offset = HEADER.size + slot * KEY_SIZE
+                self.__memory.buf[offset:offset + len(key)] = key
+                self.__counters[slot] = stock
+                # Publish the slot only once its key and counter are written
+                HEADER.pack_into(self.__memory.buf, 0, slot + 1)
+                self.__slots[product_id] = slot
+                self.__known = slot + 1
+        finally:
+            self.__unlock(REGISTRY_STRIPE)
+        return slot
+
+    def get(self, slot: int) -> int:
+        return self.__counters[slot]
+
+    def set(self, slot: int, stock: int):
+        stripe = slot % LOCK_STRIPES
+        self.__lock(stripe)
+        try:
+            self.__counters[slot] = stock
+        finally:
+            self.__unlock(stripe)
+
+    def reserve(self, slot: int, quantity: int) -> bool:
+        """Take quantity from the counter if that much is left"""
+        stripe = slot % LOCK_STRIPES
+        self.__lock(stripe)
+        try:
+            if self.__counters[slot] < quantity:
+                return False
+            self.__counters[slot] -= quantity
+            return True
+        finally:
+            self.__unlock(stripe)
+
+    def release(self, slot: int, quantity: int):
+        """Give quantity back to the counter"""
+        stripe = slot % LOCK_STRIPES
+        self.__lock(stripe)
+        try:
+            self.__counters[slot] += quantity
+        finally:
+            self.__unlock(stripe)
+
+    def snapshot(self) -> List[int]:
+        """Current level of every registered slot"""
+        return self.__counters[:len(self)].tolist()
+
+    def close(self):
+        """Detach this process from the block"""
+        self.__counters.release()
+        self.__memory.close()
+        self.__lock_file.close()
+
+    def unlink(self):
+        """Remove the block and its lock file once every worker is done with it"""
+        from multiprocessing import resource_tracker
+        # unlink() unregisters the block from the resource tracker, which __init__ already did
+        resource_tracker.register(self.__memory._name, "shared_memory")
+        self.__memory.unlink()
+        try:
+            os.remove(self.__lock_file.name)
+        except FileNotFoundError:
+            pass
+
+
+def create_shared_stock() -> Optional[SharedStockCounters]:
+    """
+    Open the configured shared stock counters
+
+    Returns:
+        The counters in "shared" inventory mode, None in "local" mode
+
+    Raises:
+        ValueError: If the configured inventory mode is unknown
+    """
+    if config.INVENTORY_MODE == "local":
+        return None
+    if config.INVENTORY_MODE == "shared":
+        return SharedStockCounters(config.INVENTORY_SHARED_NAME, config.INVENTORY_SHARED_SLOTS)
+    raise ValueError(f"Unknown inventory mode: {config.INVENTORY_MODE}")
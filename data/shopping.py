@@ -0,0 +1,145 @@
+"""
+Cart and checkout steps shared by the sync and async user functions
+"""
+
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from data.carts import carts_data, Cart, CartItem
+from data.cart_lifecycle import cart_lifecycle
+from data.products import products_data
+from data.inventory import inventory, Reservation
+from data.analytics import sales_analytics
+from data.exceptions import ProductNotFoundError, CartError
+
+
+class PendingCheckout(NamedTuple):
+    """A checkout between stock reservation and payment"""
+    cart: Cart
+    total_amount: float
+    reservation: Reservation
+    lines: List[Tuple[str, str, int, float]]   # (product ID, category ID, quantity, unit price) as charged
+
+
+class HeldCheckout(NamedTuple):
+    """A checkout whose charge is in doubt, keeping its stock until the charge is settled"""
+    user_id: str
+    pending: PendingCheckout
+    payment_method: str
+
+
+# Global held checkouts by transaction ID
+_held_checkouts: Dict[str, HeldCheckout] = {}
+_held_lock = threading.Lock()
+
+
+def add_item(user_id: str, product_id: str, quantity: int):
+    """
+    Add quantity of product to the user's cart, creating the cart if needed
+
+    Returns:
+        The product added
+
+    Raises:
+        ProductNotFoundError: If product not found or inactive
+        CartError: If cart operation fails
+    """
+    product = products_data.get(product_id)
+    if product is None:
+        raise ProductNotFoundError(f"Product with ID {product_id} not found")
+    if not product.is_active():
+        raise ProductNotFoundError(f"Product {product.name} is not available")
+
+    cart = cart_lifecycle.open(user_id, create=True)
+    cart.add_item(product, quantity)
+    carts_data.mark_dirty(user_id)
+    return product
+
+
+def remove_item(user_id: str, product_id: str) -> CartItem:
+    """
+    Remove product from the user's cart
+
+    Returns:
+        The removed cart item
+
+    Raises:
+        CartError: If the user has no cart or the product is not in it
+    """
+    cart = cart_lifecycle.open(user_id)
+    if cart is None:
+        raise CartError("Cart is empty")
+    item = cart.remove_item(product_id)
+    carts_data.mark_dirty(user_id)
+    return item
+
+
+def get_cart(user_id: str) -> Optional[Cart]:
+    """Get the user's cart, or None if it is missing or empty"""
+    cart = cart_lifecycle.open(user_id)
+    if cart is None or cart.is_empty():
+        return None
+    return cart
+
+
+def begin_checkout(user_id: str) -> PendingCheckout:
+    """
+    Reserve stock for the user's cart ahead of payment
+
+    Returns:
+        PendingCheckout with the amount to charge, the stock reservation and
+        the prices it was computed from
+
+    Raises:
+        CartError: If the cart is empty or stock is insufficient
+    """
+    cart = get_cart(user_id)
+    if cart is None:
+        raise CartError("Cannot checkout with empty cart")
+    with _held_lock:
+        if any(held.user_id == user_id for held in _held_checkouts.values()):
+            raise CartError("A previous payment is still being confirmed, please try again later")
+    total_amount = cart.get_total_amount()
+    lines = [(item.product.product_id, item.product.category_id, item.quantity, item.product.price)
+             for item in cart.get_items()]
+    return PendingCheckout(cart, total_amount, inventory.reserve_cart(cart), lines)
+
+
+def complete_checkout(user_id: str, pending: PendingCheckout, payment_method: str):
+    """Make the reservation final, record the sale and empty the cart after a successful payment"""
+    pending.reservation.commit()
+    for product, _ in pending.reservation.lines:
+        products_data.mark_dirty(product.product_id)
+    # Count what was charged, even if a price changed during the payment
+    sales_analytics.record_order(pending.lines, payment_method, pending.total_amount)
+    pending.cart.clear()
+    carts_data.mark_dirty(user_id)
+
+
+def hold_checkout(transaction_id: str, user_id: str, pending: PendingCheckout,
+                  payment_method: str):
+    """Keep a checkout's stock reserved while its charge is in doubt"""
+    with _held_lock:
+        _held_checkouts[transaction_id] = HeldCheckout(user_id, pending, payment_method)
+
+
+def settle_held_checkouts(outcomes: Dict[str, str]) -> int:
+    """
+    Complete or roll back held checkouts whose charge has been settled
+
+    Args:
+        outcomes: Status per transaction ID, as returned by Payment.settle_in_doubt
+
+    Returns:
+        Number of held checkouts settled
+    """
+    with _held_lock:
+        settled = [(status, _held_checkouts.pop(transaction_id))
+                   for transaction_id, status in outcomes.items()
+                   if status != "PENDING" and transaction_id in _held_checkouts]
+    for status, held in settled:
+        if status == "SUCCESS":
+            complete_checkout(held.user_id, held.pending, held.payment_method)
+        else:
+            held.pending.reservation.rollback()
+    return len(settled)
@@ -0,0 +1,473 @@
+"""
+Binary snapshots of the in-memory stores for fast warm restarts
+
+A snapshot file holds one section per store (products, categories,
+carts, user and admin sessions). Each section stores its records sorted
+by key, with an offset table at the end, so a restarted process can
+memory-map the file and decode a record only when it is first needed.
+
+Layout (little-endian):
+    header     magic, format version, marshal version, creation time,
+               section count, directory offset
+    sections   field names, then per record <key length><key><payload>,
+               then (count + 1) record offsets
+    directory  name, offset, offset table position, count and CRC-32
+               of every section
+
+Payloads are marshal-encoded tuples of field values. Snapshots are
+written to a temporary file and renamed into place, so a crash never
+leaves a half-written snapshot behind.
+"""
+
+import heapq
+import logging
+import marshal
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from data import config
+from data.exceptions import SnapshotError
+
+MAGIC = b"SHOPSNAP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIdIQ")
+DIRECTORY_ENTRY = struct.Struct("<32sQQQI")
+FIELDS_LENGTH = struct.Struct("<I")
+KEY_LENGTH = struct.Struct("<H")
+OFFSET = struct.Struct("<Q")
+WRITE_BUFFER_SIZE = 1 << 20
+ENCODE_ATTEMPTS = 3
+
+_log = logging.getLogger(__name__)
+
+
+class SnapshotSection:
+    """
+    Sorted records of one store inside a mapped snapshot file
+
+    Records are handed out with take(): each one at most once, after
+    which the live store owns it. The CRC is checked on first use.
+    """
+
+    def __init__(self, name: str, buffer: memoryview, offset: int, index_offset: int,
+                 count: int, checksum: int):
+        self.__name = name
+        self.__buffer = buffer
+        self.__offset = offset
+        self.__count = count
+        self.__checksum = checksum
+        self.__end = index_offset + (count + 1) * OFFSET.size
+        (fields_length,) = FIELDS_LENGTH.unpack_from(buffer, offset)
+        fields_start = offset + FIELDS_LENGTH.size
+        self.__fields: Tuple[str, ...] = marshal.loads(buffer[fields_start:fields_start + fields_length])
+        self.__records_start = fields_start + fields_length
+        self.__offsets = buffer[index_offset:self.__end].cast("Q")
+        if sys.byteorder == "big":
+            self.__offsets = array("Q", self.__offsets)
+            self.__offsets.byteswap()
+        self.__taken = bytearray(count)
+        self.__remaining = count
+        self.__verified = False
+        self.__lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return self.__fields
+
+    @property
+    def remaining(self) -> int:
+        """Records not taken yet"""
+        return self.__remaining
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __verify(self):
+        if not self.__verified:
+            if zlib.crc32(self.__buffer[self.__offset:self.__end]) != self.__checksum:
+                raise SnapshotError(f"Snapshot section {self.__name} is corrupt")
+            self.__verified = True
+
+    def key(self, index: int) -> bytes:
+        start = self.__records_start + self.__offsets[index]
+        (length,) = KEY_LENGTH.unpack_from(self.__buffer, start)
+        start += KEY_LENGTH.size
+        return bytes(self.__buffer[start:start + length])
+
+    def payload(self, index: int) -> memoryview:
+        """Encoded field values of a record, straight from the file"""
+        start = self.__records_start + self.__offsets[index]
+        (length,) = KEY_LENGTH.unpack_from(self.__buffer, start)
+        return self.__buffer[start + KEY_LENGTH.size + length:
+                             self.__records_start + self.__offsets[index + 1]]
+
+    def decode(self, payload) -> Dict:
+        return dict(zip(self.__fields, marshal.loads(payload)))
+
+    def find(self, key: str) -> Optional[int]:
+        """Index of the record stored under key, or None"""
+        target = key.encode("utf-8")
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.__count and self.key(low) == target:
+            return low
+        return None
+
+    def take(self, key: str) -> Optional[Dict]:
+        """Decoded record stored under key, unless absent or already taken"""
+        if not self.__remaining:
+            return None
+        index = self.find(key)
+        if index is None:
+            return None
+        with self.__lock:
+            if self.__taken[index]:
+                return None
+            self.__verify()
+            self.__taken[index] = 1
+            self.__remaining -= 1
+        return self.decode(self.payload(index))
+
+    def take_all(self) -> Iterator[Tuple[str, Dict]]:
+        """Take every remaining record"""
+        if not self.__remaining:
+            return
+        with self.__lock:
+            self.__verify()
+            taken, self.__taken = self.__taken, bytearray(b"\1" * self.__count)
+            self.__remaining = 0
+        for index in range(self.__count):
+            if not taken[index]:
+                yield self.key(index).decode("utf-8"), self.decode(self.payload(index))
+
+    def untaken(self) -> Iterator[Tuple[str, memoryview]]:
+        """(key, payload) of the records not taken at the time of the call, in key order"""
+        with self.__lock:
+            if not self.__remaining:
+                return iter(())
+            self.__verify()
+            taken = bytes(self.__taken)
+        return ((self.key(index).decode("utf-8"), self.payload(index))
+                for index in range(self.__count) if not taken[index])
+
+
+class Snapshot:
+    """A snapshot file mapped read-only into memory"""
+
+    def __init__(self, path: str):
+        self.__path = path
+        with open(path, "rb") as snapshot_file:
+            try:
+                self.__map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SnapshotError(f"Snapshot {path} is empty")
+        buffer = memoryview(self.__map)
+        if len(buffer) < HEADER.size:
+            raise SnapshotError(f"Snapshot {path} is truncated")
+        magic, version, marshal_version, created_at, count, directory = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a snapshot file")
+        if version != FORMAT_VERSION or marshal_version != marshal.version:
+            raise SnapshotError(f"Snapshot {path} has unsupported version {version}.{marshal_version}")
+        if directory + count * DIRECTORY_ENTRY.size > len(buffer):
+            raise SnapshotError(f"Snapshot {path} is truncated")
+        self.__created_at = created_at
+        self.__sections: Dict[str, SnapshotSection] = {}
+        for number in range(count):
+            name, offset, index_offset, records, checksum = DIRECTORY_ENTRY.unpack_from(
+                buffer, directory + number * DIRECTORY_ENTRY.size)
+            name = name.rstrip(b"\0").decode("utf-8")
+            self.__sections[name] = SnapshotSection(name, buffer, offset, index_offset,
+                                                    records, checksum)
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def created_at(self) -> float:
+        """Wall-clock time the snapshot was taken"""
+        return self.__created_at
+
+    def section(self, name: str) -> Optional[SnapshotSection]:
+        return self.__sections.get(name)
+
+    def section_names(self) -> List[str]:
+        return list(self.__sections)
+
+
+class SnapshotStats(NamedTuple):
+    """Result of writing one snapshot"""
+    path: str
+    records: Dict[str, int]
+    size: int
+    seconds: float
+
+
+# A section source returns field names and (key, payload) pairs sorted by key
+SectionSource = Callable[[], Tuple[Tuple[str, ...], Iterable[Tuple[str, bytes]]]]
+
+
+def write_snapshot(path: str, sources: Dict[str, SectionSource]) -> SnapshotStats:
+    """
+    Write every section to a new snapshot file and atomically replace path
+
+    Returns:
+        Records written per section, file size and time taken
+    """
+    start = time.perf_counter()
+    temporary_path = path + ".tmp"
+    directory: List[bytes] = []
+    records: Dict[str, int] = {}
+
+    with open(temporary_path, "wb", buffering=WRITE_BUFFER_SIZE) as snapshot_file:
+        snapshot_file.write(bytes(HEADER.size))
+        position = HEADER.size
+        for name, source in sources.items():
+            fields, entries = source()
+            section_offset = position
+            encoded_fields = marshal.dumps(tuple(fields))
+            chunk = FIELDS_LENGTH.pack(len(encoded_fields)) + encoded_fields
+            checksum = zlib.crc32(chunk)
+            snapshot_file.write(chunk)
+            position += len(chunk)
+
+            offsets = array("Q", [0])
+            relative = 0
+            for key, payload in entries:
+                encoded_key = key.encode("utf-8")
+                chunk = KEY_LENGTH.pack(len(encoded_key)) + encoded_key + payload
+                checksum = zlib.crc32(chunk, checksum)
+                snapshot_file.write(chunk)
+                relative += len(chunk)
+                offsets.append(relative)
+            position += relative
+
+            index_offset = position
+            if sys.byteorder == "big":
+                offsets.byteswap()
+            chunk = offsets.tobytes()
+            checksum = zlib.crc32(chunk, checksum)
+            snapshot_file.write(chunk)
+            position += len(chunk)
+
+            records[name] = len(offsets) - 1
+            directory.append(DIRECTORY_ENTRY.pack(name.encode("utf-8"), section_offset,
+                                                  index_offset, len(offsets) - 1, checksum))
+
+        snapshot_file.write(b"".join(directory))
+        size = position + len(directory) * DIRECTORY_ENTRY.size
+        snapshot_file.seek(0)
+        snapshot_file.write(HEADER.pack(MAGIC, FORMAT_VERSION, marshal.version, time.time(),
+                                        len(directory), position))
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+
+    os.replace(temporary_path, path)
+    if hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself durable
+        directory_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+    return SnapshotStats(path, records, size, time.perf_counter() - start)
+
+
+def _encode_values(record: Dict, fields: Tuple[str, ...]) -> bytes:
+    return marshal.dumps(tuple(record.get(field) for field in fields))
+
+
+def _merge_with_base(fields: Optional[Tuple[str, ...]], live: List[Tuple[str, Dict]],
+                     base: Optional[SnapshotSection], pending: Iterator[Tuple[str, memoryview]]):
+    """Combine live records with the pending records still only in the old snapshot"""
+    if fields is None:
+        fields = base.fields if base is not None else ()
+    live.sort(key=lambda entry: entry[0])
+    encoded = ((key, _encode_values(record, fields)) for key, record in live)
+    if base is None:
+        return fields, encoded
+
+    live_keys = {key for key, _ in live}
+    untaken = ((key, payload) for key, payload in pending if key not in live_keys)
+    if base.fields != fields:
+        untaken = ((key, _encode_values(base.decode(payload), fields)) for key, payload in untaken)
+    return fields, heapq.merge(encoded, untaken, key=lambda entry: entry[0])
+
+
+def encode_live(obj, encode: Callable[[object], Dict]) -> Dict:
+    """Encode an object other threads may change meanwhile, trying again if one does"""
+    for attempt in range(ENCODE_ATTEMPTS):
+        try:
+            return encode(obj)
+        except RuntimeError:
+            if attempt == ENCODE_ATTEMPTS - 1:
+                raise
+
+
+def repository_source(repository, encode: Callable[[object], Dict]) -> SectionSource:
+    """Section source for a Repository, passing through records it never loaded"""
+
+    def collect():
+        # Note untaken records first: one taken in between then shows up in both
+        base = repository.snapshot_base()
+        pending = base.untaken() if base is not None else iter(())
+        live = [(key, encode_live(value, encode)) for key, value in list(dict.items(repository))]
+        fields = tuple(live[0][1]) if live else None
+        return _merge_with_base(fields, live, base, pending)
+
+    return collect
+
+
+SESSION_FIELDS = ("owner_id", "created_at", "last_seen")
+
+
+class SessionRestore:
+    """Looks up sessions of a snapshot section for a SessionStore"""
+
+    def __init__(self, section: SnapshotSection):
+        self.__section = section
+
+    @property
+    def section(self) -> SnapshotSection:
+        return self.__section
+
+    def __call__(self, session_id: str) -> Optional[Tuple[str, float, float]]:
+        """(owner ID, created, last seen) in wall-clock time, taking the session"""
+        record = self.__section.take(session_id)
+        if record is None:
+            return None
+        return record["owner_id"], record["created_at"], record["last_seen"]
+
+
+def session_source(store, restore: Optional[SessionRestore]) -> SectionSource:
+    """Section source for a SessionStore"""
+
+    def collect():
+        base = restore.section if restore is not None else None
+        pending = base.untaken() if base is not None else iter(())
+        live = [(session_id, {"owner_id": owner_id, "created_at": created_at, "last_seen": last_seen})
+                for session_id, owner_id, created_at, last_seen in store.export()]
+        return _merge_with_base(SESSION_FIELDS, live, base, pending)
+
+    return collect
+
+
+class Snapshotter:
+    """Writes snapshots on demand and periodically from a background thread"""
+
+    def __init__(self, path: str, sources: Dict[str, SectionSource], interval: float = 60.0):
+        self.__path = path
+        self.__sources = sources
+        self.__interval = interval
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.__last: Optional[SnapshotStats] = None
+        self.__last_error: Optional[Exception] = None
+
+    @property
+    def last(self) -> Optional[SnapshotStats]:
+        """Stats of the most recent snapshot"""
+        return self.__last
+
+    @property
+    def last_error(self) -> Optional[Exception]:
+        """Error of the most recent background snapshot, if it failed"""
+        return self.__last_error
+
+    def snapshot(self) -> SnapshotStats:
+        """Write a snapshot now; concurrent calls are serialized"""
+        with self.__lock:
+            self.__last = write_snapshot(self.__path, self.__sources)
+            return self.__last
+
+    def start(self):
+        """Take snapshots every interval seconds in the background"""
+        if self.__thread is None:
+            self.__thread = threading.Thread(target=self.__loop, name="snapshotter", daemon=True)
+            self.__thread.start()
+
+    def __loop(self):
+        while not self.__stop.wait(self.__interval):
+            try:
+                self.snapshot()
+                self.__last_error = None
+            except Exception as e:
+                # Keep snapshotting; the next interval may well succeed
+                self.__last_error = e
+                _log.exception("Background snapshot failed")
+
+    def stop(self, final_snapshot: bool = True):
+        """Stop the background thread, then optionally write one last snapshot"""
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        if final_snapshot:
+            self.snapshot()
+
+
+_snapshot: Optional[Snapshot] = None
+_snapshot_opened = False
+_session_restores: Dict[str, SessionRestore] = {}
+
+
+def open_snapshot() -> Optional[Snapshot]:
+    """The configured snapshot file, mapped once per process; None if there is none"""
+    global _snapshot, _snapshot_opened
+    if not _snapshot_opened:
+        _snapshot_opened = True
+        if config.SNAPSHOT_PATH and os.path.exists(config.SNAPSHOT_PATH):
+            _snapshot = Snapshot(config.SNAPSHOT_PATH)
+    return _snapshot
+
+
+def snapshot_section(name: str) -> Optional[SnapshotSection]:
+    """Section of the configured snapshot to restore a store from, if any"""
+    snapshot = open_snapshot()
+    return snapshot.section(name) if snapshot is not None else None
+
+
+def restore_sessions(store, name: str):
+    """Let store resume the sessions saved in section name of the configured snapshot"""
+    section = snapshot_section(name)
+    if section is not None:
+        restore = _session_restores[name] = SessionRestore(section)
+        store.restore_from(restore)
+
+
+def create_snapshotter(path: Optional[str] = None, interval: Optional[float] = None) -> Snapshotter:
+    """Snapshotter covering products, categories, carts and sessions"""
+    from data.products import Product, products_data
+    from data.categories import Category, categories_data
+    from data.carts import Cart, carts_data
+    from data.sessions import auth_manager
+
+    sources = {
+        "products": repository_source(products_data, Product.to_record),
+        "categories": repository_source(categories_data, Category.to_record),
+        "carts": repository_source(carts_data, Cart.to_record),
+        "user_sessions": session_source(auth_manager.user_sessions,
+                                        _session_restores.get("user_sessions")),
+        "admin_sessions": session_source(auth_manager.admin_sessions,
+                                         _session_restores.get("admin_sessions")),
+    }
+    return Snapshotter(path or config.SNAPSHOT_PATH, sources,
+                       interval if interval is not None else config.SNAPSHOT_INTERVAL)
@@ -2,6 +2,11 @@
 User class and user data management
 """
 
+from typing import Dict
+from data.directory import AccountDirectory
+from data.repository import create_repository
+
+
 class User:
     """Represents a user in the shopping system"""
     
@@ -32,12 +37,41 @@ class User:
         """Check if user account is active"""
         return self.__is_active
     
+    def deactivate(self):
+        """Deactivate the user account"""
+        self.__is_active = False
+    
+    def to_record(self) -> Dict:
+        """Convert user to a plain dict for storage"""
+        return {
+            "user_id": self.__user_id,
+            "username": self.__username,
+            "password": self.__password,
+            "email": self.__email,
+            "is_active": self.__is_active
+        }
+    
+    @classmethod
+    def from_record(cls, record: Dict) -> "User":
+        """Rebuild user from a dict created by to_record"""
+        user = cls(record["user_id"], record["username"], record["password"], record["email"])
+        user.__is_active = record["is_active"]
+        return user
+    
     def __str__(self) -> str:
         return f"User(id={self.__user_id}, username={self.__username})"
 
 
-# Demo users data
-users_data = {
-    "user1": User("user1", "john_doe", "password123", "john@email.com"),
-    "user2": User("user2", "jane_smith", "password456", "jane@email.com")
-}
\ No newline at end of file
+def _demo_users() -> Dict[str, User]:
+    """Demo users data"""
+    return {
+        "user1": User("user1", "john_doe", "password123", "john@email.com"),
+        "user2": User("user2", "jane_smith", "password456", "jane@email.com")
+    }
+
+
+users_data = create_repository("users", User.to_record, User.from_record,
+                               _demo_users)
+
+# Username/email index over users_data
+user_directory = AccountDirectory(users_data, "user_id")
@@ -3,268 +3,312 @@ Main Shopping Application - OOP Design with Modular Structure
 Entry point for the shopping application with user and admin interfaces
 """
 
-# Import authentication functions
-from Authentication.user_login import user_login, user_logout
-from Authentication.admin_login import admin_login, admin_logout
-
-# Import user functions
-from user_Functions.view_catalog import view_catalog
-from user_Functions.add_to_cart import add_to_cart
-from user_Functions.remove_from_cart import remove_from_cart
-from user_Functions.view_cart import view_cart
-from user_Functions.checkout import checkout
-
-# Import admin functions
-from AdminFunctions.add_product import add_product
-from AdminFunctions.update_product import update_product
-from AdminFunctions.delete_product import delete_product
-from AdminFunctions.add_category import add_category
-from AdminFunctions.delete_category import delete_category
-
-# Import data for admin views
-from data.products import products_data
-from data.categories import categories_data
+import atexit
+
+from data import config
+from data.lazy import lazy_function
 from data.exceptions import AuthenticationError, CartError, PaymentError, ProductNotFoundError, CategoryNotFoundError
 
+# All console output goes through the buffered renderer
+from renderer import console
+
+# Feature modules and the data stores behind them load on first use,
+# so the first menu appears without building the catalog
+
+# Authentication functions
+user_login = lazy_function("Authentication.user_login", "user_login")
+user_logout = lazy_function("Authentication.user_login", "user_logout")
+admin_login = lazy_function("Authentication.admin_login", "admin_login")
+admin_logout = lazy_function("Authentication.admin_login", "admin_logout")
+
+# User functions
+view_catalog = lazy_function("user_Functions.view_catalog", "view_catalog")
+search_products = lazy_function("user_Functions.search_products", "search_products")
+add_to_cart = lazy_function("user_Functions.add_to_cart", "add_to_cart")
+remove_from_cart = lazy_function("user_Functions.remove_from_cart", "remove_from_cart")
+view_cart = lazy_function("user_Functions.view_cart", "view_cart")
+checkout = lazy_function("user_Functions.checkout", "checkout")
+
+# Admin functions
+add_product = lazy_function("AdminFunctions.add_product", "add_product")
+update_product = lazy_function("AdminFunctions.update_product", "update_product")
+delete_product = lazy_function("AdminFunctions.delete_product", "delete_product")
+add_category = lazy_function("AdminFunctions.add_category", "add_category")
+delete_category = lazy_function("AdminFunctions.delete_category", "delete_category")
+import_catalog = lazy_function("AdminFunctions.import_catalog", "import_catalog")
+sales_dashboard = lazy_function("AdminFunctions.sales_dashboard", "sales_dashboard")
+
 
 def admin_view_products(session_id: str):
     """View all products (admin function)"""
     from Authentication.admin_login import validate_admin_session
+    from data.products import products_data
+    from data.categories import categories_data
     validate_admin_session(session_id)
-    
-    print("\n=== All Products (Admin View) ===")
-    if not products_data:
-        print("No products found.")
-        return
-    
-    for product in products_data.values():
-        category = categories_data.get(product.category_id)
-        category_name = category.name if category else "Unknown"
-        status = "Active" if product.is_active() else "Inactive"
-        
-        print(f"ID: {product.product_id} | {product.name} | Rs. {product.price:.2f}")
-        print(f"Category: {category_name} | Stock: {product.stock} | Status: {status}")
-        print(f"Description: {product.description}")
-        print("-" * 50)
+    console.all_products(products_data.values(), categories_data)
 
 
 def admin_view_categories(session_id: str):
     """View all categories (admin function)"""
     from Authentication.admin_login import validate_admin_session
+    from data.products import category_index
+    from data.categories import categories_data
+    validate_admin_session(session_id)
+    product_counts = {category_id: category_index.count(category_id)
+                      for category_id in categories_data}
+    console.all_categories(categories_data.values(), product_counts)
+
+
+def browse_catalog(session_id: str):
+    """Show the catalog page by page until the user stops"""
+    from data.categories import categories_data
+    page = view_catalog(session_id)
+    console.catalog_page(page, categories_data)
+    while page.next_cursor:
+        more = console.prompt("Press Enter for the next page or 'q' to stop: ").strip().lower()
+        if more == "q":
+            break
+        page = view_catalog(session_id, cursor=page.next_cursor)
+        console.catalog_page(page, categories_data)
+
+
+def admin_view_performance_stats(session_id: str):
+    """Dump cart, function call, error and latency statistics (admin function)"""
+    from Authentication.admin_login import validate_admin_session
+    from data.instrumentation import metrics
+    from data.cart_lifecycle import cart_lifecycle
     validate_admin_session(session_id)
-    
-    print("\n=== All Categories (Admin View) ===")
-    if not categories_data:
-        print("No categories found.")
+
+    console.line("\n=== Performance Stats ===")
+    console.line(cart_lifecycle.to_prometheus().rstrip("\n"))
+    if not metrics.enabled:
+        console.line("Instrumentation is disabled. Set SHOP_INSTRUMENTATION=1 to enable it.")
         return
-    
-    for category in categories_data.values():
-        status = "Active" if category.is_active() else "Inactive"
-        product_count = len([p for p in products_data.values() 
-                           if p.category_id == category.category_id and p.is_active()])
-        
-        print(f"ID: {category.category_id} | {category.name} | Status: {status}")
-        print(f"Products: {product_count} | Description: {category.description}")
-        print("-" * 50)
+    console.line(metrics.to_prometheus().rstrip("\n"))
 
 
 def admin_menu(session_id: str):
     """Display and handle admin menu"""
     while True:
-        print("\n=== Admin Panel ===")
-        print("1. Add Product")
-        print("2. Update Product") 
-        print("3. Delete Product")
-        print("4. Add Category")
-        print("5. Delete Category")
-        print("6. View All Products")
-        print("7. View All Categories")
-        print("8. Logout")
-        
+        console.menu("Admin Panel", ["Add Product", "Update Product", "Delete Product",
+                                     "Add Category", "Delete Category", "View All Products",
+                                     "View All Categories", "View Performance Stats",
+                                     "Import Catalog", "Sales Dashboard", "Logout"])
+
         try:
-            choice = input("Enter your choice (1-8): ").strip()
-            
+            choice = console.prompt("Enter your choice (1-11): ").strip()
+
             if choice == "1":
                 # Add Product
-                name = input("Enter product name: ").strip()
-                price = float(input("Enter product price: "))
-                
+                name = console.prompt("Enter product name: ").strip()
+                price = float(console.prompt("Enter product price: "))
+
                 # Show available categories
                 admin_view_categories(session_id)
-                category_id = input("Enter category ID: ").strip()
-                description = input("Enter product description (optional): ").strip()
-                stock = int(input("Enter initial stock: "))
-                
-                add_product(session_id, name, price, category_id, description, stock)
-            
+                category_id = console.prompt("Enter category ID: ").strip()
+                description = console.prompt("Enter product description (optional): ").strip()
+                stock = int(console.prompt("Enter initial stock: "))
+
+                console.catalog_change(add_product(session_id, name, price, category_id,
+                                                   description, stock))
+
             elif choice == "2":
                 # Update Product
                 admin_view_products(session_id)
-                product_id = input("Enter product ID to update: ").strip()
-                
-                print("Leave blank to keep current value:")
-                name = input("Enter new name: ").strip() or None
-                price_str = input("Enter new price: ").strip()
+                product_id = console.prompt("Enter product ID to update: ").strip()
+
+                console.line("Leave blank to keep current value:")
+                name = console.prompt("Enter new name: ").strip() or None
+                price_str = console.prompt("Enter new price: ").strip()
                 price = float(price_str) if price_str else None
-                description = input("Enter new description: ").strip() or None
-                stock_str = input("Enter new stock: ").strip()
+                description = console.prompt("Enter new description: ").strip() or None
+                stock_str = console.prompt("Enter new stock: ").strip()
                 stock = int(stock_str) if stock_str else None
-                
-                update_product(session_id, product_id, name, price, description, stock)
-            
+
+                console.catalog_change(update_product(session_id, product_id, name, price,
+                                                      description, stock))
+
             elif choice == "3":
                 # Delete Product
                 admin_view_products(session_id)
-                product_id = input("Enter product ID to delete: ").strip()
-                delete_product(session_id, product_id)
-            
+                product_id = console.prompt("Enter product ID to delete: ").strip()
+                console.catalog_change(delete_product(session_id, product_id))
+
             elif choice == "4":
                 # Add Category
-                name = input("Enter category name: ").strip()
-                description = input("Enter category description (optional): ").strip()
-                add_category(session_id, name, description)
-            
+                name = console.prompt("Enter category name: ").strip()
+                description = console.prompt("Enter category description (optional): ").strip()
+                console.catalog_change(add_category(session_id, name, description))
+
             elif choice == "5":
                 # Delete Category
                 admin_view_categories(session_id)
-                category_id = input("Enter category ID to delete: ").strip()
-                delete_category(session_id, category_id)
-            
+                category_id = console.prompt("Enter category ID to delete: ").strip()
+                console.catalog_change(delete_category(session_id, category_id))
+
             elif choice == "6":
                 # View All Products
                 admin_view_products(session_id)
-            
+
             elif choice == "7":
                 # View All Categories
                 admin_view_categories(session_id)
-            
+
             elif choice == "8":
+                # View Performance Stats
+                admin_view_performance_stats(session_id)
+
+            elif choice == "9":
+                # Import Catalog
+                kind = console.prompt("Import products or categories? (products/categories): ").strip().lower()
+                path = console.prompt("Enter CSV or JSONL file path: ").strip()
+                console.import_report(import_catalog(session_id, path, kind or "products"))
+
+            elif choice == "10":
+                # Sales Dashboard
+                console.sales_dashboard(sales_dashboard(session_id))
+
+            elif choice == "11":
                 # Logout
                 admin_logout(session_id)
+                console.line("Admin logged out successfully!")
                 break
-            
+
             else:
-                print("Invalid choice. Please try again.")
-                
-        except (ValueError, ProductNotFoundError, CategoryNotFoundError) as e:
-            print(f"Error: {e}")
+                console.line("Invalid choice. Please try again.")
+
+        except (ValueError, OSError, ProductNotFoundError, CategoryNotFoundError) as e:
+            console.error("Error", e)
         except Exception as e:
-            print(f"An unexpected error occurred: {e}")
+            console.error("An unexpected error occurred", e)
 
 
 def user_menu(session_id: str):
     """Display and handle user menu"""
     while True:
-        print("\n=== User Panel ===")
-        print("1. View Catalog")
-        print("2. Add to Cart")
-        print("3. View Cart")
-        print("4. Remove from Cart")
-        print("5. Checkout")
-        print("6. Logout")
-        
+        console.menu("User Panel", ["View Catalog", "Search Products", "Add to Cart",
+                                    "View Cart", "Remove from Cart", "Checkout", "Logout"])
+
         try:
-            choice = input("Enter your choice (1-6): ").strip()
-            
+            choice = console.prompt("Enter your choice (1-7): ").strip()
+
             if choice == "1":
                 # View Catalog
-                view_catalog(session_id)
-            
+                browse_catalog(session_id)
+
             elif choice == "2":
-                # Add to Cart
-                view_catalog(session_id)
-                product_id = input("Enter product ID to add to cart: ").strip()
-                quantity = int(input("Enter quantity: "))
-                add_to_cart(session_id, product_id, quantity)
-            
+                # Search Products
+                from data.categories import categories_data
+                query = console.prompt("Enter search words: ").strip()
+                console.search_results(search_products(session_id, query), categories_data)
+
             elif choice == "3":
-                # View Cart
-                view_cart(session_id)
-            
+                # Add to Cart
+                browse_catalog(session_id)
+                product_id = console.prompt("Enter product ID to add to cart: ").strip()
+                quantity = int(console.prompt("Enter quantity: "))
+                console.item_added(add_to_cart(session_id, product_id, quantity))
+
             elif choice == "4":
-                # Remove from Cart
-                view_cart(session_id)
-                product_id = input("Enter product ID to remove from cart: ").strip()
-                remove_from_cart(session_id, product_id)
-            
+                # View Cart
+                console.cart_summary(view_cart(session_id))
+
             elif choice == "5":
+                # Remove from Cart
+                console.cart_summary(view_cart(session_id))
+                product_id = console.prompt("Enter product ID to remove from cart: ").strip()
+                console.item_removed(remove_from_cart(session_id, product_id))
+
+            elif choice == "6":
                 # Checkout
-                view_cart(session_id)
-                print("\nPayment Methods:")
-                print("1. UPI")
-                print("2. DEBIT_CARD")
-                print("3. NET_BANKING")
-                
-                payment_choice = input("Select payment method (1-3): ").strip()
+                console.cart_summary(view_cart(session_id))
+                console.menu("Payment Methods", ["UPI", "DEBIT_CARD", "NET_BANKING"])
+
+                payment_choice = console.prompt("Select payment method (1-3): ").strip()
                 payment_methods = {"1": "UPI", "2": "DEBIT_CARD", "3": "NET_BANKING"}
-                
+
                 if payment_choice in payment_methods:
                     payment_method = payment_methods[payment_choice]
-                    checkout(session_id, payment_method)
+                    console.checkout_receipt(checkout(session_id, payment_method))
                 else:
-                    print("Invalid payment method selected.")
-            
-            elif choice == "6":
+                    console.line("Invalid payment method selected.")
+
+            elif choice == "7":
                 # Logout
                 user_logout(session_id)
+                console.line("User logged out successfully!")
                 break
-            
+
             else:
-                print("Invalid choice. Please try again.")
-                
-        except (ValueError, CartError, PaymentError) as e:
-            print(f"Error: {e}")
+                console.line("Invalid choice. Please try again.")
+
+        except (ValueError, CartError, PaymentError, ProductNotFoundError) as e:
+            console.error("Error", e)
         except Exception as e:
-            print(f"An unexpected error occurred: {e}")
+            console.error("An unexpected error occurred", e)
 
 
 def main():
     """Main function to run the shopping application"""
-    print("Welcome to the Demo Marketplace")
-    print("=" * 40)
-    
+    if config.PAYMENT_JOURNAL_PATH or config.STORAGE_BACKEND != "memory" or config.SNAPSHOT_PATH:
+        # Load and index stored payments now rather than during the first checkout
+        import data.payment  # noqa: F401
+    if config.SNAPSHOT_PATH:
+        # Save state in the background and once more on exit
+        from data.snapshot import create_snapshotter
+        snapshotter = create_snapshotter()
+        snapshotter.start()
+        atexit.register(snapshotter.stop)
+
+    console.line("Welcome to the Demo Marketplace")
+    console.line("=" * 40)
+
     while True:
         try:
-            print("\n1. User Login")
-            print("2. Admin Login")
-            print("3. Exit")
-            
-            choice = input("Enter your choice (1-3): ").strip()
-            
+            console.lines(["\n1. User Login", "2. Admin Login", "3. Exit"])
+
+            choice = console.prompt("Enter your choice (1-3): ").strip()
+
             if choice == "1":
                 # User Login
-                username = input("Enter username: ").strip()
-                password = input("Enter password: ").strip()
+                username = console.prompt("Enter username: ").strip()
+                password = console.prompt("Enter password: ").strip()
                 try:
                     session_id = user_login(username, password)
-                    user_menu(session_id)
-                except AuthenticationError:
+                except AuthenticationError as e:
+                    console.error("Login failed", e)
                     continue
-            
+                console.line(f"Welcome {username}! Login successful.")
+                user_menu(session_id)
+
             elif choice == "2":
                 # Admin Login
-                username = input("Enter admin username: ").strip()
-                password = input("Enter admin password: ").strip()
+                username = console.prompt("Enter admin username: ").strip()
+                password = console.prompt("Enter admin password: ").strip()
                 try:
                     session_id = admin_login(username, password)
-                    admin_menu(session_id)
-                except AuthenticationError:
+                except AuthenticationError as e:
+                    console.error("Admin login failed", e)
                     continue
-            
+                console.line(f"Welcome Admin {username}! Login successful.")
+                admin_menu(session_id)
+
             elif choice == "3":
                 # Exit
-                print("Thank you for using Demo Marketplace!")
+                console.line("Thank you for using Demo Marketplace!")
                 break
-            
+
             else:
-                print("Invalid choice. Please try again.")
-        
+                console.line("Invalid choice. Please try again.")
+
         except KeyboardInterrupt:
-            print("\n\nExiting application...")
+            console.line("\n\nExiting application...")
             break
         except Exception as e:
-            print(f"An error occurred: {e}")
+            console.error("An error occurred", e)
+        finally:
+            console.flush()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
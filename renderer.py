@@ -0,0 +1,181 @@
+"""
+Console renderer for the interactive shopping application
+
+Turns the typed results of the user and admin functions into text.
+Output is collected in a buffer and written in one batch when the
+application is about to wait for input.
+"""
+
+import sys
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, TextIO
+
+from data.results import (CartUpdate, CartSummary, CheckoutReceipt, SearchResults,
+                          CatalogChange, BulkUpdate, SalesDashboard, SalesFigure)
+
+if TYPE_CHECKING:
+    # Only for annotations; importing them would load the catalog at startup
+    from data.catalog import CatalogPage
+    from data.catalog_import import ImportReport
+
+SEPARATOR = "-" * 50
+MAX_REJECTIONS_SHOWN = 10
+
+
+class ConsoleRenderer:
+    """Buffered text rendering of results, menus and errors"""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.__stream = stream
+        self.__buffer: List[str] = []
+
+    def line(self, text: str = ""):
+        """Queue one line of output"""
+        self.__buffer.append(text)
+
+    def lines(self, texts: Iterable[str]):
+        """Queue several lines of output"""
+        self.__buffer.extend(texts)
+
+    def flush(self):
+        """Write all queued output at once"""
+        if not self.__buffer:
+            return
+        stream = self.__stream if self.__stream is not None else sys.stdout
+        self.__buffer.append("")
+        stream.write("\n".join(self.__buffer))
+        stream.flush()
+        self.__buffer.clear()
+
+    def prompt(self, text: str) -> str:
+        """Flush queued output, then read a line of input"""
+        self.flush()
+        return input(text)
+
+    def menu(self, title: str, options: List[str]):
+        self.line(f"\n=== {title} ===")
+        self.lines(f"{number}. {option}" for number, option in enumerate(options, start=1))
+
+    def error(self, action: str, error: Exception):
+        self.line(f"{action}: {error}")
+
+    # User results
+
+    def __product(self, product, categories: Dict, status: bool = False):
+        category = categories.get(product.category_id)
+        category_name = category.name if category else "Unknown"
+        self.line(f"ID: {product.product_id} | {product.name} | Rs. {product.price:.2f}")
+        if status:
+            state = "Active" if product.is_active() else "Inactive"
+            self.line(f"Category: {category_name} | Stock: {product.stock} | Status: {state}")
+        else:
+            self.line(f"Category: {category_name} | Stock: {product.stock}")
+        self.line(f"Description: {product.description}")
+        self.line(SEPARATOR)
+
+    def catalog_page(self, page: "CatalogPage", categories: Dict):
+        self.line("\n=== Product Catalog ===")
+        if not page.products:
+            self.line("No products available.")
+        for product in page.products:
+            self.__product(product, categories)
+
+    def search_results(self, results: SearchResults, categories: Dict):
+        self.line(f"\n=== Search Results for '{results.query}' ===")
+        if not results.products:
+            self.line("No matching products found.")
+        for product in results.products:
+            self.__product(product, categories)
+
+    def item_added(self, update: CartUpdate):
+        self.line(f"Added {update.quantity} x {update.product_name} to cart successfully!")
+
+    def item_removed(self, update: CartUpdate):
+        self.line(f"Removed {update.product_name} from cart successfully!")
+
+    def cart_summary(self, summary: CartSummary):
+        if summary.is_empty():
+            self.line("Your cart is empty.")
+            return
+        self.line("\n=== Your Cart ===")
+        for line in summary.lines:
+            self.line(f"{line.product_name} | Qty: {line.quantity} | "
+                      f"Price: Rs. {line.unit_price:.2f} | Total: Rs. {line.total_price:.2f}")
+        self.line(SEPARATOR)
+        self.line(f"Total Amount: Rs. {summary.total_amount:.2f}")
+        self.line(f"Total Items: {summary.item_count}")
+
+    def checkout_receipt(self, receipt: CheckoutReceipt):
+        from data.payment import payment_processor
+        self.line("Your order is successfully placed")
+        self.line(payment_processor.get_payment_message(receipt.payment_method, receipt.amount))
+        self.line(f"Transaction ID: {receipt.transaction_id}")
+
+    # Admin results
+
+    def catalog_change(self, change: CatalogChange):
+        noun = change.entity.capitalize()
+        if change.action == "added":
+            self.line(f"{noun} '{change.name}' added successfully with ID: {change.entity_id}")
+        else:
+            self.line(f"{noun} '{change.name}' {change.action} successfully!")
+
+    def bulk_update(self, update: BulkUpdate):
+        if update.field == "price":
+            self.line(f"{update.count} product prices updated successfully!")
+        else:
+            self.line(f"Stock adjusted for {update.count} products successfully!")
+
+    def import_report(self, report: "ImportReport"):
+        self.line(f"Imported {report.imported} {report.kind}, rejected {report.rejected} rows.")
+        for line_number, reason in report.rejections[:MAX_REJECTIONS_SHOWN]:
+            self.line(f"  Line {line_number}: {reason}")
+        if report.rejected > MAX_REJECTIONS_SHOWN:
+            self.line(f"  ... and {report.rejected - MAX_REJECTIONS_SHOWN} more")
+
+    def sales_dashboard(self, dashboard: SalesDashboard):
+        self.line("\n=== Sales Dashboard ===")
+        self.__sales_figure(dashboard.today)
+        self.__sales_figure(dashboard.last_24_hours)
+        sections = [
+            ("Sales per hour, last 24 hours", [figure for figure in dashboard.hourly if figure.units]),
+            (f"Sales per day, last {dashboard.days} days", dashboard.daily),
+            (f"Payment methods, last {dashboard.days} days", dashboard.payment_methods),
+            (f"Top categories, last {dashboard.days} days", dashboard.top_categories),
+            (f"Top products, last {dashboard.days} days", dashboard.top_products),
+        ]
+        for title, figures in sections:
+            self.line(SEPARATOR)
+            self.line(f"{title}:")
+            if not figures:
+                self.line("No sales.")
+            for figure in figures:
+                self.__sales_figure(figure)
+
+    def __sales_figure(self, figure: SalesFigure):
+        self.line(f"{figure.label} | Units: {figure.units} | Revenue: Rs. {figure.revenue:.2f}")
+
+    def all_products(self, products: Iterable, categories: Dict):
+        self.line("\n=== All Products (Admin View) ===")
+        empty = True
+        for product in products:
+            empty = False
+            self.__product(product, categories, status=True)
+        if empty:
+            self.line("No products found.")
+
+    def all_categories(self, categories: Iterable, product_counts: Dict[str, int]):
+        self.line("\n=== All Categories (Admin View) ===")
+        empty = True
+        for category in categories:
+            empty = False
+            status = "Active" if category.is_active() else "Inactive"
+            self.line(f"ID: {category.category_id} | {category.name} | Status: {status}")
+            self.line(f"Products: {product_counts.get(category.category_id, 0)} | "
+                      f"Description: {category.description}")
+            self.line(SEPARATOR)
+        if empty:
+            self.line("No categories found.")
+
+
+# Renderer used by the interactive application
+console = ConsoleRenderer()
@@ -0,0 +1,146 @@
+"""
+Asynchronous versions of the user shopping flows for event-loop servers
+"""
+
+import asyncio
+import weakref
+from typing import Optional
+
+from Authentication.user_login import validate_user_session
+from data.catalog import query_catalog, CatalogPage, DEFAULT_PAGE_SIZE
+from data.payment import payment_processor
+from data.shopping import (add_item, remove_item, get_cart, begin_checkout, complete_checkout,
+                           hold_checkout)
+from data.gateway_client import GatewayTimeoutError
+from data.results import CartUpdate, CartSummary, CheckoutReceipt
+from data.instrumentation import instrumented
+
+# user_id -> lock serializing that user's cart operations; a lock is
+# dropped as soon as no coroutine holds or waits for it
+_cart_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _cart_lock(user_id: str) -> asyncio.Lock:
+    lock = _cart_locks.get(user_id)
+    if lock is None:
+        lock = _cart_locks[user_id] = asyncio.Lock()
+    return lock
+
+
+@instrumented
+async def view_catalog_async(session_id: str, cursor: Optional[str] = None,
+                             page_size: int = DEFAULT_PAGE_SIZE,
+                             category_id: Optional[str] = None,
+                             min_price: Optional[float] = None,
+                             max_price: Optional[float] = None,
+                             in_stock_only: bool = False,
+                             sort_by: Optional[str] = None,
+                             descending: bool = False) -> CatalogPage:
+    """
+    Get one page of the product catalog (async user function)
+
+    Takes the same arguments as view_catalog.
+
+    Returns:
+        CatalogPage with the active products and the next page cursor
+
+    Raises:
+        AuthenticationError: If session is invalid
+        ValueError: If filters or cursor are invalid
+    """
+    validate_user_session(session_id)
+    return query_catalog(category_id, min_price, max_price, in_stock_only,
+                         sort_by, descending, page_size, cursor)
+
+
+@instrumented
+async def add_to_cart_async(session_id: str, product_id: str, quantity: int) -> CartUpdate:
+    """
+    Add product to cart (async user function)
+
+    Returns:
+        CartUpdate with the product and quantity added
+
+    Raises:
+        AuthenticationError: If session is invalid
+        ProductNotFoundError: If product not found
+        CartError: If cart operation fails
+    """
+    user_id = validate_user_session(session_id)
+    async with _cart_lock(user_id):
+        product = add_item(user_id, product_id, quantity)
+    return CartUpdate(product.product_id, product.name, quantity)
+
+
+@instrumented
+async def remove_from_cart_async(session_id: str, product_id: str) -> CartUpdate:
+    """
+    Remove product from cart (async user function)
+
+    Returns:
+        CartUpdate with the product and quantity removed
+
+    Raises:
+        AuthenticationError: If session is invalid
+        CartError: If cart operation fails
+    """
+    user_id = validate_user_session(session_id)
+    async with _cart_lock(user_id):
+        item = remove_item(user_id, product_id)
+    return CartUpdate(product_id, item.product.name, item.quantity)
+
+
+@instrumented
+async def view_cart_async(session_id: str) -> CartSummary:
+    """
+    Get the user's cart (async user function)
+
+    Waits for a checkout in progress so its half-finished state is never seen.
+
+    Returns:
+        CartSummary with the cart lines and totals (empty if there is no cart)
+
+    Raises:
+        AuthenticationError: If session is invalid
+    """
+    user_id = validate_user_session(session_id)
+    async with _cart_lock(user_id):
+        return CartSummary.of(get_cart(user_id))
+
+
+@instrumented
+async def checkout_async(session_id: str, payment_method: str) -> CheckoutReceipt:
+    """
+    Checkout and process payment (async user function)
+
+    Stock is reserved up front and the payment, which may block on the
+    journal, runs in the loop's default executor. The user's cart stays
+    locked until the checkout completes or fails.
+
+    Returns:
+        CheckoutReceipt with the transaction ID and amount paid
+
+    Raises:
+        AuthenticationError: If session is invalid
+        CartError: If cart is empty or has issues
+        PaymentError: If payment processing fails
+        GatewayTimeoutError: If the charge is in doubt; the order is held until
+            the payment is settled
+    """
+    user_id = validate_user_session(session_id)
+    loop = asyncio.get_running_loop()
+    async with _cart_lock(user_id):
+        pending = begin_checkout(user_id)
+        try:
+            transaction_id = await loop.run_in_executor(
+                None, payment_processor.process_payment, pending.total_amount, payment_method,
+                user_id, pending.lines)
+        except GatewayTimeoutError as e:
+            # The customer may have been charged, so keep the stock until the charge is settled
+            hold_checkout(e.transaction_id, user_id, pending, payment_method)
+            raise
+        except Exception:
+            pending.reservation.rollback()
+            raise
+        complete_checkout(user_id, pending, payment_method)
+    return CheckoutReceipt(transaction_id, payment_method, pending.total_amount)
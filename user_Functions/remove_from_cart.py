@@ -3,11 +3,13 @@ Remove products from cart functionality for users
 """
 
 from Authentication.user_login import validate_user_session
-from data.carts import carts_data
-from data.exceptions import CartError
+from data.shopping import remove_item
+from data.results import CartUpdate
+from data.instrumentation import instrumented
 
 
-def remove_from_cart(session_id: str, product_id: str):
+@instrumented
+def remove_from_cart(session_id: str, product_id: str) -> CartUpdate:
     """
     Remove product from cart (user function)
     
@@ -15,6 +17,9 @@ def remove_from_cart(session_id: str, product_id: str):
         session_id: User's session identifier
         product_id: ID of the product to remove
     
+    Returns:
+        CartUpdate with the product and quantity removed
+    
     Raises:
         AuthenticationError: If session is invalid
         CartError: If cart operation fails
@@ -22,16 +27,5 @@ def remove_from_cart(session_id: str, product_id: str):
     # Validate user session
     user_id = validate_user_session(session_id)
     
-    try:
-        # Check if user has a cart
-        if user_id not in carts_data:
-            raise CartError("Cart is empty")
-        
-        cart = carts_data[user_id]
-        cart.remove_item(product_id)
-        
-        print("Product removed from cart successfully!")
-        
-    except CartError as e:
-        print(f"Error removing from cart: {e}")
-        raise
\ No newline at end of file
+    item = remove_item(user_id, product_id)
+    return CartUpdate(product_id, item.product.name, item.quantity)
@@ -0,0 +1,37 @@
+"""
+Product search functionality for users
+"""
+
+from Authentication.user_login import validate_user_session
+from data.products import products_data
+from data.search import search_index, DEFAULT_SEARCH_LIMIT
+from data.results import SearchResults
+from data.instrumentation import instrumented
+
+
+@instrumented
+def search_products(session_id: str, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> SearchResults:
+    """
+    Search active products by name and description (user function)
+
+    Args:
+        session_id: User's session identifier
+        query: Search words; each word also matches longer words it starts
+        limit: Maximum number of results
+
+    Returns:
+        SearchResults with the matching products, most relevant first
+
+    Raises:
+        AuthenticationError: If session is invalid
+        ValueError: If limit is not positive
+    """
+    # Validate user session
+    validate_user_session(session_id)
+
+    if limit < 1:
+        raise ValueError("Limit must be positive")
+
+    products = [products_data[product_id]
+                for product_id, _ in search_index.search(query, limit)]
+    return SearchResults(query, products)
@@ -3,39 +3,26 @@ View cart contents functionality for users
 """
 
 from Authentication.user_login import validate_user_session
-from data.carts import carts_data
+from data.shopping import get_cart
+from data.results import CartSummary
+from data.instrumentation import instrumented
 
 
-def view_cart(session_id: str):
+@instrumented
+def view_cart(session_id: str) -> CartSummary:
     """
     View cart contents (user function)
     
     Args:
         session_id: User's session identifier
     
+    Returns:
+        CartSummary with the cart lines and totals (empty if there is no cart)
+    
     Raises:
         AuthenticationError: If session is invalid
     """
     # Validate user session
     user_id = validate_user_session(session_id)
     
-    # Check if user has items in cart
-    if user_id not in carts_data or carts_data[user_id].is_empty():
-        print("Your cart is empty.")
-        return
-    
-    cart = carts_data[user_id]
-    items = cart.get_items()
-    
-    print("\n=== Your Cart ===")
-    total_amount = 0
-    
-    for item in items:
-        item_total = item.get_total_price()
-        total_amount += item_total
-        print(f"{item.product.name} | Qty: {item.quantity} | "
-              f"Price: Rs. {item.product.price:.2f} | Total: Rs. {item_total:.2f}")
-    
-    print("-" * 50)
-    print(f"Total Amount: Rs. {total_amount:.2f}")
-    print(f"Total Items: {cart.get_item_count()}")
\ No newline at end of file
+    return CartSummary.of(get_cart(user_id))
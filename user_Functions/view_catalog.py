@@ -2,42 +2,44 @@
 View product catalog functionality for users
 """
 
-from typing import List
+from typing import Optional
 from Authentication.user_login import validate_user_session
-from data.products import products_data
-from data.categories import categories_data
+from data.catalog import query_catalog, CatalogPage, DEFAULT_PAGE_SIZE
+from data.instrumentation import instrumented
 
 
-def view_catalog(session_id: str) -> List:
+@instrumented
+def view_catalog(session_id: str, cursor: Optional[str] = None,
+                 page_size: int = DEFAULT_PAGE_SIZE,
+                 category_id: Optional[str] = None,
+                 min_price: Optional[float] = None,
+                 max_price: Optional[float] = None,
+                 in_stock_only: bool = False,
+                 sort_by: Optional[str] = None,
+                 descending: bool = False) -> CatalogPage:
     """
-    View product catalog (user function)
+    View one page of the product catalog (user function)
     
     Args:
         session_id: User's session identifier
+        cursor: Cursor of the page to show (optional, first page if omitted)
+        page_size: Maximum number of products per page
+        category_id: Only show products of this category (optional)
+        min_price: Minimum price filter (optional)
+        max_price: Maximum price filter (optional)
+        in_stock_only: Only show products with stock left
+        sort_by: Sort by "price" or "name" (optional)
+        descending: Reverse the sort order
     
     Returns:
-        List of active products
+        CatalogPage with the active products shown and the next page cursor
     
     Raises:
         AuthenticationError: If session is invalid
+        ValueError: If filters or cursor are invalid
     """
     # Validate user session
     validate_user_session(session_id)
     
-    # Get active products
-    active_products = [p for p in products_data.values() if p.is_active()]
-    
-    print("\n=== Product Catalog ===")
-    if not active_products:
-        print("No products available.")
-        return []
-    
-    for product in active_products:
-        category = categories_data.get(product.category_id)
-        category_name = category.name if category else "Unknown"
-        print(f"ID: {product.product_id} | {product.name} | Rs. {product.price:.2f}")
-        print(f"Category: {category_name} | Stock: {product.stock}")
-        print(f"Description: {product.description}")
-        print("-" * 50)
-    
-    return active_products
\ No newline at end of file
+    return query_catalog(category_id, min_price, max_price, in_stock_only,
+                         sort_by, descending, page_size, cursor)
\ No newline at end of file